@@ -0,0 +1,102 @@
+import asyncio, math, statistics, time
+from collections import deque
+from typing import Callable, Dict, Optional
+from starlette.responses import JSONResponse
+from .metrics import ADMISSION_WAIT
+
+class Overloaded(Exception):
+    def __init__(self, gate: str, retry_after: int):
+        super().__init__(f"{gate} capacity exhausted")
+        self.gate, self.retry_after = gate, retry_after
+
+class Gate:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one class of endpoints.
+    Lives on the event loop: callers beyond `limit` wait up to `wait_s` for a slot; when
+    `queue_size` callers are already waiting (or the wait times out) acquire raises Overloaded.
+    """
+    def __init__(self, name: str, limit: int, queue_size: int, wait_s: float):
+        self.name, self.limit, self.queue_size, self.wait_s = name, max(1, limit), max(0, queue_size), wait_s
+        self.inflight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self._waits_ms = deque(maxlen=1000)
+        self._hold_s = 1.0   # EWMA of how long a request keeps its slot; drives Retry-After
+        self.admitted = self.rejected = self.timed_out = self.peak_waiting = 0
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._hold_s * (len(self._waiters) + 1) / self.limit))
+
+    async def acquire(self) -> float:
+        t0 = time.monotonic()
+        if self.inflight < self.limit and not self._waiters:
+            self.inflight += 1
+        else:
+            if len(self._waiters) >= self.queue_size:
+                self.rejected += 1
+                raise Overloaded(self.name, self.retry_after())
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            self.peak_waiting = max(self.peak_waiting, len(self._waiters))
+            try:
+                await asyncio.wait_for(asyncio.shield(fut), self.wait_s)
+            except BaseException as e:
+                if fut.done() and not fut.cancelled():
+                    self.release(t0)   # a slot was handed over just as we gave up
+                else:
+                    fut.cancel()
+                    self._waiters.remove(fut)
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timed_out += 1
+                    raise Overloaded(self.name, self.retry_after()) from None
+                raise
+        self.admitted += 1
+        started = time.monotonic()
+        self._waits_ms.append((started - t0) * 1000)
+        ADMISSION_WAIT.labels(gate=self.name).observe(started - t0)
+        return started
+
+    def release(self, started: Optional[float] = None) -> None:
+        if started is not None:
+            self._hold_s = 0.8 * self._hold_s + 0.2 * (time.monotonic() - started)
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)   # hand the slot straight to the next waiter
+                return
+        self.inflight -= 1
+
+    def stats(self) -> Dict[str, float]:
+        waits = sorted(self._waits_ms)
+        return {
+            "limit": self.limit, "queue_size": self.queue_size, "inflight": self.inflight,
+            "waiting": len(self._waiters), "peak_waiting": self.peak_waiting,
+            "admitted": self.admitted, "rejected": self.rejected, "timed_out": self.timed_out,
+            "wait_p50_ms": round(statistics.median(waits), 1) if waits else 0.0,
+            "wait_p95_ms": round(waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+            "hold_ewma_s": round(self._hold_s, 3),
+        }
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware: requests whose path `classify` maps to a gate hold one of its slots until
+    the response (streamed bodies included) has been sent; overflow gets 503 + Retry-After
+    before touching the threadpool.
+    """
+    def __init__(self, app, gates: Dict[str, Gate], classify: Callable[[str, str], Optional[str]]):
+        self.app, self.gates, self.classify = app, gates, classify
+
+    async def __call__(self, scope, receive, send):
+        name = self.classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        gate = self.gates.get(name) if name else None
+        if gate is None:
+            return await self.app(scope, receive, send)
+        try:
+            started = await gate.acquire()
+        except Overloaded as e:
+            response = JSONResponse({"detail": f"Server busy ({e.gate}); retry shortly."}, status_code=503,
+                                    headers={"Retry-After": str(e.retry_after)})
+            return await response(scope, receive, send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(started)
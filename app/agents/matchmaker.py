@@ -1,4 +1,9 @@
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence, Tuple
+import numpy as np
+from ..records import InvestorRecord, as_record
+
+Scored = Tuple[InvestorRecord, Dict]   # (investor, score dict) as ranked
 
 WEIGHTS = {"stage": 0.40, "sector": 0.35, "geo": 0.15, "momentum": 0.10}
 def _norm(x): return max(0.0, min(1.0, float(x)))
@@ -22,6 +27,15 @@ def _canon_stage(s: str) -> str:
     elif s in {"series-c", "seriesc"}: s = "series-c"
     return s
 
+_ADJ = {
+    "pre-seed": {"seed"},
+    "seed": {"pre-seed", "pre-series-a", "series-a"},
+    "pre-series-a": {"seed", "series-a"},
+    "series-a": {"pre-series-a", "series-b"},
+    "series-b": {"series-a", "series-c"},
+    "series-c": {"series-b"},
+}
+
 def _stage_match(user_stage: str, inv_stages: set) -> float:
     """
     Returns a stage fitness in [0..1] with loose equivalence.
@@ -38,32 +52,14 @@ def _stage_match(user_stage: str, inv_stages: set) -> float:
         if u in group and (group & inv):
             return 0.75
     # adjacent stages get small credit
-    adj = {
-        "pre-seed": {"seed"},
-        "seed": {"pre-seed", "pre-series-a", "series-a"},
-        "pre-series-a": {"seed", "series-a"},
-        "series-a": {"pre-series-a", "series-b"},
-        "series-b": {"series-a", "series-c"},
-        "series-c": {"series-b"},
-    }
-    if any(s in inv for s in adj.get(u, set())):
+    if any(s in inv for s in _ADJ.get(u, set())):
         return 0.4
     return 0.0
 
-def score_one(brief: dict, inv: Dict) -> Dict:
-    stage = (brief.get("stage") or "").lower()
-    sectors = {s.lower() for s in brief.get("sector", [])}
-    geo = (brief.get("geo") or "").lower()
-
-    inv_stages = {s.lower() for s in inv.get("stages", [])}
-    inv_sectors = {s.lower() for s in inv.get("sectors", [])}
-    inv_geo = (inv.get("geo") or "").lower()
-    momentum = 1.0 if inv.get("recent_news") else 0.5
-
-    stage_fit = _stage_match(stage, inv_stages)
-    sector_fit = len(sectors & inv_sectors) / max(1, len(sectors)) if sectors else 0.0
-    geo_fit = 1.0 if (not geo or geo in inv_geo or inv_geo in geo) else 0.5 if inv_geo in ["remote","global","us/eu"] else 0.0
+def _geo_match(geo: str, inv_geo: str) -> float:
+    return 1.0 if (not geo or geo in inv_geo or inv_geo in geo) else 0.5 if inv_geo in ["remote","global","us/eu"] else 0.0
 
+def _score_dict(stage_fit: float, sector_fit: float, geo_fit: float, momentum: float, has_news: bool) -> Dict:
     total = (
         WEIGHTS["stage"] * _norm(stage_fit) +
         WEIGHTS["sector"] * _norm(sector_fit) +
@@ -77,7 +73,7 @@ def score_one(brief: dict, inv: Dict) -> Dict:
     elif stage_fit >= 0.7: bits.append("nearby stage")
     if sector_fit >= 0.5: bits.append("sector overlap")
     if geo_fit >= 0.9:   bits.append("geo fit")
-    if inv.get("recent_news"): bits.append("recent activity")
+    if has_news: bits.append("recent activity")
     rationale = ", ".join(bits) or "general thesis alignment"
 
     return {
@@ -89,11 +85,278 @@ def score_one(brief: dict, inv: Dict) -> Dict:
         "rationale": rationale,
     }
 
-def run(brief: dict, investors: List[Dict]) -> List[Dict]:
-    out = []
-    for inv in investors:
-        inv_copy = dict(inv)
-        inv_copy["_score"] = score_one(brief, inv)
-        out.append(inv_copy)
-    out.sort(key=lambda x: x["_score"]["fit_score"], reverse=True)
+def score_one(brief: dict, inv: Dict) -> Dict:
+    stage = (brief.get("stage") or "").lower()
+    sectors = {s.lower() for s in brief.get("sector", [])}
+    geo = (brief.get("geo") or "").lower()
+
+    inv_stages = {s.lower() for s in inv.get("stages", [])}
+    inv_sectors = {s.lower() for s in inv.get("sectors", [])}
+    inv_geo = (inv.get("geo") or "").lower()
+    momentum = 1.0 if inv.get("recent_news") else 0.5
+
+    stage_fit = _stage_match(stage, inv_stages)
+    sector_fit = len(sectors & inv_sectors) / max(1, len(sectors)) if sectors else 0.0
+    geo_fit = _geo_match(geo, inv_geo)
+    return _score_dict(stage_fit, sector_fit, geo_fit, momentum, bool(inv.get("recent_news")))
+
+# ---------- Columnar batch scoring ----------
+@lru_cache(maxsize=4096)
+def _canon_lower(s: str) -> str:
+    # record stage/sector/geo strings are interned, so this is one lookup per distinct value
+    return _canon_stage(s.lower())
+
+@lru_cache(maxsize=4096)
+def _lower(s: str) -> str:
+    return s.lower()
+
+def _stage_credit(user_stage: str, s: str) -> float:
+    """Credit a single canonical investor stage earns; _stage_match is the max over an investor's stages."""
+    u = _canon_stage(user_stage)
+    if s == u:
+        return 1.0
+    if any(u in group and s in group for group in _EQUIV.values()):
+        return 0.75
+    if s in _ADJ.get(u, set()):
+        return 0.4
+    return 0.0
+
+def stage_credit_sets(user_stage: str) -> Tuple[List[str], List[str], List[str]]:
+    """Canonical investor stages earning 1, 0.75 and 0.4 from _stage_credit (for SQL-side pre-scoring)."""
+    if not user_stage:
+        return [], [], []
+    u = _canon_stage(user_stage)
+    loose = sorted({s for group in _EQUIV.values() if u in group for s in group} - {u})
+    adjacent = sorted(_ADJ.get(u, set()) - {u} - set(loose))
+    return [u], loose, adjacent
+
+class InvestorMatrix:
+    """
+    Investors encoded once as stage/sector membership matrices plus geo codes and a news flag,
+    so a brief can be scored against the whole list with array ops. Plain dicts are converted
+    to InvestorRecords; records are used as-is.
+    """
+    def __init__(self, investors: List):
+        self.investors: List[InvestorRecord] = [as_record(inv) for inv in investors]
+        self.stage_vocab: Dict[str, int] = {}
+        self.sector_vocab: Dict[str, int] = {}
+        self.geo_vocab: Dict[str, int] = {}
+        self._encode(np.full(len(self.investors), -1, dtype=np.intp))
+
+    def updated(self, investors: List[InvestorRecord], reuse: np.ndarray) -> "InvestorMatrix":
+        """
+        Matrix for a new corpus version: reuse[i] is investors[i]'s row here (same record) or -1.
+        Reused rows are copied; only the rest are encoded. Vocabularies only grow, and a column
+        no investor uses any more scores 0, so values match a fresh build.
+        """
+        new = InvestorMatrix.__new__(InvestorMatrix)
+        new.investors = list(investors)
+        new.stage_vocab, new.sector_vocab, new.geo_vocab = dict(self.stage_vocab), dict(self.sector_vocab), dict(self.geo_vocab)
+        new._encode(reuse, self)
+        return new
+
+    def _encode(self, reuse: np.ndarray, previous: Optional["InvestorMatrix"] = None) -> None:
+        n = len(self.investors)
+        kept, fresh = np.flatnonzero(reuse >= 0), np.flatnonzero(reuse < 0)
+        st_rows, st_cols, sec_rows, sec_cols = [], [], [], []
+        self.geo_codes = np.empty(n, dtype=np.int32)
+        self.has_news = np.empty(n, dtype=bool)
+        for i in fresh.tolist():
+            inv = self.investors[i]
+            for s in {_canon_lower(x) for x in inv.stages}:
+                st_rows.append(i); st_cols.append(self.stage_vocab.setdefault(s, len(self.stage_vocab)))
+            for s in {_lower(x) for x in inv.sectors}:
+                sec_rows.append(i); sec_cols.append(self.sector_vocab.setdefault(s, len(self.sector_vocab)))
+            self.geo_codes[i] = self.geo_vocab.setdefault(_lower(inv.geo or ""), len(self.geo_vocab))
+            self.has_news[i] = bool(inv.recent_news)
+        self.stages = np.zeros((n, len(self.stage_vocab)), dtype=bool)
+        self.stages[st_rows, st_cols] = True
+        self.sectors = np.zeros((n, len(self.sector_vocab)), dtype=bool)
+        self.sectors[sec_rows, sec_cols] = True
+        if kept.size:
+            rows = reuse[kept]
+            self.stages[kept, :previous.stages.shape[1]] = previous.stages[rows]
+            self.sectors[kept, :previous.sectors.shape[1]] = previous.sectors[rows]
+            self.geo_codes[kept] = previous.geo_codes[rows]
+            self.has_news[kept] = previous.has_news[rows]
+
+    def __len__(self):
+        return len(self.investors)
+
+def _components(brief: dict, mat: InvestorMatrix, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Fit components for one brief over the matrix, or only over `rows` of it."""
+    stages, sectors_m = mat.stages, mat.sectors
+    geo_codes, has_news = mat.geo_codes, mat.has_news
+    if rows is not None:
+        stages, sectors_m, geo_codes, has_news = stages[rows], sectors_m[rows], geo_codes[rows], has_news[rows]
+    n = len(has_news)
+    stage = (brief.get("stage") or "").lower()
+    sectors = {s.lower() for s in brief.get("sector", [])}
+    geo = (brief.get("geo") or "").lower()
+
+    if stage and mat.stage_vocab:
+        credit = np.array([_stage_credit(stage, s) for s in mat.stage_vocab], dtype=float)
+        stage_fit = (stages * credit).max(axis=1)
+    else:
+        stage_fit = np.zeros(n)
+    if sectors:
+        cols = [mat.sector_vocab[s] for s in sectors if s in mat.sector_vocab]
+        sector_fit = sectors_m[:, cols].sum(axis=1) / max(1, len(sectors))
+    else:
+        sector_fit = np.zeros(n)
+    geo_fit = np.array([_geo_match(geo, g) for g in mat.geo_vocab], dtype=float)[geo_codes] if n else np.zeros(0)
+    momentum = np.where(has_news, 1.0, 0.5)
+    return {"stage_fit": stage_fit, "sector_fit": sector_fit, "geo_fit": geo_fit, "momentum": momentum,
+            "has_news": has_news}
+
+def _total(cols: Dict[str, np.ndarray]) -> np.ndarray:
+    return (
+        WEIGHTS["stage"] * np.clip(cols["stage_fit"], 0.0, 1.0) +
+        WEIGHTS["sector"] * np.clip(cols["sector_fit"], 0.0, 1.0) +
+        WEIGHTS["geo"] * np.clip(cols["geo_fit"], 0.0, 1.0) +
+        WEIGHTS["momentum"] * np.clip(cols["momentum"], 0.0, 1.0)
+    )
+
+def score_matrix(brief: dict, mat: InvestorMatrix) -> Dict[str, np.ndarray]:
+    """Per-investor fit components and fit_score for one brief; identical values to score_one."""
+    cols = _components(brief, mat)
+    del cols["has_news"]
+    cols["fit_score"] = _fit_scores(_total(cols))
+    return cols
+
+def _fit_scores(total: np.ndarray) -> np.ndarray:
+    # Python's round() per distinct total keeps fit_score (and therefore ordering) bit-identical
+    uniq, codes = np.unique(total, return_inverse=True)
+    return np.array([round(100 * float(t), 1) for t in uniq])[codes.reshape(total.shape)]
+
+def _top_k(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+    """Indices of the k best scores, ordered by score desc then original position (stable-sort order)."""
+    n = scores.size
+    if k is None or k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[: k - above.size]
+    idx = np.concatenate([above, ties])
+    return idx[np.lexsort((idx, -scores[idx]))]
+
+def _ranked(investors: List[InvestorRecord], cols: Dict[str, np.ndarray], top_k: Optional[int]) -> List[Scored]:
+    return [
+        (investors[i], _score_dict(
+            float(cols["stage_fit"][i]), float(cols["sector_fit"][i]), float(cols["geo_fit"][i]),
+            float(cols["momentum"][i]), bool(cols["has_news"][i]),
+        ))
+        for i in _top_k(_fit_scores(_total(cols)), top_k)
+    ]
+
+def rank_rows(brief: dict, mat: InvestorMatrix, candidates: List[InvestorRecord], rows: Sequence[int],
+              top_k: Optional[int] = None) -> List[Scored]:
+    """
+    run(brief, candidates, top_k) without re-encoding the corpus: rows[i] >= 0 says candidates[i]
+    is that row of the prebuilt `mat` (the index's matrix); only the others (live hits, enriched
+    records) are encoded, in a small matrix of their own.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    n = len(candidates)
+    if not n:
+        return []
+    cols = {k: np.empty(n, dtype=bool if k == "has_news" else float)
+            for k in ("stage_fit", "sector_fit", "geo_fit", "momentum", "has_news")}
+    kept, fresh = np.flatnonzero(rows >= 0), np.flatnonzero(rows < 0)
+    parts = [(kept, _components(brief, mat, rows[kept]))]
+    if fresh.size:
+        parts.append((fresh, _components(brief, InvestorMatrix([candidates[i] for i in fresh.tolist()]))))
+    for sel, part in parts:
+        for k, v in part.items():
+            cols[k][sel] = v
+    return _ranked(candidates, cols, top_k)
+
+def rank(brief: dict, mat: InvestorMatrix, top_k: Optional[int] = None) -> List[Scored]:
+    """(record, score) pairs, best first; the records are the matrix's own, not copies."""
+    if not len(mat):
+        return []
+    return _ranked(mat.investors, _components(brief, mat), top_k)
+
+# ---------- Cohort batch scoring ----------
+def _brief_block(briefs: List[dict], mat: InvestorMatrix):
+    """Per-brief stage credit (S, B), sector one-hot (Sec, B) with sector counts, geo fit table (G, B)."""
+    b = len(briefs)
+    credit = np.zeros((len(mat.stage_vocab), b))
+    onehot = np.zeros((len(mat.sector_vocab), b), dtype=np.float32)
+    n_sectors = np.ones(b)
+    geo = np.zeros((len(mat.geo_vocab), b))
+    for j, brief in enumerate(briefs):
+        stage = (brief.get("stage") or "").lower()
+        sectors = {s.lower() for s in brief.get("sector", [])}
+        g = (brief.get("geo") or "").lower()
+        if stage:
+            credit[:, j] = [_stage_credit(stage, s) for s in mat.stage_vocab]
+        for s in sectors:
+            if s in mat.sector_vocab:
+                onehot[mat.sector_vocab[s], j] = 1.0
+        n_sectors[j] = max(1, len(sectors))
+        geo[:, j] = [_geo_match(g, x) for x in mat.geo_vocab]
+    return credit, onehot, n_sectors, geo
+
+def _batch_components(briefs: List[dict], mat: InvestorMatrix) -> Dict[str, np.ndarray]:
+    n, b = len(mat), len(briefs)
+    credit, onehot, n_sectors, geo = _brief_block(briefs, mat)
+    stages = mat.stages.astype(np.float32)
+
+    stage_fit = np.zeros((n, b))
+    for level in sorted({float(c) for c in np.unique(credit) if c > 0}):
+        hit = (stages @ (credit == level).astype(np.float32)) > 0
+        stage_fit[hit] = level
+    sector_fit = (mat.sectors.astype(np.float32) @ onehot).astype(float) / n_sectors
+    geo_fit = geo[mat.geo_codes] if n else np.zeros((0, b))
+    momentum = np.where(mat.has_news, 1.0, 0.5)
+
+    total = (
+        WEIGHTS["stage"] * np.clip(stage_fit, 0.0, 1.0) +
+        WEIGHTS["sector"] * np.clip(sector_fit, 0.0, 1.0) +
+        WEIGHTS["geo"] * np.clip(geo_fit, 0.0, 1.0) +
+        WEIGHTS["momentum"] * np.clip(momentum, 0.0, 1.0)[:, None]
+    )
+    return {"stage_fit": stage_fit, "sector_fit": sector_fit, "geo_fit": geo_fit, "momentum": momentum, "total": total}
+
+def score_batch(briefs: List[dict], mat: InvestorMatrix) -> Dict[str, np.ndarray]:
+    """
+    score_matrix for many briefs at once: (N, B) columns, one per brief, with identical values.
+    Sector overlap is one matmul; stage fit is one matmul per credit level (1, 0.75, 0.4),
+    keeping the best level an investor's stages reach.
+    """
+    cols = _batch_components(briefs, mat)
+    cols["fit_score"] = _fit_scores(cols.pop("total"))
+    return cols
+
+def rank_batch(briefs: List[dict], mat: InvestorMatrix, candidate_ids: List[Sequence[int]],
+               top_k: Optional[int] = None, chunk: int = 16) -> List[List[Scored]]:
+    """
+    rank() for every brief against one corpus-wide matrix. candidate_ids[j] are brief j's rows
+    in candidate order, so each ranking equals rank(brief, InvestorMatrix(those rows), top_k).
+    Briefs are scored `chunk` at a time to bound the (N, chunk) score columns, and fit_score is
+    rounded only over each brief's candidates.
+    """
+    out: List[List[Scored]] = []
+    for lo in range(0, len(briefs), max(1, chunk)):
+        block = briefs[lo:lo + chunk]
+        cols = _batch_components(block, mat) if len(mat) else None
+        for j in range(len(block)):
+            ids = np.asarray(candidate_ids[lo + j], dtype=np.intp)
+            if cols is None or not ids.size:
+                out.append([])
+                continue
+            rows = ids[_top_k(_fit_scores(cols["total"][ids, j]), top_k)]
+            out.append([
+                (mat.investors[i], _score_dict(
+                    float(cols["stage_fit"][i, j]), float(cols["sector_fit"][i, j]), float(cols["geo_fit"][i, j]),
+                    float(cols["momentum"][i]), bool(mat.has_news[i]),
+                ))
+                for i in rows
+            ])
     return out
+
+def run(brief: dict, investors: List, top_k: Optional[int] = None) -> List[Scored]:
+    return rank(brief, InvestorMatrix(investors), top_k)
@@ -1,26 +1,54 @@
-from typing import List, Dict
-from ..tools.search import search_investors_by_hint
-from ..tools.fetch import fetch_text
+from typing import Iterator, List, Optional, Sequence, Tuple
+from ..tools.index import InvestorIndex
+from ..tools.search import search_investors_by_hint, seed_candidate_ids, seed_candidates_sql
+from ..tools.fetch import iter_fetch
 from ..tools.extract import recent_highlights
+from ..records import InvestorRecord
 
-def run(brief: dict, allow_scrape: bool = False) -> List[Dict]:
+def _hint(brief: dict) -> Optional[Tuple[List[str], str, str]]:
     sectors = brief.get("sector", [])
     stage = (brief.get("stage") or "").strip().lower()
     geo = (brief.get("geo") or "").strip()
 
     # If no signal at all, return empty (API validator should already prevent this)
     if not sectors and not stage and not geo:
-        return []
+        return None
+    return sectors, stage or "seed", geo
 
-    candidates = search_investors_by_hint(sectors, stage or "seed", geo)
+def search(brief: dict, index: Optional[InvestorIndex] = None) -> List[InvestorRecord]:
+    hint = _hint(brief)
+    return search_investors_by_hint(*hint, index=index) if hint else []
 
+def seed_ids(brief: dict, index: InvestorIndex) -> Sequence[int]:
+    """search() restricted to the seed corpus, as row ids into `index` (batch ranking)."""
+    hint = _hint(brief)
+    return seed_candidate_ids(*hint, index=index) if hint else []
+
+def seed_candidates(brief: dict) -> List[InvestorRecord]:
+    """search() restricted to the seed corpus in the investors table (RETRIEVAL=postgres)."""
+    hint = _hint(brief)
+    return seed_candidates_sql(*hint) if hint else []
+
+def iter_enrich(candidates: List[InvestorRecord]) -> Iterator[Tuple[str, str]]:
+    """
+    Scrape the first 20 candidates' URLs in one concurrent, deadline-bounded phase, yielding
+    (url, text) as pages land. Once the phase ends, enriched records replace their originals in
+    `candidates` (records are shared with the seed index); late pages are skipped.
+    """
+    targets = candidates[:20]
+    texts = {}
+    for url, txt in iter_fetch([u for inv in targets for u in inv.urls[:3]]):
+        if txt:
+            texts[url] = txt
+        yield url, txt
+    for i, inv in enumerate(targets):
+        blobs = [texts[u] for u in inv.urls[:3] if texts.get(u)]
+        if blobs:
+            candidates[i] = inv.replace(recent_news=recent_highlights(" ".join(blobs), max_items=3))
+
+def run(brief: dict, allow_scrape: bool = False) -> List[InvestorRecord]:
+    candidates = search(brief)
     if allow_scrape:
-        for inv in candidates[:20]:
-            blobs = []
-            for u in inv.get("urls", [])[:3]:
-                txt = fetch_text(u)
-                if txt:
-                    blobs.append(txt)
-            if blobs:
-                inv["recent_news"] = recent_highlights(" ".join(blobs), max_items=3)
+        for _ in iter_enrich(candidates):
+            pass
     return candidates
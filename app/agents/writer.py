@@ -1,14 +1,111 @@
-from ..tools.llm_gemini import draft_email_gemini
+import statistics, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+from ..config import EMAIL_CONCURRENCY, LLM_EMAIL_BUDGET, GEMINI_MODEL
+from ..draft_cache import drafts
+from ..tools.llm_gemini import draft_email, stream_email, prompt_version
+from ..tools.ratelimit import Budget
 
-def run(investor: dict, score: dict, brief: dict, use_llm: bool = True) -> str:
-    rationale = (
+def _rationale(investor: dict, score: dict) -> str:
+    return (
         f"{investor.get('fund')} invests at {', '.join(investor.get('stages', []))} "
         f"in {', '.join(investor.get('sectors', []))}. {score.get('rationale','Thesis alignment.')} "
     )
-    return draft_email_gemini(
+
+# recent time-to-first-token of streamed drafts, in ms
+_ttft_ms = deque(maxlen=500)
+
+def _cache_key(investor: dict, brief: dict, model) -> str:
+    model_name = GEMINI_MODEL if model is None else getattr(model, "model_name", type(model).__name__)
+    return drafts.key_for(brief, investor, model_name, prompt_version())
+
+def draft(investor: dict, score: dict, brief: dict, use_llm: bool = True,
+          budget: Optional[Budget] = None, model=None, regenerate: bool = False) -> Tuple[str, str]:
+    """
+    (email, source) — see llm_gemini.draft_email; source is "cache" when a previous LLM draft for
+    the same brief, investor, model and prompt version is reused. `regenerate` skips the lookup.
+    """
+    key = _cache_key(investor, brief, model) if use_llm else None
+    if key:
+        if not regenerate:
+            cached = drafts.get(key)
+            if cached is not None:
+                return cached, "cache"
+    email, source = draft_email(
         investor.get("name","Investor"),
         investor.get("fund","Fund"),
-        rationale,
+        _rationale(investor, score),
         brief,
-        allow_llm=use_llm
+        allow_llm=use_llm,
+        budget=budget,
+        model=model,
     )
+    # only real LLM output is worth keeping; the template is free to rebuild
+    if key and source == "llm":
+        drafts.put(key, brief, investor, email)
+    return email, source
+
+def iter_draft(investor: dict, score: dict, brief: dict, use_llm: bool = True,
+               model=None, regenerate: bool = False) -> Iterator[Dict]:
+    """
+    Streamed draft as events: {"event": "chunk", "text"} while Gemini generates, then
+    {"event": "done", "source", "ttft_ms", "total_ms"}. Cache hits and the template arrive as one chunk.
+    If the stream breaks midway, {"event": "fallback", "text"} carries the template that replaces
+    the chunks so far, and done reports source "fallback"; only complete LLM drafts are cached.
+    """
+    t0 = time.perf_counter()
+    ttft = None
+    key = _cache_key(investor, brief, model) if use_llm else None
+    cached = drafts.get(key) if key and not regenerate else None
+    if cached is not None:
+        pieces, source = iter([(cached, "cache")]), "cache"
+    else:
+        pieces, source = stream_email(
+            investor.get("name","Investor"), investor.get("fund","Fund"), _rationale(investor, score),
+            brief, allow_llm=use_llm, model=model,
+        ), "fallback"
+    parts = []
+    for piece, source in pieces:
+        if ttft is None:
+            ttft = (time.perf_counter() - t0) * 1000
+        if source == "truncated":
+            parts, source = [piece], "fallback"
+            yield {"event": "fallback", "text": piece}
+            break
+        parts.append(piece)
+        yield {"event": "chunk", "text": piece}
+    if key and source == "llm":
+        drafts.put(key, brief, investor, "".join(parts).strip())
+    if source == "llm":
+        _ttft_ms.append(ttft)
+    yield {"event": "done", "source": source, "ttft_ms": round(ttft or 0, 1),
+           "total_ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+def ttft_stats() -> Dict[str, float]:
+    """Time-to-first-token over recent streamed LLM drafts."""
+    xs = sorted(_ttft_ms)
+    if not xs:
+        return {"count": 0}
+    return {"count": len(xs), "p50_ms": round(statistics.median(xs), 1),
+            "p95_ms": round(xs[min(len(xs) - 1, int(0.95 * len(xs)))], 1)}
+
+def run(investor: dict, score: dict, brief: dict, use_llm: bool = True, regenerate: bool = False) -> str:
+    return draft(investor, score, brief, use_llm=use_llm, regenerate=regenerate)[0]
+
+def iter_batch(investors: List[Dict], brief: dict, use_llm: bool = True, budget: Optional[int] = None,
+               concurrency: int = EMAIL_CONCURRENCY, model=None, regenerate: bool = False) -> Iterator[Tuple[int, str, str]]:
+    """
+    Drafts for many investors on a bounded pool, yielding (index, email, source) as each completes.
+    At most `budget` (default LLM_EMAIL_BUDGET) drafts use the LLM; the rest get the template.
+    """
+    run_budget = Budget(LLM_EMAIL_BUDGET if budget is None else budget)
+    score_stub = {"rationale": "Context fit based on your brief."}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="email") as pool:
+        futures = {
+            pool.submit(draft, inv, score_stub, brief, use_llm, run_budget, model, regenerate): i
+            for i, inv in enumerate(investors)
+        }
+        for f in as_completed(futures):
+            email, source = f.result()
+            yield futures[f], email, source
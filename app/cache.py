@@ -0,0 +1,114 @@
+import json, os, sqlite3, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+class LRUCache:
+    """Small thread-safe in-process LRU with hit/miss counters."""
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+class DiskCache:
+    """
+    SQLite-backed key/value cache shared by all workers on a host.
+    Entries carry a JSON meta blob and a stored_at timestamp; callers decide freshness.
+    Total value size is bounded by max_bytes with least-recently-accessed eviction.
+    """
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                meta TEXT,
+                size INTEGER,
+                stored_at REAL,
+                accessed_at REAL
+            )""")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, meta, stored_at FROM entries WHERE key=?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at=? WHERE key=?", (time.time(), key))
+            self._conn.commit()
+        return {"value": row[0], "meta": json.loads(row[1] or "{}"), "stored_at": row[2]}
+
+    def get_fresh(self, key: str, ttl_s: float) -> Optional[Dict]:
+        entry = self.get(key)
+        if entry is None or time.time() - entry["stored_at"] > ttl_s:
+            return None
+        return entry
+
+    def set(self, key: str, value: str, meta: Optional[Dict] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries(key, value, meta, size, stored_at, accessed_at) VALUES (?,?,?,?,?,?)",
+                (key, value, json.dumps(meta or {}), len(value.encode()), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key: str) -> None:
+        """Mark an entry fresh again (e.g. after a 304 revalidation)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE entries SET stored_at=?, accessed_at=? WHERE key=?", (now, now, key))
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key=?", (key,))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM entries WHERE key=?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            n, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": n, "bytes": size}
@@ -8,7 +8,13 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 
 # Search/scrape
 SERPAPI_API_KEY = os.getenv("SERPAPI_API_KEY", "")
+SERP_CACHE_TTL_S = float(os.getenv("SERP_CACHE_TTL_S", str(7 * 24 * 3600)))   # parsed results per normalized query
 ALLOWED_DOMAINS = [d.strip() for d in os.getenv("ALLOWED_DOMAINS", "").split(",") if d.strip()]
+SCRAPE_MAX_WORKERS = int(os.getenv("SCRAPE_MAX_WORKERS", "8"))      # global concurrent fetches
+SCRAPE_PER_HOST = int(os.getenv("SCRAPE_PER_HOST", "2"))            # concurrent fetches per host
+SCRAPE_DEADLINE_S = float(os.getenv("SCRAPE_DEADLINE_S", "20"))     # whole enrichment phase
+FETCH_CACHE_TTL_S = float(os.getenv("FETCH_CACHE_TTL_S", str(24 * 3600)))
+FETCH_CACHE_MAX_MB = int(os.getenv("FETCH_CACHE_MAX_MB", "64"))
 
 # Postgres
 PGHOST = os.getenv("PGHOST", "localhost")
@@ -16,15 +22,75 @@ PGPORT = int(os.getenv("PGPORT", "5432"))
 PGDATABASE = os.getenv("PGDATABASE", "fundraise_copilot")
 PGUSER = os.getenv("PGUSER", "postgres")
 PGPASSWORD = os.getenv("PGPASSWORD", "postgres")
+PG_POOL_MIN = int(os.getenv("PG_POOL_MIN", "1"))
+PG_POOL_MAX = int(os.getenv("PG_POOL_MAX", "10"))
+PG_POOL_WAIT_S = float(os.getenv("PG_POOL_WAIT_S", "5"))     # wait this long for a free pooled connection before failing
+PG_DOWN_S = float(os.getenv("PG_DOWN_S", "10"))              # after a failed connect, best-effort writers skip Postgres this long
+
+# Result cache for /api/generate rankings (in-process LRU, optional Postgres tier)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "3600"))
+RESULT_CACHE_DEPTH = int(os.getenv("RESULT_CACHE_DEPTH", "200"))       # ranking depth kept per brief
+MAX_TOP_K = int(os.getenv("MAX_TOP_K") or RESULT_CACHE_DEPTH)      # largest top_k a request may ask for
+BATCH_MAX_BRIEFS = int(os.getenv("BATCH_MAX_BRIEFS", "500"))        # briefs per /api/generate_batch request
+RESULT_CACHE_PG = os.getenv("RESULT_CACHE_PG", "0").lower() in {"1", "true", "yes"}
 
 # Notion
 NOTION_API_KEY = os.getenv("NOTION_API_KEY", "")
 NOTION_PARENT_PAGE_ID = os.getenv("NOTION_PARENT_PAGE_ID", "")
+NOTION_BASE_URL = os.getenv("NOTION_BASE_URL", "https://api.notion.com")   # point at a mock server for testing
+NOTION_EXPORT_MODE = os.getenv("NOTION_EXPORT_MODE", "table")             # "table" (rows in one table block) or "database"
+NOTION_RPS = float(os.getenv("NOTION_RPS", "3"))                          # Notion's documented average request rate
+NOTION_BURST = float(os.getenv("NOTION_BURST", "3"))
+NOTION_MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "5"))           # on 409/429; on 5xx/timeouts once a re-read shows the write did not land
+
+# LLM provider plugin (app/plugins.py) and Gemini model; cached drafts are keyed by model and a hash of prompts/writer.md
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+DRAFT_CACHE_SIZE = int(os.getenv("DRAFT_CACHE_SIZE", "2048"))
+PROMPT_TRACTION_TOKENS = int(os.getenv("PROMPT_TRACTION_TOKENS", "60"))   # traction budget in the email prompt
 
-# LLM budget (per /api/generate run)
+# LLM budget (per /api/generate run) and limits shared by every Gemini call
 LLM_EMAIL_BUDGET = int(os.getenv("LLM_EMAIL_BUDGET", "5"))
+LLM_RPM = float(os.getenv("LLM_RPM", "15"))
+LLM_TPM = float(os.getenv("LLM_TPM", "1000000"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))          # on 429
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "1"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "20"))
+LLM_WAIT_S = float(os.getenv("LLM_WAIT_S", "60"))                 # max wait for limiter capacity
+EMAIL_CONCURRENCY = int(os.getenv("EMAIL_CONCURRENCY", "4"))
+
+# Admission control per endpoint class: concurrent requests, bounded wait queue, max wait before 503
+ADMIT_RANKING_LIMIT = int(os.getenv("ADMIT_RANKING_LIMIT", "4"))
+ADMIT_RANKING_QUEUE = int(os.getenv("ADMIT_RANKING_QUEUE", "16"))
+ADMIT_LLM_LIMIT = int(os.getenv("ADMIT_LLM_LIMIT", "8"))
+ADMIT_LLM_QUEUE = int(os.getenv("ADMIT_LLM_QUEUE", "32"))
+ADMIT_EXPORT_LIMIT = int(os.getenv("ADMIT_EXPORT_LIMIT", "4"))
+ADMIT_EXPORT_QUEUE = int(os.getenv("ADMIT_EXPORT_QUEUE", "16"))
+ADMIT_WAIT_S = float(os.getenv("ADMIT_WAIT_S", "15"))
+
+# Candidate retrieval: "memory" (seed file index in every worker) or "postgres" (investors table,
+# filtered and pre-scored in SQL; load it with `python -m app.db load-seed`)
+RETRIEVAL = os.getenv("RETRIEVAL", "memory").lower()
+# pre-scored rows fetched per search; never fewer than the ranking depth the result cache keeps
+SQL_CANDIDATES = max(int(os.getenv("SQL_CANDIDATES", "1000")), RESULT_CACHE_DEPTH)
+
+# Seed corpus hot reload: how often the file's mtime/size is checked (seconds; negative disables)
+CORPUS_CHECK_S = float(os.getenv("CORPUS_CHECK_S", "2"))
 
 # Paths
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
-EXPORTS_DIR = os.path.join(PROJECT_ROOT, "app", "exports")
+EXPORTS_DIR = os.getenv("EXPORTS_DIR") or os.path.join(PROJECT_ROOT, "app", "exports")   # CSV/PDF export files
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(PROJECT_ROOT, ".cache"))
+
+# Background export jobs (SQLite-backed queue; leases let another worker resume after a crash)
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(CACHE_DIR, "jobs.sqlite"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+JOB_LEASE_S = float(os.getenv("JOB_LEASE_S", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_BACKOFF_S = float(os.getenv("JOB_BACKOFF_S", "5"))       # a failed job waits ~base * 2^attempt (jittered) before its retry
+JOB_BACKOFF_MAX_S = float(os.getenv("JOB_BACKOFF_MAX_S", "300"))
+JOB_TTL_S = float(os.getenv("JOB_TTL_S", "86400"))           # finished jobs, and the export files they made, are deleted after this
+PERSIST_WORKERS = int(os.getenv("PERSIST_WORKERS", "1"))     # match persistence has its own lane: it never delays an export
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))             # PDF render processes; 0 renders in-process
 os.makedirs(EXPORTS_DIR, exist_ok=True)
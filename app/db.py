@@ -1,44 +1,395 @@
+import csv, io, json, threading, time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
 import psycopg2
-from .config import PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from .config import (PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD, PG_POOL_MIN, PG_POOL_MAX, PG_POOL_WAIT_S,
+                     PG_DOWN_S)
+
+_LIST_FIELDS = ("stages", "sectors", "notable_investments", "recent_news", "urls", "warm_paths")
+_INVESTOR_COLS = ("name", "fund") + _LIST_FIELDS[:2] + ("check_min", "check_max", "geo") + _LIST_FIELDS[2:] + ("unique_key",)
+_RETRIEVED_COLS = ("id",) + _INVESTOR_COLS
+_MATCH_COLS = ("run_id", "brief_fp", "investor_id", "fit_score", "stage_fit", "sector_fit", "geo_fit", "momentum", "rationale", "email_draft")
+
+# failures a retry can clear: the server is unreachable/restarting or every pooled connection is in use
+UNAVAILABLE = (psycopg2.OperationalError, psycopg2.InterfaceError, PoolError)
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool.getconn() fails at once when every connection is out; callers queue here instead
+_slots = threading.BoundedSemaphore(PG_POOL_MAX)
 
 def get_conn():
     return psycopg2.connect(
         host=PGHOST, port=PGPORT, dbname=PGDATABASE, user=PGUSER, password=PGPASSWORD
     )
 
+def get_pool() -> ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    PG_POOL_MIN, PG_POOL_MAX,
+                    host=PGHOST, port=PGPORT, dbname=PGDATABASE, user=PGUSER, password=PGPASSWORD
+                )
+    return _pool
+
+_down_until = 0.0     # monotonic time until which the server counts as unreachable
+
+def available() -> bool:
+    """False for PG_DOWN_S after a failed connect; best-effort callers skip Postgres meanwhile."""
+    return time.monotonic() >= _down_until
+
+@contextmanager
+def connection():
+    """
+    Pooled connection; commits on success, rolls back on error, always returned to the pool.
+    A connection that is closed or failed at the connection level is discarded, not reused.
+    When all PG_POOL_MAX are in use, waits up to PG_POOL_WAIT_S for one (then PoolError).
+    """
+    global _down_until
+    slots = _slots
+    if not slots.acquire(timeout=PG_POOL_WAIT_S):
+        raise PoolError(f"no Postgres connection free within {PG_POOL_WAIT_S:g}s")
+    try:
+        try:
+            pool = get_pool()
+            conn = pool.getconn()
+        except psycopg2.OperationalError:
+            _down_until = time.monotonic() + PG_DOWN_S
+            raise
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            raise
+        finally:
+            pool.putconn(conn, close=broken or bool(conn.closed))
+    finally:
+        slots.release()
+
 def init_db():
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS investors (
-        id SERIAL PRIMARY KEY,
-        name TEXT,
-        fund TEXT,
-        stages TEXT,
-        sectors TEXT,
-        check_min DOUBLE PRECISION,
-        check_max DOUBLE PRECISION,
-        geo TEXT,
-        notable_investments TEXT,
-        recent_news TEXT,
-        urls TEXT,
-        warm_paths TEXT,
-        unique_key TEXT UNIQUE
-    );
-    """)
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS matches (
-        id SERIAL PRIMARY KEY,
-        investor_id INTEGER REFERENCES investors(id),
-        fit_score DOUBLE PRECISION,
-        stage_fit DOUBLE PRECISION,
-        sector_fit DOUBLE PRECISION,
-        geo_fit DOUBLE PRECISION,
-        momentum DOUBLE PRECISION,
-        rationale TEXT,
-        email_draft TEXT
-    );
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS investors (
+            id SERIAL PRIMARY KEY,
+            name TEXT,
+            fund TEXT,
+            stages TEXT[],
+            sectors TEXT[],
+            check_min DOUBLE PRECISION,
+            check_max DOUBLE PRECISION,
+            geo TEXT,
+            notable_investments TEXT[],
+            recent_news TEXT[],
+            urls TEXT[],
+            warm_paths TEXT[],
+            unique_key TEXT UNIQUE
+        );
+        """)
+        _migrate_investors(cur)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS matches (
+            id SERIAL PRIMARY KEY,
+            investor_id INTEGER REFERENCES investors(id),
+            fit_score DOUBLE PRECISION,
+            stage_fit DOUBLE PRECISION,
+            sector_fit DOUBLE PRECISION,
+            geo_fit DOUBLE PRECISION,
+            momentum DOUBLE PRECISION,
+            rationale TEXT,
+            email_draft TEXT
+        );
+        """)
+        cur.execute("ALTER TABLE matches ADD COLUMN IF NOT EXISTS run_id TEXT;")
+        cur.execute("ALTER TABLE matches ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ DEFAULT now();")
+        cur.execute("ALTER TABLE matches ADD COLUMN IF NOT EXISTS brief_fp TEXT;")
+        cur.execute("ALTER TABLE matches ADD COLUMN IF NOT EXISTS draft_key TEXT;")
+        cur.execute("CREATE INDEX IF NOT EXISTS matches_run_id ON matches(run_id);")
+        cur.execute("CREATE INDEX IF NOT EXISTS matches_draft_key ON matches(draft_key) WHERE draft_key IS NOT NULL;")
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS result_cache (
+            key TEXT PRIMARY KEY,
+            corpus_version TEXT,
+            ranked JSONB,
+            complete BOOLEAN,
+            created_at TIMESTAMPTZ DEFAULT now()
+        );
+        """)
+        cur.close()
+
+# ---------- Investor list columns: TEXT[] + GIN-indexed keys ----------
+_SQL_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION investor_json_array(v TEXT) RETURNS TEXT[] LANGUAGE plpgsql IMMUTABLE AS $$
+BEGIN
+    IF v IS NULL OR v = '' THEN RETURN '{}'; END IF;
+    RETURN ARRAY(SELECT jsonb_array_elements_text(v::jsonb));
+EXCEPTION WHEN others THEN
+    RETURN ARRAY[v];
+END $$;
+CREATE OR REPLACE FUNCTION investor_keys(v TEXT[]) RETURNS TEXT[] LANGUAGE sql IMMUTABLE AS $$
+    SELECT coalesce(array_agg(DISTINCT lower(x)), '{}') FROM unnest(v) x WHERE x <> ''
+$$;
+-- matchmaker._canon_stage on lower(x)
+CREATE OR REPLACE FUNCTION investor_stage_canon(v TEXT[]) RETURNS TEXT[] LANGUAGE sql IMMUTABLE AS $$
+    SELECT coalesce(array_agg(DISTINCT CASE s WHEN 'preseed' THEN 'pre-seed' WHEN 'pre-seriesa' THEN 'pre-series-a'
+        WHEN 'seriesa' THEN 'series-a' WHEN 'seriesb' THEN 'series-b' WHEN 'seriesc' THEN 'series-c' ELSE s END), '{}')
+    FROM (SELECT translate(lower(x), '_ ', '--') AS s FROM unnest(v) x) t
+$$;
+-- round(100 * total, 1) * 10 exactly as Python rounds the float (its exact binary value, ties to
+-- even): the fraction of 100 * total scaled by 2^59 is an exact integer for any score >= 1/128
+CREATE OR REPLACE FUNCTION fit_score_tenths(total FLOAT8) RETURNS INT8 LANGUAGE sql IMMUTABLE AS $$
+    SELECT 10 * trunc(100 * total)::INT8
+         + (10 * ((100 * total - trunc(100 * total)) * 576460752303423488)::INT8) / 576460752303423488
+         + CASE WHEN (10 * ((100 * total - trunc(100 * total)) * 576460752303423488)::INT8) % 576460752303423488 > 288230376151711744
+                  OR ((10 * ((100 * total - trunc(100 * total)) * 576460752303423488)::INT8) % 576460752303423488 = 288230376151711744
+                      AND (10 * ((100 * total - trunc(100 * total)) * 576460752303423488)::INT8) / 576460752303423488 % 2 = 1)
+                THEN 1 ELSE 0 END
+$$;
+"""
+
+def _migrate_investors(cur, table: str = "investors") -> None:
+    """
+    JSON-in-TEXT list columns (older schema) become TEXT[] in one table rewrite. Generated key
+    columns (lowercased sectors/stages, canonical stages) carry GIN indexes for retrieve_candidates.
+    """
+    cur.execute(_SQL_FUNCTIONS)
+    cur.execute(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_name = %s AND column_name = ANY(%s) AND data_type = 'text'",
+        (table, list(_LIST_FIELDS)),
+    )
+    legacy = [r[0] for r in cur.fetchall()]
+    if legacy:
+        cur.execute(f"ALTER TABLE {table} " + ", ".join(
+            f"ALTER COLUMN {c} TYPE TEXT[] USING investor_json_array({c})" for c in legacy))
+    cur.execute(f"""
+        ALTER TABLE {table}
+            ADD COLUMN IF NOT EXISTS sector_keys TEXT[] GENERATED ALWAYS AS (investor_keys(sectors)) STORED,
+            ADD COLUMN IF NOT EXISTS stage_keys TEXT[] GENERATED ALWAYS AS (investor_keys(stages)) STORED,
+            ADD COLUMN IF NOT EXISTS stage_canon TEXT[] GENERATED ALWAYS AS (investor_stage_canon(stages)) STORED,
+            ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT now();
     """)
-    conn.commit()
-    cur.close()
-    conn.close()
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_sector_keys ON {table} USING GIN (sector_keys);")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_stage_keys ON {table} USING GIN (stage_keys);")
+    cur.execute(f"CREATE INDEX IF NOT EXISTS {table}_updated_at ON {table} (updated_at);")
+
+# ---------- Bulk writes ----------
+def _pg_array(values) -> str:
+    """TEXT[] literal for COPY (csv quoting is applied on top by the writer)."""
+    return "{" + ",".join('"' + str(v).replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values or ()) + "}"
+
+def _investor_row(inv: Dict) -> tuple:
+    return tuple(
+        _pg_array(inv.get(c)) if c in _LIST_FIELDS else inv.get(c)
+        for c in _INVESTOR_COLS
+    )
+
+def _copy_rows(cur, table: str, cols: tuple, rows) -> None:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+def upsert_investors(cur, investors: List[Dict], table: str = "investors") -> Dict[str, int]:
+    """
+    Upsert on unique_key: COPY into a temp staging table, update the rows whose data changed,
+    insert the new keys, then read back the ids. Returns {unique_key: id}. Only new keys take a
+    value from the id sequence (INSERT .. ON CONFLICT draws one per row, even for updates).
+    """
+    by_key = {inv["unique_key"]: inv for inv in investors if inv.get("unique_key")}
+    if not by_key:
+        return {}
+    cols = ", ".join(_INVESTOR_COLS)
+    data = [c for c in _INVESTOR_COLS if c != "unique_key"]
+    # the staging table has the data columns only: no id default, so staging burns no ids
+    cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS _investors_stage ON COMMIT DROP AS SELECT {cols} FROM {table} WITH NO DATA;")
+    cur.execute("TRUNCATE _investors_stage;")
+    _copy_rows(cur, "_investors_stage", _INVESTOR_COLS, (_investor_row(inv) for inv in by_key.values()))
+    # updated_at (the corpus version with RETRIEVAL=postgres) only moves when a row's data does
+    cur.execute(
+        f"UPDATE {table} t SET {', '.join(f'{c} = s.{c}' for c in data)}, updated_at = now() "
+        f"FROM _investors_stage s WHERE t.unique_key = s.unique_key "
+        f"AND ({', '.join(f't.{c}' for c in data)}) IS DISTINCT FROM ({', '.join(f's.{c}' for c in data)})"
+    )
+    cur.execute(
+        f"INSERT INTO {table} ({cols}) SELECT {cols} FROM _investors_stage s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.unique_key = s.unique_key) "
+        f"ON CONFLICT (unique_key) DO NOTHING"
+    )
+    cur.execute(f"SELECT t.unique_key, t.id FROM {table} t JOIN _investors_stage s ON s.unique_key = t.unique_key")
+    return dict(cur.fetchall())
+
+def save_matches(run_id: str, matches: List[Dict], brief_fp: Optional[str] = None) -> int:
+    """One transaction per run: upsert the matched investors, then COPY all match rows."""
+    if not matches:
+        return 0
+    with connection() as conn:
+        cur = conn.cursor()
+        ids = upsert_investors(cur, [m["investor"] for m in matches])
+        rows = []
+        for m in matches:
+            inv_id = ids.get(m["investor"].get("unique_key"))
+            if inv_id is None:
+                continue
+            sc = m["score"]
+            rows.append((run_id, brief_fp, inv_id, sc["fit_score"], sc["stage_fit"], sc["sector_fit"],
+                         sc["geo_fit"], sc["momentum"], sc["rationale"], m.get("email_draft")))
+        _copy_rows(cur, "matches", _MATCH_COLS, rows)
+        cur.close()
+    return len(rows)
+
+def load_investors(investors: List[Dict], table: str = "investors") -> int:
+    """Bulk-load a corpus (e.g. the seed file) into Postgres for RETRIEVAL=postgres."""
+    with connection() as conn:
+        cur = conn.cursor()
+        n = len(upsert_investors(cur, investors, table=table))
+        cur.execute(f"ANALYZE {table};")
+        cur.close()
+    return n
+
+# ---------- SQL-side candidate retrieval ----------
+def retrieve_candidates(sector_terms: Sequence[str], stage: str, geo: str,
+                        stage_credit: Tuple[Sequence[str], Sequence[str], Sequence[str]],
+                        weights: Dict[str, float], limit: int, table: str = "investors") -> List[Dict]:
+    """
+    Top `limit` investors for a brief without loading the corpus. The predicate is the in-memory
+    index's (any sector overlap or exact stage hit, via the GIN-indexed key columns); rows are
+    pre-scored in SQL with the matchmaker's own components: stage credit from `stage_credit`
+    (canonical stages earning 1 / 0.75 / 0.4), sector overlap, geo fit and momentum. The cut is
+    the matchmaker's order (fit_score as Python rounds it, then candidate order: exact stage hit,
+    sector overlap, id), so the LIMIT keeps the rows RETRIEVAL=memory would rank first. Only the
+    top ids are joined back for their full rows, returned in candidate order.
+    """
+    sectors = sorted({s.lower() for s in sector_terms if s})
+    stage = (stage or "").lower()
+    geo = (geo or "").lower()
+    full, loose, adjacent = (list(x) for x in stage_credit)
+    cols = ", ".join(_RETRIEVED_COLS)
+    # one containment test per brief sector (sector_keys is distinct): no per-row subquery
+    hits = " + ".join(f"(sector_keys @> ARRAY[%(s{i})s]::TEXT[])::INT" for i in range(len(sectors))) or "0"
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"""
+            WITH top AS (
+                SELECT id, stage_hit, sector_hits FROM (
+                    SELECT id, stage_hit, sector_hits,
+                        %(w_stage)s::FLOAT8 * stage_fit
+                        + %(w_sector)s::FLOAT8 * (sector_hits::FLOAT8 / GREATEST(1, %(n_sectors)s))
+                        + %(w_geo)s::FLOAT8 * geo_fit + %(w_momentum)s::FLOAT8 * momentum AS total
+                    FROM (
+                        SELECT id,
+                            stage_keys @> ARRAY[%(stage)s]::TEXT[] AS stage_hit,
+                            {hits} AS sector_hits,
+                            CASE WHEN stage_canon && %(full)s::TEXT[] THEN 1.0 WHEN stage_canon && %(loose)s::TEXT[] THEN 0.75
+                                 WHEN stage_canon && %(adjacent)s::TEXT[] THEN 0.4 ELSE 0.0 END::FLOAT8 AS stage_fit,
+                            CASE WHEN %(geo)s = '' OR strpos(lower(coalesce(geo, '')), %(geo)s) > 0
+                                      OR strpos(%(geo)s, lower(coalesce(geo, ''))) > 0 THEN 1.0
+                                 WHEN lower(geo) IN ('remote', 'global', 'us/eu') THEN 0.5 ELSE 0.0 END::FLOAT8 AS geo_fit,
+                            CASE WHEN cardinality(recent_news) > 0 THEN 1.0 ELSE 0.5 END::FLOAT8 AS momentum
+                        FROM {table}
+                        WHERE sector_keys && %(sectors)s::TEXT[] OR stage_keys @> ARRAY[%(stage)s]::TEXT[]
+                    ) c
+                    OFFSET 0   -- keeps total a plain column, so fit_score_tenths is inlined, not called per row
+                ) t
+                ORDER BY fit_score_tenths(total) DESC, stage_hit DESC, sector_hits DESC, id
+                LIMIT %(limit)s
+            )
+            SELECT {", ".join("i." + c for c in _RETRIEVED_COLS)}, top.stage_hit, top.sector_hits
+            FROM top JOIN {table} i ON i.id = top.id
+        """, {"stage": stage, "sectors": sectors, "full": full, "loose": loose, "adjacent": adjacent, "geo": geo,
+              "n_sectors": len(sectors), "limit": limit, "w_stage": weights["stage"], "w_sector": weights["sector"],
+              "w_geo": weights["geo"], "w_momentum": weights["momentum"],
+              **{f"s{i}": s for i, s in enumerate(sectors)}})
+        rows = cur.fetchall()
+        cur.close()
+    rows.sort(key=lambda r: (not r[-2], -r[-1], r[0]))
+    return [dict(zip(_RETRIEVED_COLS, r)) for r in rows]
+
+def investors_version(table: str = "investors") -> str:
+    """Changes whenever a row is added or its data updated (updated_at is indexed: two index probes)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT max(id), extract(epoch FROM max(updated_at)) FROM {table}")
+        max_id, ts = cur.fetchone()
+        cur.close()
+    return f"pg-{max_id or 0}-{float(ts or 0):.6f}"
+
+# ---------- Email drafts (matches.email_draft) ----------
+def get_draft(draft_key: str) -> Optional[str]:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT email_draft FROM matches WHERE draft_key = %s AND email_draft IS NOT NULL ORDER BY id DESC LIMIT 1",
+            (draft_key,),
+        )
+        row = cur.fetchone()
+        cur.close()
+    return row[0] if row else None
+
+def put_draft(draft_key: str, brief_fp: str, investor: Dict, email: str) -> None:
+    """Attach the draft to the latest match row for this brief/investor, or add a bare row for it."""
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE matches SET email_draft = %s, draft_key = %s WHERE id = ("
+            "  SELECT m.id FROM matches m JOIN investors i ON i.id = m.investor_id"
+            "  WHERE i.unique_key = %s AND m.brief_fp = %s ORDER BY m.id DESC LIMIT 1)",
+            (email, draft_key, investor["unique_key"], brief_fp),
+        )
+        if cur.rowcount == 0:
+            inv_id = upsert_investors(cur, [investor])[investor["unique_key"]]
+            cur.execute(
+                "INSERT INTO matches (brief_fp, investor_id, email_draft, draft_key) VALUES (%s, %s, %s, %s)",
+                (brief_fp, inv_id, email, draft_key),
+            )
+        cur.close()
+
+# ---------- Ranking cache tier ----------
+def get_cached_ranking(key: str, ttl_s: float) -> Optional[Dict]:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT ranked, complete, EXTRACT(EPOCH FROM created_at) FROM result_cache "
+            "WHERE key = %s AND created_at > now() - make_interval(secs => %s)",
+            (key, ttl_s),
+        )
+        row = cur.fetchone()
+        cur.close()
+    if row is None:
+        return None
+    return {"ranked": row[0], "complete": row[1], "stored_at": float(row[2])}
+
+def put_cached_ranking(key: str, corpus_version: str, ranked: List[Dict], complete: bool) -> None:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            "INSERT INTO result_cache (key, corpus_version, ranked, complete) VALUES (%s, %s, %s, %s) "
+            "ON CONFLICT (key) DO UPDATE SET corpus_version = EXCLUDED.corpus_version, ranked = EXCLUDED.ranked, "
+            "complete = EXCLUDED.complete, created_at = now()",
+            (key, corpus_version, json.dumps(ranked), complete),
+        )
+        cur.close()
+
+def purge_cached_rankings(keep_version: str) -> None:
+    with connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM result_cache WHERE corpus_version <> %s", (keep_version,))
+        cur.close()
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:2] != ["load-seed"]:
+        sys.exit("usage: python -m app.db load-seed")
+    from .tools.search import load_seed_investors
+    init_db()
+    print(f"loaded {load_investors([inv.to_dict() for inv in load_seed_investors()])} investors")
@@ -0,0 +1,60 @@
+import hashlib
+from typing import Dict, Optional
+from .cache import LRUCache
+from .config import DRAFT_CACHE_SIZE
+from .metrics import swallowed
+from .result_cache import brief_fingerprint
+from .tools.search import _unique_key
+
+def draft_key(brief_fp: str, unique_key: str, model_name: str, prompt_version: str) -> str:
+    return hashlib.sha1(f"{brief_fp}|{unique_key}|{model_name}|{prompt_version}".encode()).hexdigest()
+
+class DraftCache:
+    """
+    LLM email drafts addressed by (brief fingerprint, investor unique_key, model, prompt version).
+    In-process LRU in front of matches.email_draft in Postgres; the DB tier is best-effort and
+    skipped for PG_DOWN_S after a failed connect (db.available), so a missing server costs one
+    connect attempt per back-off window rather than one per draft.
+    """
+    def __init__(self, maxsize: int = DRAFT_CACHE_SIZE):
+        self.lru = LRUCache(maxsize)
+        self.pg_hits = 0
+        self.stores = 0
+
+    def key_for(self, brief: dict, investor: dict, model_name: str, prompt_version: str) -> str:
+        uk = investor.get("unique_key") or _unique_key(investor)
+        return draft_key(brief_fingerprint(brief), uk, model_name, prompt_version)
+
+    def get(self, key: str) -> Optional[str]:
+        email = self.lru.get(key)
+        if email is not None:
+            return email
+        from .db import available, get_draft
+        if not available():
+            return None
+        try:
+            email = get_draft(key)
+        except Exception as e:
+            swallowed("draft_cache_get", e)
+            email = None
+        if email is not None:
+            self.pg_hits += 1
+            self.lru.put(key, email)
+        return email
+
+    def put(self, key: str, brief: dict, investor: dict, email: str) -> None:
+        self.lru.put(key, email)
+        self.stores += 1
+        from .db import available, put_draft
+        if not available():
+            return
+        try:
+            put_draft(key, brief_fingerprint(brief), {**investor, "unique_key": investor.get("unique_key") or _unique_key(investor)}, email)
+        except Exception as e:
+            swallowed("draft_cache_put", e)
+
+    def stats(self) -> Dict[str, int]:
+        # lru misses that were then found in Postgres count as pg_hits
+        return {**self.lru.stats(), "pg_hits": self.pg_hits, "stores": self.stores}
+
+drafts = DraftCache()
@@ -1,86 +1,85 @@
-import csv, os, time
-from typing import List, Dict
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen import canvas
+import csv, io, os, time, uuid, zlib
+from typing import Dict, Iterable, Iterator, List, Optional
 from .config import EXPORTS_DIR, NOTION_API_KEY, NOTION_PARENT_PAGE_ID
-from notion_client import Client as NotionClient
 
-def export_csv(matches: List[Dict]) -> str:
-    ts = int(time.time())
-    path = os.path.join(EXPORTS_DIR, f"matches_{ts}.csv")
-    cols = ["rank","investor","fund","fit_score","stage_fit","sector_fit","geo_fit","momentum","why_now","warm_paths","urls","email_draft"]
-    with open(path, "w", newline="") as f:
-        w = csv.writer(f)
-        w.writerow(cols)
-        for i, m in enumerate(matches, start=1):
-            inv, sc = m["investor"], m["score"]
-            w.writerow([
-                i, inv.get("name",""), inv.get("fund",""),
-                sc["fit_score"], sc["stage_fit"], sc["sector_fit"], sc["geo_fit"], sc["momentum"],
-                sc["rationale"],
-                "; ".join(inv.get("warm_paths",[])),
-                "; ".join(inv.get("urls",[])),
-                m.get("email_draft","").replace("\n"," ")
-            ])
-    return path
+# reportlab (via pdf_render) and notion_client are imported inside the exporters that need them (see app/plugins.py)
 
-def _wrap(text: str, max_width: int, font_size: int) -> list:
-    max_chars = int(max_width / (font_size * 0.55))
-    words, line, out = text.split(), "", []
-    for w in words:
-        if len(line) + len(w) + 1 > max_chars:
-            out.append(line.rstrip()); line = w + " "
-        else:
-            line += w + " "
-    if line.strip(): out.append(line.rstrip())
-    return out
+CSV_COLS = ["rank","investor","fund","fit_score","stage_fit","sector_fit","geo_fit","momentum","why_now","warm_paths","urls","email_draft"]
+BATCH_CSV_COLS = ["startup"] + CSV_COLS
 
-def export_pdf(brief: dict, matches: List[Dict]) -> str:
-    ts = int(time.time())
-    path = os.path.join(EXPORTS_DIR, f"one_pager_{ts}.pdf")
-    c = canvas.Canvas(path, pagesize=LETTER)
-    width, height = LETTER
-    x, y = 50, height - 50
+def export_name(prefix: str, ext: str) -> str:
+    """Collision-free artifact name: readable timestamp plus a random suffix."""
+    return f"{prefix}_{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}.{ext}"
 
-    def write_line(text, size=11, leading=14):
-        nonlocal y
-        c.setFont("Helvetica", size)
-        for line in _wrap(text, width - 100, size):
-            if y < 80:
-                c.showPage(); y = height - 50; c.setFont("Helvetica", size)
-            c.drawString(x, y, line); y -= leading
+def csv_rows(matches: Iterable[Dict]) -> Iterator[list]:
+    for i, m in enumerate(matches, start=1):
+        inv, sc = m["investor"], m["score"]
+        yield [
+            i, inv.get("name",""), inv.get("fund",""),
+            sc["fit_score"], sc["stage_fit"], sc["sector_fit"], sc["geo_fit"], sc["momentum"],
+            sc["rationale"],
+            "; ".join(inv.get("warm_paths",[])),
+            "; ".join(inv.get("urls",[])),
+            (m.get("email_draft") or "").replace("\n"," ")
+        ]
 
-    def write_header(text): write_line(text, size=16, leading=20)
+def batch_csv_rows(cohort: Iterable[Dict]) -> Iterator[list]:
+    """cohort: [{"brief": ..., "matches": [...]}, ...] -> csv_rows per startup, prefixed with its name."""
+    for x in cohort:
+        name = x["brief"].get("name", "")
+        for row in csv_rows(x["matches"]):
+            yield [name] + row
 
-    write_header(f"{brief['name']} — One Pager")
-    write_line(f"One-liner: {brief['one_liner']}")
-    write_line(f"Sector: {', '.join(brief.get('sector', []))} · Stage: {brief.get('stage','')} · Geo: {brief.get('geo','N/A')}")
-    write_line(""); write_line("Why Now:", size=13)
-    write_line(brief.get("ask") or "Raising intros to aligned investors.")
-    write_line(""); write_line("Traction:", size=13)
-    if brief.get("traction"): [write_line(f"- {t}") for t in brief["traction"][:6]]
-    else: write_line("- Early traction with design partners.")
-    write_line(""); write_line("Top Target Investors:", size=13)
-    for m in matches[:10]:
-        inv, sc = m["investor"], m["score"]
-        write_line(f"- {inv.get('name')} ({inv.get('fund')}) — {sc['rationale']} (score {sc['fit_score']})")
-    c.save(); return path
+def iter_csv(matches: Iterable[Dict], gzip: bool = False, rows_per_chunk: int = 500,
+             rows: Optional[Iterable[list]] = None, header: List[str] = CSV_COLS) -> Iterator[bytes]:
+    """
+    CSV (header first) as byte chunks of `rows_per_chunk` rows, optionally gzip-framed.
+    Only one chunk is buffered at a time, so memory does not grow with the number of matches.
+    Pre-built `rows` (with their `header`) replace csv_rows(matches), e.g. batch_csv_rows.
+    """
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    z = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None   # wbits=31: gzip header + trailer
+
+    def drain() -> bytes:
+        data = buf.getvalue().encode()
+        buf.seek(0); buf.truncate()
+        return z.compress(data) if z else data
+
+    w.writerow(header)
+    for n, row in enumerate(csv_rows(matches) if rows is None else rows, start=1):
+        w.writerow(row)
+        if n % rows_per_chunk == 0:
+            chunk = drain()
+            if chunk:
+                yield chunk
+    tail = drain() + (z.flush() if z else b"")
+    if tail:
+        yield tail
+
+def export_csv(matches: List[Dict], brief: Optional[dict] = None) -> str:
+    path = os.path.join(EXPORTS_DIR, export_name("matches", "csv"))
+    with open(path, "wb") as f:
+        for chunk in iter_csv(matches):
+            f.write(chunk)
+    return path
+
+def export_pdf(brief: dict, matches: List[Dict]) -> str:
+    from . import pdf_render
+    path = os.path.join(EXPORTS_DIR, export_name("one_pager", "pdf"))
+    pdf_render.render(path, brief, matches)
+    return path
+
+def export_cohort_book(cohort: List[Dict], title: str = "Cohort Book") -> str:
+    """cohort: [{"brief": ..., "matches": [...]}, ...] -> one PDF with a section per startup."""
+    from . import pdf_render
+    path = os.path.join(EXPORTS_DIR, export_name("cohort_book", "pdf"))
+    pdf_render.render_cohort_book(path, [(x["brief"], x["matches"][:pdf_render.TOP_INVESTORS]) for x in cohort], title)
+    return path
 
 def export_notion(brief: dict, matches: List[Dict]) -> str:
+    """Every match to Notion (see notion_export.NotionExporter); resumes a partially written export."""
     if not (NOTION_API_KEY and NOTION_PARENT_PAGE_ID):
         return ""
-    client = NotionClient(auth=NOTION_API_KEY)
-    title = f"{brief['name']} — Fundraising Targets"
-    children = []
-    children.append({"object":"block","type":"paragraph","paragraph":{"rich_text":[{"type":"text","text":{"content": f"One-liner: {brief['one_liner']}"}}]}})
-    children.append({"object":"block","type":"paragraph","paragraph":{"rich_text":[{"type":"text","text":{"content": f"Sector: {', '.join(brief.get('sector', []))} · Stage: {brief.get('stage','')} · Geo: {brief.get('geo','N/A')}"}}]}})
-    children.append({"object":"block","type":"heading_2","heading_2":{"rich_text":[{"type":"text","text":{"content":"Top Target Investors"}}]}})
-    for m in matches[:25]:
-        inv, sc = m["investor"], m["score"]
-        children.append({"object":"block","type":"paragraph","paragraph":{"rich_text":[{"type":"text","text":{"content": f"- {inv.get('name')} ({inv.get('fund')}) — {sc['rationale']} (score {sc['fit_score']})"}}]}})
-    page = client.pages.create(
-        parent={"type":"page_id","page_id": NOTION_PARENT_PAGE_ID},
-        properties={"title": [{"type":"text","text":{"content": title}}]},
-        children=children
-    )
-    return page.get("url","")
+    from .notion_export import NotionExporter
+    return NotionExporter().run(brief, matches)
@@ -0,0 +1,248 @@
+import json, os, sqlite3, threading, time, uuid
+from contextlib import closing
+from typing import Callable, Dict, List, Optional, Sequence
+from .config import (JOBS_DB_PATH, EXPORTS_DIR, EXPORT_WORKERS, PERSIST_WORKERS, JOB_LEASE_S, JOB_MAX_ATTEMPTS,
+                     JOB_BACKOFF_S, JOB_BACKOFF_MAX_S, JOB_TTL_S)
+from .plugins import exporters
+from .records import as_dict
+from .tools.ratelimit import backoff_delay
+
+Handler = Callable[[Dict], str]
+
+class JobQueue:
+    """
+    Persistent job queue on SQLite with a small worker pool.
+    A claimed job holds a lease; if its worker dies, the lease expires and another worker
+    picks the job up again (up to max_attempts). A job that raised is retried after a backoff.
+    Workers are started in lanes (kinds they take or skip), so slow bookkeeping jobs never queue
+    ahead of user exports. Finished jobs older than ttl_s are swept, with any result file they
+    left in artifacts_dir. Safe to share between processes on one host.
+    """
+    def __init__(self, path: str, lease_s: float = JOB_LEASE_S, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 ttl_s: float = JOB_TTL_S, artifacts_dir: Optional[str] = None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.ttl_s = ttl_s
+        self.artifacts_dir = os.path.realpath(artifacts_dir) if artifacts_dir else None
+        self.handlers: Dict[str, Handler] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lanes: set = set()
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+        with closing(self._connect()) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT,
+                    payload TEXT,
+                    status TEXT,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    lease_until REAL,
+                    created_at REAL,
+                    updated_at REAL
+                )""")
+            if "run_after" not in {r[1] for r in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+    def enqueue(self, kind: str, payload: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs(id, kind, payload, status, created_at, updated_at) VALUES (?,?,?,?,?,?)",
+                (job_id, kind, json.dumps(payload), "queued", now, now),
+            )
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, result, error, attempts, created_at, updated_at FROM jobs WHERE id=?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "kind", "status", "result", "error", "attempts", "created_at", "updated_at")
+        return dict(zip(keys, row))
+
+    def _claim(self, kinds: Sequence[str] = (), skip: Sequence[str] = ()) -> Optional[tuple]:
+        now = time.time()
+        lane, args = "", [now, now]
+        if kinds:
+            lane += f" AND kind IN ({','.join('?' * len(kinds))})"
+            args += list(kinds)
+        if skip:
+            lane += f" AND kind NOT IN ({','.join('?' * len(skip))})"
+            args += list(skip)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # expired leases belong to crashed workers; give up on jobs that keep killing them
+            conn.execute(
+                "UPDATE jobs SET status='failed', error='worker lost too many times', updated_at=? "
+                "WHERE status='running' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts + 1 FROM jobs "
+                "WHERE ((status='queued' AND coalesce(run_after, 0) <= ?) OR (status='running' AND lease_until < ?))"
+                f"{lane} ORDER BY created_at LIMIT 1",
+                args,
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE jobs SET status='running', attempts=attempts+1, lease_until=?, updated_at=? WHERE id=?",
+                    (now + self.lease_s, now, row[0]),
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _finish(self, job_id: str, status: str, result: str = None, error: str = None,
+                run_after: Optional[float] = None) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status=?, result=?, error=?, lease_until=NULL, run_after=?, updated_at=? WHERE id=?",
+                (status, result, error, run_after, time.time(), job_id),
+            )
+
+    def sweep(self) -> int:
+        """Deletes done/failed jobs not updated for ttl_s, and their result files; returns how many."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, result FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - self.ttl_s,),
+            ).fetchall()
+            for _, result in rows:
+                path = os.path.realpath(result) if result and self.artifacts_dir else ""
+                if path and os.path.dirname(path) == self.artifacts_dir and os.path.isfile(path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            conn.executemany("DELETE FROM jobs WHERE id=?", [(r[0],) for r in rows])
+        return len(rows)
+
+    def _maybe_sweep(self) -> None:
+        with self._sweep_lock:
+            if time.monotonic() < self._next_sweep:
+                return
+            self._next_sweep = time.monotonic() + min(600.0, self.ttl_s / 4)
+        self.sweep()
+
+    def run_once(self, kinds: Sequence[str] = (), skip: Sequence[str] = ()) -> bool:
+        """Claim and run one job (of `kinds`, not of `skip`); False when there is none."""
+        row = self._claim(kinds, skip)
+        if row is None:
+            return False
+        job_id, kind, payload, attempt = row
+        handler = self.handlers.get(kind)
+        if handler is None:
+            self._finish(job_id, "failed", error=f"no handler for {kind!r}")
+            return True
+        try:
+            self._finish(job_id, "done", result=handler(json.loads(payload)))
+        except Exception as e:
+            # transient failures (e.g. Notion hiccups, Postgres down) go back on the queue, after a
+            # backoff, until attempts run out
+            retry = attempt < self.max_attempts
+            self._finish(job_id, "queued" if retry else "failed", error=str(e) or e.__class__.__name__,
+                         run_after=time.time() + backoff_delay(attempt, JOB_BACKOFF_S, JOB_BACKOFF_MAX_S) if retry else None)
+        return True
+
+    def _loop(self, kinds: Sequence[str], skip: Sequence[str]) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_once(kinds, skip):
+                    continue
+                self._maybe_sweep()
+            except sqlite3.Error:
+                pass
+            self._wake.wait(1.0)
+            self._wake.clear()
+
+    def start(self, workers: int = EXPORT_WORKERS, kinds: Sequence[str] = (), skip: Sequence[str] = (),
+              lane: str = "export") -> None:
+        if lane in self._lanes:
+            return
+        self._lanes.add(lane)
+        self._stop.clear()
+        for i in range(max(1, workers)):
+            t = threading.Thread(target=self._loop, args=(tuple(kinds), tuple(skip)), name=f"{lane}-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        self._lanes = set()
+
+# ---------- Export jobs ----------
+queue = JobQueue(JOBS_DB_PATH, artifacts_dir=EXPORTS_DIR)
+BACKGROUND_KINDS = ("persist",)    # bookkeeping, not something a user waits on: its own worker lane
+for _kind in exporters.names():
+    queue.register(_kind, lambda p, kind=_kind: exporters.get(kind)(brief=p["brief"], matches=p["matches"]))
+
+def _cohort_book(p: Dict) -> str:
+    from .exports import export_cohort_book
+    return export_cohort_book(p["cohort"], p["title"])
+
+queue.register("cohort_book", _cohort_book)
+
+def _payload_matches(matches: List[Dict]) -> List[Dict]:
+    return [{**m, "investor": as_dict(m["investor"])} for m in matches]
+
+def _persist(p: Dict) -> str:
+    from .db import save_matches
+    save_matches(p["run_id"], p["matches"], brief_fp=p["brief_fp"])
+    return ""
+
+queue.register("persist", _persist)
+
+def enqueue_persist(run_id: str, brief_fp: str, matches: List[Dict]) -> Optional[str]:
+    """
+    A run's matches written to Postgres (db.save_matches) by a background worker; returns the job
+    id, or None (nothing queued) while Postgres is known to be down.
+    """
+    from .db import available
+    if not available():
+        return None
+    return queue.enqueue("persist", {"run_id": run_id, "brief_fp": brief_fp, "matches": _payload_matches(matches)})
+
+def enqueue_exports(brief: Dict, matches: List[Dict], exports: List[str]) -> Dict[str, str]:
+    """One background job per requested export; returns {kind: job_id}."""
+    payload = {"brief": brief, "matches": _payload_matches(matches)}
+    return {kind: queue.enqueue(kind, payload) for kind in dict.fromkeys(exports)}
+
+def enqueue_cohort_exports(results: List[Dict], exports: List[str], title: str = "Cohort Book") -> Dict[str, str]:
+    """Cohort exports (orchestrator.cohort_results) as background jobs; returns {kind: job_id}."""
+    cohort = [{"brief": x["brief"], "matches": _payload_matches(x["matches"])} for x in results]
+    return {kind: queue.enqueue(kind, {"cohort": cohort, "title": title}) for kind in dict.fromkeys(exports)}
+
+def start_workers() -> None:
+    """Export workers, plus a separate lane for the bookkeeping jobs (BACKGROUND_KINDS)."""
+    queue.start(EXPORT_WORKERS, skip=BACKGROUND_KINDS)
+    queue.start(PERSIST_WORKERS, kinds=BACKGROUND_KINDS, lane="persist")
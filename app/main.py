@@ -1,41 +1,145 @@
-from fastapi import FastAPI
-from .schemas import GenerateRequest, GenerateResponse, GenerateEmailRequest, GenerateEmailResponse
-from .orchestrator import run_pipeline
-from .db import init_db
-from .agents.writer import run as write_one
+import json, os
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from .schemas import (GenerateRequest, GenerateResponse, GenerateEmailRequest, GenerateEmailResponse,
+                      GenerateEmailsRequest, GenerateBatchRequest, GenerateBatchResponse, JobStatus)
+from .orchestrator import run_pipeline, iter_pipeline, iter_matches, rank_cohort, cohort_results, cohort_investors
+from .exports import iter_csv, batch_csv_rows, export_name, BATCH_CSV_COLS
+from .db import init_db, UNAVAILABLE
+from .agents.writer import run as write_one, iter_batch as write_batch, iter_draft, ttft_stats
+from .tools.search import corpus_snapshot, corpus_stats as _corpus_stats, serp_cache_stats
+from .tools import fetch
+from .tools.llm_gemini import warm_model
+from .result_cache import rankings
+from .records import as_dict
+from .draft_cache import drafts
+from .jobs import queue as export_queue, start_workers, enqueue_exports, enqueue_cohort_exports
+from .admission import Gate, AdmissionMiddleware
+from .metrics import ServerTimingMiddleware, register_stats, render as render_metrics, swallowed, FAILED_REQUESTS
+from .config import (ADMIT_RANKING_LIMIT, ADMIT_RANKING_QUEUE, ADMIT_LLM_LIMIT, ADMIT_LLM_QUEUE,
+                     ADMIT_EXPORT_LIMIT, ADMIT_EXPORT_QUEUE, ADMIT_WAIT_S)
 
 app = FastAPI(title="Fundraise Copilot (on-demand emails)")
 
+# ---------- Admission control ----------
+gates = {
+    "ranking": Gate("ranking", ADMIT_RANKING_LIMIT, ADMIT_RANKING_QUEUE, ADMIT_WAIT_S),
+    "llm": Gate("llm", ADMIT_LLM_LIMIT, ADMIT_LLM_QUEUE, ADMIT_WAIT_S),
+    "export": Gate("export", ADMIT_EXPORT_LIMIT, ADMIT_EXPORT_QUEUE, ADMIT_WAIT_S),
+}
+
+def _endpoint_class(method: str, path: str):
+    if method != "POST" and not path.endswith("/download"):
+        return None
+    if path.startswith("/api/generate_email"):
+        return "llm"
+    if path.startswith("/api/generate"):
+        return "ranking"
+    if path.startswith("/api/jobs/") or path.startswith("/api/export/"):
+        return "export"
+    return None
+
+app.add_middleware(AdmissionMiddleware, gates=gates, classify=_endpoint_class)
+app.add_middleware(ServerTimingMiddleware)
+register_stats({"fetch": fetch.cache_stats, "serp": serp_cache_stats, "rankings": rankings.stats,
+                "drafts": drafts.stats}, gates)
+
 @app.on_event("startup")
 def _startup():
     init_db()
+    index, _ = corpus_snapshot()
+    if index is not None:
+        index.matrix    # rankings score against it; built here rather than on the first request
+    warm_model()
+    start_workers()
+
+@app.on_event("shutdown")
+def _shutdown():
+    export_queue.stop()
+    from .pdf_render import shutdown_pool
+    shutdown_pool()
+
+def _out_match(m: dict) -> dict:
+    inv, sc = m["investor"], m["score"]
+    return {
+        "investor": as_dict(inv),
+        "fit_score": sc["fit_score"],
+        "stage_fit": sc["stage_fit"],
+        "sector_fit": sc["sector_fit"],
+        "geo_fit": sc["geo_fit"],
+        "momentum": sc["momentum"],
+        "rationale": sc["rationale"],
+        "email_draft": m.get("email_draft"),
+    }
+
+def _failed(endpoint: str, e: Exception) -> HTTPException:
+    """Counts a failed request; 503 when a retry can succeed (store/upstream unavailable), else 500."""
+    FAILED_REQUESTS.labels(endpoint=endpoint, type=e.__class__.__name__).inc()
+    if isinstance(e, UNAVAILABLE + (TimeoutError,)):
+        return HTTPException(status_code=503, detail="Investor store unavailable; retry shortly.")
+    return HTTPException(status_code=500, detail=f"Pipeline failed ({e.__class__.__name__}).")
 
-@app.post("/api/generate", response_model=GenerateResponse)
+@app.post("/api/generate",response_model=GenerateResponse)
 def generate(req: GenerateRequest):
+    brief = req.brief.model_dump()
     try:
+        # exports run on the background queue; respond as soon as the ranking is ready
         matches, export_results, _ = run_pipeline(
-            brief=req.brief.model_dump(),
+            brief=brief,
             top_k=req.top_k,
             use_llm=req.use_llm,
             allow_scrape=req.allow_scrape,
-            exports=req.exports
+            exports=[]
         )
-    except Exception:
-        matches, export_results = [], {}
-    out_matches = []
-    for m in matches:
-        inv, sc = m["investor"], m["score"]
-        out_matches.append({
-            "investor": inv,
-            "fit_score": sc["fit_score"],
-            "stage_fit": sc["stage_fit"],
-            "sector_fit": sc["sector_fit"],
-            "geo_fit": sc["geo_fit"],
-            "momentum": sc["momentum"],
-            "rationale": sc["rationale"],
-            "email_draft": m.get("email_draft"),
-        })
-    return {"matches": out_matches, "exports": export_results}
+    except Exception as e:
+        raise _failed("generate", e)
+    try:
+        export_jobs = enqueue_exports(brief, matches, req.exports) if matches else {}
+    except Exception as e:
+        swallowed("enqueue_exports", e)
+        export_jobs = {}
+    out_matches = [_out_match(m) for m in matches]
+    return {"matches": out_matches, "exports": export_results, "export_jobs": export_jobs}
+
+@app.post("/api/generate/stream")
+def generate_stream(req: GenerateRequest):
+    """
+    NDJSON stream of pipeline stage events (see orchestrator.iter_pipeline). Match batches arrive
+    in API shape; exports are queued as background jobs whose ids arrive in exports_queued (poll
+    /api/jobs/{id}), so the stream, and its ranking admission slot, end with the ranking.
+    """
+    def events():
+        try:
+            for ev in iter_pipeline(
+                brief=req.brief.model_dump(),
+                top_k=req.top_k,
+                allow_scrape=req.allow_scrape,
+                exports=req.exports,
+                background_exports=True,
+            ):
+                if ev["event"] == "matches":
+                    ev = {**ev, "matches": [_out_match(m) for m in ev["matches"]]}
+                yield json.dumps(ev) + "\n"
+        except Exception as e:
+            yield json.dumps({"event": "error", "detail": str(e) or e.__class__.__name__}) + "\n"
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/api/generate_batch", response_model=GenerateBatchResponse)
+def generate_batch(req: GenerateBatchRequest):
+    """
+    Accelerator cohorts: every brief scored against the seed corpus in one brief x investor pass
+    (orchestrator.rank_cohort), then per-brief top-k and the investors shared across the cohort.
+    exports=["cohort_book"] queues one PDF with a section per matched startup.
+    """
+    briefs = [b.model_dump() for b in req.briefs]
+    results = cohort_results(briefs, rank_cohort(briefs, top_k=req.top_k))
+    matched = [x for x in results if x["matches"]]
+    return {
+        "results": [{"startup": x["brief"]["name"], "matches": [_out_match(m) for m in x["matches"]]} for x in results],
+        "cohort": [{**row, "investor": as_dict(row["investor"])} for row in cohort_investors(results, req.cohort_top)],
+        "unmatched": [x["brief"]["name"] for x in results if not x["matches"]],
+        "export_jobs": enqueue_cohort_exports(matched, req.exports) if matched else {},
+    }
 
 # NEW: per-investor email generation
 @app.post("/api/generate_email", response_model=GenerateEmailResponse)
@@ -43,7 +147,109 @@ def generate_email(req: GenerateEmailRequest):
     try:
         # build the minimal score dict used by writer's rationale
         score_stub = {"rationale": "Context fit based on your brief."}
-        email = write_one(req.investor.model_dump(), score_stub, req.brief.model_dump(), use_llm=req.use_llm)
-    except Exception:
+        email = write_one(req.investor.model_dump(), score_stub, req.brief.model_dump(), use_llm=req.use_llm,
+                          regenerate=req.regenerate)
+    except Exception as e:
+        swallowed("generate_email", e)
         email = "Hi — quick intro; we're building something relevant to your thesis. Could we grab 15 minutes next week?"
     return {"email_draft": email}
+
+@app.post("/api/generate_email/stream")
+def generate_email_stream(req: GenerateEmailRequest):
+    """NDJSON: chunk events as Gemini streams the draft, then a done event with source and TTFT."""
+    score_stub = {"rationale": "Context fit based on your brief."}
+
+    def events():
+        for ev in iter_draft(req.investor.model_dump(), score_stub, req.brief.model_dump(),
+                             use_llm=req.use_llm, regenerate=req.regenerate):
+            yield json.dumps(ev) + "\n"
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/api/generate_emails")
+def generate_emails(req: GenerateEmailsRequest):
+    """
+    Drafts for a list of investors, concurrently and under the shared Gemini limiter; at most
+    LLM_EMAIL_BUDGET use the LLM. NDJSON, one line per draft in completion order.
+    """
+    brief = req.brief.model_dump()
+    investors = [inv.model_dump() for inv in req.investors]
+
+    def lines():
+        for i, email, source in write_batch(investors, brief, use_llm=req.use_llm, regenerate=req.regenerate):
+            inv = investors[i]
+            yield json.dumps({"index": i, "name": inv["name"], "fund": inv["fund"],
+                              "email_draft": email, "source": source}) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/export/csv")
+def export_csv_download(req: GenerateRequest, gzip: bool = False):
+    """
+    Ranks the brief and streams the matches as CSV (gzip with ?gzip=true) straight to the
+    client, nothing written to disk. The ranking itself is built in full first, so memory grows
+    with top_k; GenerateRequest caps that at MAX_TOP_K.
+    """
+    rows = iter_matches(req.brief.model_dump(), top_k=req.top_k, allow_scrape=req.allow_scrape)
+    name = export_name("matches", "csv.gz" if gzip else "csv")
+    return StreamingResponse(iter_csv(rows, gzip=gzip), media_type="application/gzip" if gzip else "text/csv",
+                             headers={"Content-Disposition": f'attachment; filename="{name}"'})
+
+@app.post("/api/export/batch_csv")
+def export_batch_csv_download(req: GenerateBatchRequest, gzip: bool = False):
+    """The whole cohort's matches as one streamed CSV, a `startup` column first (see /api/generate_batch)."""
+    briefs = [b.model_dump() for b in req.briefs]
+    rows = batch_csv_rows(cohort_results(briefs, rank_cohort(briefs, top_k=req.top_k)))
+    name = export_name("cohort_matches", "csv.gz" if gzip else "csv")
+    return StreamingResponse(iter_csv((), gzip=gzip, rows=rows, header=BATCH_CSV_COLS),
+                             media_type="application/gzip" if gzip else "text/csv",
+                             headers={"Content-Disposition": f'attachment; filename="{name}"'})
+
+# ---------- Export jobs ----------
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+def job_status(job_id: str):
+    job = export_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    if job["status"] == "done" and job["result"]:
+        job["download_url"] = f"/api/jobs/{job_id}/download"
+    return job
+
+@app.get("/api/jobs/{job_id}/download")
+def job_download(job_id: str):
+    job = export_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}.")
+    if not job["result"]:
+        raise HTTPException(status_code=404, detail="Export produced no artifact.")
+    if job["kind"] == "notion":
+        return RedirectResponse(job["result"])
+    media = "application/pdf" if job["kind"] in ("pdf", "cohort_book") else "text/csv"
+    return FileResponse(job["result"], media_type=media, filename=os.path.basename(job["result"]))
+
+# ---------- Seed corpus ----------
+@app.get("/api/corpus")
+def corpus_stats():
+    """Corpus being served: version (what result caches key on), plus size, reload count and the last diff for the seed file."""
+    return _corpus_stats()
+
+@app.post("/api/corpus/reload")
+def corpus_reload():
+    """Pick up seed file (or investors table) edits now rather than at the next check."""
+    return _corpus_stats(reload=True)
+
+@app.get("/api/admission")
+def admission_stats():
+    """Per endpoint class: slots in use, queue depth, admitted/rejected counts and wait percentiles."""
+    return {name: gate.stats() for name, gate in gates.items()}
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus exposition: stage/fetch/SerpAPI/Gemini histograms, cache, fallback and admission counters."""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+@app.get("/api/cache_stats")
+def cache_stats():
+    return {"fetch": fetch.cache_stats(), "serp": serp_cache_stats(), "rankings": rankings.stats(),
+            "drafts": drafts.stats(), "email_ttft": ttft_stats()}
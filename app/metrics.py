@@ -0,0 +1,108 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from prometheus_client import Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# ---------- Timings ----------
+PIPELINE_STAGE = Histogram("copilot_pipeline_stage_seconds", "Time spent in each pipeline stage", ["stage"], buckets=_BUCKETS)
+FETCH = Histogram("copilot_fetch_seconds", "fetch_text calls by outcome", ["outcome"], buckets=_BUCKETS)
+SERPAPI = Histogram("copilot_serpapi_query_seconds", "SerpAPI queries by outcome", ["outcome"], buckets=_BUCKETS)
+LLM = Histogram("copilot_llm_call_seconds", "Gemini generate_content calls", ["mode", "outcome"], buckets=_BUCKETS)
+ADMISSION_WAIT = Histogram("copilot_admission_wait_seconds", "Time admitted requests waited for a slot", ["gate"], buckets=_BUCKETS)
+
+# ---------- Counters ----------
+FALLBACK_EMAILS = Counter("copilot_fallback_emails_total", "Template emails served instead of an LLM draft", ["reason"])
+SWALLOWED = Counter("copilot_swallowed_exceptions_total", "Exceptions caught and replaced by a fallback result", ["where", "type"])
+FAILED_REQUESTS = Counter("copilot_failed_requests_total", "Requests answered with a 5xx after an unexpected error", ["endpoint", "type"])
+
+# (name, seconds) spans of the current request, rendered as its Server-Timing header
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+@contextmanager
+def span(hist: Histogram, timing: Optional[str] = None, **labels):
+    """
+    Times the block into `hist`. Yields the label dict so the block can set an outcome it only
+    learns at the end. With `timing`, the span also goes into the request's Server-Timing header.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        dt = time.perf_counter() - t0
+        hist.labels(**labels).observe(dt)
+        timings = _request_timings.get()
+        if timing and timings is not None:
+            timings.append((timing, dt))
+
+def swallowed(where: str, e: BaseException) -> None:
+    SWALLOWED.labels(where=where, type=e.__class__.__name__).inc()
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    totals: Dict[str, float] = {}
+    for name, dt in timings:
+        totals[name] = totals.get(name, 0.0) + dt
+    return ", ".join(f"{name};dur={dt * 1000:.1f}" for name, dt in totals.items())
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware collecting span() timings per request into a Server-Timing header.
+    Streamed responses send headers before their stages run, so they only carry `total`.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        t0 = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                value = server_timing(timings + [("total", time.perf_counter() - t0)])
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"server-timing", value.encode())]}
+            await send(message)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+
+class _StatsCollector:
+    """Exposes counters the app already keeps (cache stats, admission gates) at scrape time."""
+    def __init__(self, caches: Dict[str, Callable[[], Dict]], gates: Dict):
+        self.caches, self.gates = caches, gates
+
+    def collect(self):
+        events = CounterMetricFamily("copilot_cache_events", "Cache lookups by result", labels=["cache", "result"])
+        for name, stats_fn in self.caches.items():
+            try:
+                stats = stats_fn()
+            except Exception:
+                continue
+            for result in ("hits", "misses", "revalidated", "errors", "pg_hits"):
+                if result in stats:
+                    events.add_metric([name, result], stats[result])
+        yield events
+        inflight = GaugeMetricFamily("copilot_admission_inflight", "Requests holding a slot", labels=["gate"])
+        waiting = GaugeMetricFamily("copilot_admission_queue_depth", "Requests waiting for a slot", labels=["gate"])
+        outcomes = CounterMetricFamily("copilot_admission_requests", "Admission decisions", labels=["gate", "outcome"])
+        for name, gate in self.gates.items():
+            s = gate.stats()
+            inflight.add_metric([name], s["inflight"])
+            waiting.add_metric([name], s["waiting"])
+            for outcome in ("admitted", "rejected", "timed_out"):
+                outcomes.add_metric([name, outcome], s[outcome])
+        yield inflight
+        yield waiting
+        yield outcomes
+
+def register_stats(caches: Dict[str, Callable[[], Dict]], gates: Dict) -> None:
+    REGISTRY.register(_StatsCollector(caches, gates))
+
+def render() -> Tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,254 @@
+import hashlib, json, os, threading, time
+from typing import Callable, Dict, List, Optional
+from .cache import DiskCache
+from .config import (CACHE_DIR, NOTION_API_KEY, NOTION_PARENT_PAGE_ID, NOTION_BASE_URL, NOTION_EXPORT_MODE,
+                     NOTION_RPS, NOTION_BURST, NOTION_MAX_RETRIES)
+from .tools.ratelimit import TokenBucketLimiter, backoff_delay
+
+BLOCKS_PER_REQUEST = 100     # Notion: max children in one request (and per nested array)
+TEXT_LIMIT = 2000            # Notion: max characters in one rich_text object
+RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+REJECTED_STATUSES = {409, 429}   # refused before being applied: safe to repeat any request
+COLUMNS = ["#", "Investor", "Fund", "Score", "Stage", "Sector", "Geo", "Momentum", "Why now", "Warm paths", "URLs"]
+
+# Shared by every export in the process: Notion's rate limit is per integration, not per page
+limiter = TokenBucketLimiter(NOTION_RPS * 60, 1e12, burst=NOTION_BURST)
+
+_state: Optional[DiskCache] = None
+_state_lock = threading.Lock()
+
+def _get_state() -> DiskCache:
+    global _state
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                _state = DiskCache(os.path.join(CACHE_DIR, "notion.sqlite"))
+    return _state
+
+# ---------- Blocks ----------
+def _text(s) -> List[Dict]:
+    return [{"type": "text", "text": {"content": str(s)[:TEXT_LIMIT]}}]
+
+def _paragraph(s) -> Dict:
+    return {"object": "block", "type": "paragraph", "paragraph": {"rich_text": _text(s)}}
+
+def _heading(s) -> Dict:
+    return {"object": "block", "type": "heading_2", "heading_2": {"rich_text": _text(s)}}
+
+def _cells(rank: int, m: Dict) -> List:
+    inv, sc = m["investor"], m["score"]
+    return [rank, inv.get("name",""), inv.get("fund",""), sc["fit_score"], sc["stage_fit"], sc["sector_fit"],
+            sc["geo_fit"], sc["momentum"], sc["rationale"], "; ".join(inv.get("warm_paths",[])), "; ".join(inv.get("urls",[]))]
+
+def _plain(block: Dict) -> str:
+    return "".join(t.get("plain_text") or t.get("text", {}).get("content", "")
+                   for t in (block.get(block.get("type"), {}) or {}).get("rich_text", []))
+
+def _table_row(cells: List) -> Dict:
+    return {"object": "block", "type": "table_row", "table_row": {"cells": [_text(c) for c in cells]}}
+
+DB_PROPERTIES = {
+    "Investor": {"title": {}}, "Rank": {"number": {}}, "Fund": {"rich_text": {}}, "Score": {"number": {}},
+    "Stage fit": {"number": {}}, "Sector fit": {"number": {}}, "Geo fit": {"number": {}}, "Momentum": {"number": {}},
+    "Why now": {"rich_text": {}}, "Warm paths": {"rich_text": {}}, "URL": {"url": {}},
+}
+
+def _db_row(rank: int, m: Dict) -> Dict:
+    inv, sc = m["investor"], m["score"]
+    return {
+        "Investor": {"title": _text(inv.get("name",""))}, "Rank": {"number": rank},
+        "Fund": {"rich_text": _text(inv.get("fund",""))}, "Score": {"number": sc["fit_score"]},
+        "Stage fit": {"number": sc["stage_fit"]}, "Sector fit": {"number": sc["sector_fit"]},
+        "Geo fit": {"number": sc["geo_fit"]}, "Momentum": {"number": sc["momentum"]},
+        "Why now": {"rich_text": _text(sc["rationale"])},
+        "Warm paths": {"rich_text": _text("; ".join(inv.get("warm_paths",[])))},
+        "URL": {"url": (inv.get("urls") or [None])[0]},
+    }
+
+def export_key(brief: Dict, matches: List[Dict], mode: str) -> str:
+    """Same brief + same ranked investors + same mode = same export, so a retry resumes it."""
+    ids = [m["investor"].get("unique_key") or f"{m['investor'].get('name','')}|{m['investor'].get('fund','')}" for m in matches]
+    return hashlib.sha1(json.dumps({"brief": brief, "investors": ids, "mode": mode}, sort_keys=True, default=str).encode()).hexdigest()
+
+def _retryable(e: Exception) -> bool:
+    if getattr(e, "status", None) in RETRY_STATUSES:
+        return True
+    return any(c.__name__ in {"RequestTimeoutError", "TransportError"} for c in type(e).__mro__)
+
+def _rejected(e: Exception) -> bool:
+    return getattr(e, "status", None) in REJECTED_STATUSES
+
+def _retry_after(e: Exception) -> Optional[float]:
+    try:
+        return float(getattr(e, "headers", {}).get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class NotionExporter:
+    """
+    Full match list to Notion: a page with the brief summary, then every investor either as rows
+    of one table block ("table", appended 100 rows per request) or as pages of an inline database
+    ("database", one request per row). Calls go through the shared limiter and are retried on
+    409/429/5xx/timeouts (honouring Retry-After); a write that failed ambiguously is only repeated
+    once Notion has been re-read and shows it did not land. Progress is checkpointed around every
+    write (the step in flight, then its result), so a failed export picks up where it stopped when
+    it is run again (e.g. by the job queue), reconciling a write whose response was lost first.
+    """
+    def __init__(self, client=None, mode: str = NOTION_EXPORT_MODE, parent_page_id: str = NOTION_PARENT_PAGE_ID,
+                 rate_limiter: Optional[TokenBucketLimiter] = None, state: Optional[DiskCache] = None,
+                 max_retries: int = NOTION_MAX_RETRIES, sleep: Callable[[float], None] = time.sleep):
+        self.client = client
+        self.mode = mode
+        self.parent_page_id = parent_page_id
+        self.limiter = rate_limiter or limiter
+        self.state = state
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.requests = self.retries = self.reconciled = 0
+
+    def _client(self):
+        if self.client is None:
+            from notion_client import Client
+            self.client = Client(auth=NOTION_API_KEY, base_url=NOTION_BASE_URL)
+        return self.client
+
+    def _call(self, fn, reconcile: Optional[Callable[[], Optional[Dict]]] = None, idempotent: bool = False, **kwargs):
+        """
+        429/409 mean Notion refused the request, so any call is retried. After a timeout or 5xx a
+        write may still have been applied: it is retried only when `reconcile` re-reads Notion and
+        returns None (not applied); a non-None result stands in for the lost response. Writes
+        without a reconcile are not retried on timeouts/5xx.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            self.requests += 1
+            try:
+                return fn(**kwargs)
+            except Exception as e:
+                ambiguous = not (idempotent or _rejected(e))
+                if attempt == self.max_retries or not _retryable(e) or (ambiguous and reconcile is None):
+                    raise
+                self.retries += 1
+                wait = _retry_after(e)
+                self.sleep(wait if wait is not None else backoff_delay(attempt, 1.0, 30.0))
+                if ambiguous:
+                    self.reconciled += 1
+                    landed = reconcile()
+                    if landed is not None:
+                        return landed
+
+    def _children(self, block_id: str) -> List[Dict]:
+        blocks, out, cursor = self._client().blocks, [], None
+        while True:
+            page = self._call(blocks.children.list, idempotent=True, block_id=block_id, page_size=BLOCKS_PER_REQUEST,
+                              **({"start_cursor": cursor} if cursor else {}))
+            out.extend(page["results"])
+            if not page.get("has_more"):
+                return out
+            cursor = page["next_cursor"]
+
+    def _load(self, key: str) -> Dict:
+        entry = (self.state or _get_state()).get(key)
+        return json.loads(entry["value"]) if entry else {}
+
+    def _save(self, key: str, st: Dict) -> None:
+        (self.state or _get_state()).set(key, json.dumps(st))
+
+    def _write(self, key: str, st: Dict, step: str, fn, reconcile: Callable[[], Optional[Dict]], **kwargs):
+        """
+        One non-idempotent write. `step` is checkpointed as pending before the request, so a write
+        whose response was lost (the run died, or the job is re-run) is reconciled before it is
+        sent again; the caller clears `pending` when it checkpoints the result.
+        """
+        if st.get("pending") == step:
+            landed = reconcile()
+            if landed is not None:
+                return landed
+        st["pending"] = step
+        self._save(key, st)
+        return self._call(fn, reconcile=reconcile, **kwargs)
+
+    def _page_created(self, title: str, ref: str) -> Optional[Dict]:
+        """The export page under the parent with this title whose summary carries `ref`, if any."""
+        for block in reversed(self._children(self.parent_page_id)):
+            if block.get("type") == "child_page" and block["child_page"].get("title") == title and any(
+                    ref in _plain(b) for b in self._children(block["id"])[:3]):
+                return self._call(self._client().pages.retrieve, idempotent=True, page_id=block["id"])
+        return None
+
+    def run(self, brief: Dict, matches: List[Dict]) -> str:
+        key = export_key(brief, matches, self.mode)
+        st = self._load(key)
+        if st.get("complete"):
+            return st["url"]
+        client = self._client()
+        if not st.get("page_id"):
+            title, ref = f"{brief['name']} — Fundraising Targets", key[:12]
+            page = self._write(
+                key, st, "page", client.pages.create, lambda: self._page_created(title, ref),
+                parent={"type": "page_id", "page_id": self.parent_page_id},
+                properties={"title": _text(title)},
+                children=[
+                    _paragraph(f"One-liner: {brief['one_liner']}"),
+                    _paragraph(f"Sector: {', '.join(brief.get('sector', []))} · Stage: {brief.get('stage','')} · Geo: {brief.get('geo','N/A')}"),
+                    _paragraph(f"{len(matches)} target investors, ranked by fit. (export {ref})"),
+                ],
+            )
+            st = {"page_id": page["id"], "url": page.get("url", ""), "done": 0}
+            self._save(key, st)
+        if self.mode == "database":
+            self._database_rows(key, st, matches)
+        else:
+            self._table_rows(key, st, matches)
+        st["complete"] = True
+        self._save(key, st)
+        return st["url"]
+
+    def _table_rows(self, key: str, st: Dict, matches: List[Dict]) -> None:
+        blocks = self._client().blocks
+        rows = [_table_row(COLUMNS)] + [_table_row(_cells(i, m)) for i, m in enumerate(matches, start=1)]
+        if not st.get("container_id"):
+            first = rows[:BLOCKS_PER_REQUEST]
+            table = {"object": "block", "type": "table", "table": {
+                "table_width": len(COLUMNS), "has_column_header": True, "has_row_header": False, "children": first}}
+
+            def table_added():
+                last = self._children(st["page_id"])[-1:]
+                return {"results": last} if last and last[0].get("type") == "table" else None
+            res = self._write(key, st, "table", blocks.children.append, table_added,
+                              block_id=st["page_id"], children=[_heading("Target Investors"), table])
+            st.update(container_id=res["results"][-1]["id"], done=len(first), pending=None)
+            self._save(key, st)
+        # the table's children are exactly rows[:done]; after an ambiguous failure, done is re-read from Notion
+        while st["done"] < len(rows):
+            start = st["done"]
+            batch = rows[start:start + BLOCKS_PER_REQUEST]
+
+            def rows_added():
+                n = len(self._children(st["container_id"]))
+                return {"done": n} if n > start else None
+            res = self._write(key, st, f"rows:{start}", blocks.children.append, rows_added,
+                              block_id=st["container_id"], children=batch)
+            st.update(done=res.get("done", start + len(batch)), pending=None)
+            self._save(key, st)
+
+    def _database_rows(self, key: str, st: Dict, matches: List[Dict]) -> None:
+        client = self._client()
+        if not st.get("container_id"):
+            def database_added():
+                found = [b for b in self._children(st["page_id"]) if b.get("type") == "child_database"]
+                return found[-1] if found else None
+            db = self._write(key, st, "database", client.databases.create, database_added,
+                             parent={"type": "page_id", "page_id": st["page_id"]},
+                             title=_text("Target Investors"), is_inline=True, properties=DB_PROPERTIES)
+            st.update(container_id=db["id"], done=0, pending=None)
+            self._save(key, st)
+        for i in range(st["done"], len(matches)):
+            def row_added():
+                found = self._call(client.databases.query, idempotent=True, database_id=st["container_id"],
+                                   filter={"property": "Rank", "number": {"equals": i + 1}})["results"]
+                return found[0] if found else None
+            self._write(key, st, f"row:{i}", client.pages.create, row_added,
+                        parent={"database_id": st["container_id"]}, properties=_db_row(i + 1, matches[i]))
+            st.update(done=i + 1, pending=None)
+            self._save(key, st)
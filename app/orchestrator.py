@@ -1,6 +1,16 @@
-from typing import Dict, List
+import uuid
+from typing import Dict, Iterator, List
 from .agents import researcher, matchmaker
-from .exports import export_csv, export_pdf, export_notion
+from .agents.matchmaker import Scored
+from .config import RESULT_CACHE_DEPTH, SQL_CANDIDATES
+from .jobs import enqueue_exports, enqueue_persist
+from .result_cache import rankings, ranking_key, brief_fingerprint
+from .tools.search import corpus_snapshot, on_corpus_change
+from .plugins import exporters
+from .metrics import PIPELINE_STAGE, span, swallowed
+
+# cached rankings follow the served corpus; requests on an older snapshot never move it back
+on_corpus_change(rankings.corpus_changed)
 
 def one_pager_md(brief: dict, matches: List[Dict]) -> str:
     lines = [
@@ -17,36 +27,153 @@ def one_pager_md(brief: dict, matches: List[Dict]) -> str:
         lines.append(f"- **{inv.get('name')} ({inv.get('fund')})** — {sc['rationale']} (score {sc['fit_score']})")
     return "\n".join(lines)
 
-def run_pipeline(brief: dict, top_k: int = 25, use_llm: bool = True, allow_scrape: bool = False, exports: List[str] = ["csv"]):
-    # research & rank
-    candidates = researcher.run(brief, allow_scrape=allow_scrape)
-    ranked = matchmaker.run(brief, candidates)
+def _match(scored: Scored) -> Dict:
+    # match WITHOUT email_draft (on-demand later); the record becomes a dict only at the API boundary
+    inv, score = scored
+    return {"investor": inv, "score": score, "email_draft": None}
+
+def _assemble(ranked: List[Scored]) -> List[Dict]:
+    return [_match(s) for s in ranked]
+
+def _batches(items: List[Dict], size: int) -> Iterator[List[Dict]]:
+    for i in range(0, len(items), max(1, size)):
+        yield items[i:i + size]
+
+def _score(brief: dict, candidates: List, index, top_k: int) -> List[Scored]:
+    """Seed candidates are scored as rows of the index's corpus matrix; only other records are encoded."""
+    if index is None:
+        return matchmaker.run(brief, candidates, top_k=top_k)
+    return matchmaker.rank_rows(brief, index.matrix, candidates, index.rows(candidates), top_k=top_k)
+
+def _iter_rank(brief: dict, top_k: int, allow_scrape: bool, progressive: bool, batch_size: int):
+    """
+    Yields progress events and returns the ranked candidates as (record, score) pairs.
+    Served from the result cache when the same normalized brief was ranked against the same
+    corpus; a different top_k just slices.
+    """
+    index, version = corpus_snapshot()    # one corpus snapshot for the whole run, even if a reload lands meanwhile
+    key = ranking_key(brief, allow_scrape, version)
+    with span(PIPELINE_STAGE, "cache", stage="cache"):
+        cached = rankings.get(key, top_k, version)
+    if cached is not None:
+        yield {"event": "search_completed", "candidates": len(cached), "cached": True}
+        return cached
+
+    yield {"event": "search_started"}
+    with span(PIPELINE_STAGE, "search", stage="search"):
+        candidates = researcher.search(brief, index)
+    yield {"event": "search_completed", "candidates": len(candidates), "cached": False}
+
+    if allow_scrape:
+        if progressive:
+            # first results straight from search, while pages are still being fetched
+            for batch in _batches(_assemble(_score(brief, candidates, index, top_k)), batch_size):
+                yield {"event": "matches", "final": False, "matches": batch}
+        with span(PIPELINE_STAGE, "scrape", stage="scrape"):
+            for url, txt in researcher.iter_enrich(candidates):
+                yield {"event": "scrape_completed", "url": url, "ok": bool(txt)}
+
+    depth = max(top_k, RESULT_CACHE_DEPTH)
+    with span(PIPELINE_STAGE, "score", stage="score"):
+        ranked = _score(brief, candidates, index, depth)
+    # with RETRIEVAL=postgres a full SQL_CANDIDATES page may have cut candidates off: never final
+    truncated = index is None and len(candidates) >= SQL_CANDIDATES
+    rankings.put(key, ranked, complete=len(candidates) <= depth and not truncated, corpus_version=version)
+    return ranked[:top_k]
+
+def _drain(gen):
+    while True:
+        try:
+            next(gen)
+        except StopIteration as stop:
+            return stop.value
+
+def rank(brief: dict, top_k: int = 25, allow_scrape: bool = False) -> List[Scored]:
+    return _drain(_iter_rank(brief, top_k, allow_scrape, progressive=False, batch_size=top_k))
 
-    # assemble matches WITHOUT email_draft (on-demand later)
+def iter_matches(brief: dict, top_k: int = 25, allow_scrape: bool = False) -> Iterator[Dict]:
+    """
+    Ranked matches one at a time for streamed downloads. Only the match dicts are built lazily:
+    rank() returns the whole top_k list first, so memory is O(top_k), not constant.
+    """
+    return map(_match, rank(brief, top_k=top_k, allow_scrape=allow_scrape))
+
+# ---------- Cohort (multi-brief) ranking ----------
+def rank_cohort(briefs: List[dict], top_k: int = 25) -> List[List[Scored]]:
+    """
+    Every brief ranked against the seed corpus in one pass (matchmaker.rank_batch over the
+    index's corpus-wide matrix). Each ranking equals rank() for that brief without live search
+    hits; SerpAPI is per brief and is not run for cohorts, and results bypass the ranking cache.
+    With RETRIEVAL=postgres there is no matrix in the worker: each brief's pre-scored candidates
+    come from SQL, as in rank(), and are ranked one brief at a time.
+    """
+    index, _ = corpus_snapshot()
+    with span(PIPELINE_STAGE, "cohort", stage="cohort"):
+        if index is None:
+            return [matchmaker.run(b, researcher.seed_candidates(b), top_k=top_k) for b in briefs]
+        ids = [researcher.seed_ids(b, index) for b in briefs]
+        return matchmaker.rank_batch(briefs, index.matrix, ids, top_k=top_k)
+
+def cohort_results(briefs: List[dict], ranked: List[List[Scored]]) -> List[Dict]:
+    """[{"brief", "matches"}, ...] per startup: the shape export_cohort_book and batch_csv_rows take."""
+    return [{"brief": b, "matches": _assemble(r)} for b, r in zip(briefs, ranked)]
+
+def cohort_investors(results: List[Dict], top_n: int = 25) -> List[Dict]:
+    """Investors by reach across the cohort: briefs whose top-k they appear in, then mean fit."""
+    seen: Dict[str, Dict] = {}
+    for x in results:
+        for m in x["matches"]:
+            inv = m["investor"]
+            row = seen.setdefault(inv.unique_key or f"{inv.name}|{inv.fund}", {"investor": inv, "fits": [], "startups": []})
+            row["fits"].append(m["score"]["fit_score"])
+            row["startups"].append(x["brief"].get("name", ""))
+    rows = sorted(seen.values(), key=lambda r: (-len(r["fits"]), -sum(r["fits"]) / len(r["fits"])))
+    return [{"investor": r["investor"], "briefs": len(r["fits"]), "mean_fit": round(sum(r["fits"]) / len(r["fits"]), 1),
+             "best_fit": max(r["fits"]), "startups": r["startups"]} for r in rows[:top_n]]
+
+def iter_pipeline(brief: dict, top_k: int = 25, allow_scrape: bool = False, exports: List[str] = ["csv"],
+                  background_exports: bool = False, progressive: bool = True, batch_size: int = 10) -> Iterator[Dict]:
+    """
+    The pipeline as a stream of stage events:
+      search_started, search_completed, matches (final=False while scraping), scrape_completed,
+      matches (final=True), scoring_done, exports_queued or export_done, done.
+    With background_exports the exports go through the job queue: exports_queued carries their
+    job ids and the stream ends there; clients poll /api/jobs/{id}.
+    """
+    ranked = yield from _iter_rank(brief, top_k, allow_scrape, progressive, batch_size)
+    matches = _assemble(ranked)
+
+    # the DB is a cache: this run's matches are written by a background job, off the response path
+    if matches:
+        try:
+            enqueue_persist(uuid.uuid4().hex, brief_fingerprint(brief), matches)
+        except Exception as e:
+            swallowed("enqueue_persist", e)
+
+    for batch in _batches(matches, batch_size):
+        yield {"event": "matches", "final": True, "matches": batch}
+    yield {"event": "scoring_done", "count": len(matches)}
+
+    if background_exports:
+        job_ids = enqueue_exports(brief, matches, exports) if matches else {}
+        yield {"event": "exports_queued", "jobs": job_ids}
+    else:
+        # exports still work; CSV will just have empty email unless user generated it
+        for kind in dict.fromkeys(exports):
+            if kind not in exporters:
+                continue
+            with span(PIPELINE_STAGE, f"export-{kind}", stage=f"export_{kind}"):
+                result = exporters.get(kind)(brief=brief, matches=matches)
+            yield {"event": "export_done", "kind": kind, "result": result, "status": "done"}
+    yield {"event": "done"}
+
+def run_pipeline(brief: dict, top_k: int = 25, use_llm: bool = True, allow_scrape: bool = False, exports: List[str] = ["csv"]):
     matches: List[Dict] = []
-    for inv in ranked[:top_k]:
-        matches.append({
-            "investor": {
-                "name": inv.get("name",""),
-                "fund": inv.get("fund",""),
-                "stages": inv.get("stages",[]),
-                "sectors": inv.get("sectors",[]),
-                "check_min": inv.get("check_min"),
-                "check_max": inv.get("check_max"),
-                "geo": inv.get("geo"),
-                "notable_investments": inv.get("notable_investments",[]),
-                "recent_news": inv.get("recent_news",[]),
-                "urls": inv.get("urls",[]),
-                "warm_paths": inv.get("warm_paths",[]),
-            },
-            "score": inv["_score"],
-            "email_draft": None,
-        })
-
-    # exports still work; CSV will just have empty email unless user generated it
     export_results = {}
-    if "csv" in exports:   export_results["csv"] = export_csv(matches)
-    if "pdf" in exports:   export_results["pdf"] = export_pdf(brief, matches)
-    if "notion" in exports: export_results["notion"] = export_notion(brief, matches)
-
+    for ev in iter_pipeline(brief, top_k=top_k, allow_scrape=allow_scrape, exports=exports,
+                            progressive=False, batch_size=max(1, top_k)):
+        if ev["event"] == "matches" and ev["final"]:
+            matches += ev["matches"]
+        elif ev["event"] == "export_done":
+            export_results[ev["kind"]] = ev["result"]
     return matches, export_results, one_pager_md(brief, matches)
@@ -0,0 +1,182 @@
+import os, threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+from reportlab import rl_config
+from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from .config import PDF_WORKERS
+
+FONT = "Helvetica"
+MARGIN, BOTTOM = 50, 80
+TOP_INVESTORS = 10
+
+# Keep compressed page streams binary: the pure-Python ASCII85 pass is ~20% of render time
+# when reportlab's C accelerator is not installed, and every PDF reader handles binary streams.
+rl_config.useA85 = 0
+
+# ---------- Text layout ----------
+@lru_cache(maxsize=65536)
+def word_width(word: str, font: str, size: float) -> float:
+    return stringWidth(word, font, size)
+
+def _split_long(word: str, max_width: float, font: str, size: float) -> List[str]:
+    pieces, cur, width = [], "", 0.0
+    for ch in word:
+        w = word_width(ch, font, size)
+        if cur and width + w > max_width:
+            pieces.append(cur); cur, width = "", 0.0
+        cur += ch; width += w
+    return pieces + [cur]
+
+def wrap(text: str, max_width: float, font: str = FONT, size: float = 11) -> List[str]:
+    """Greedy word wrap on real font metrics; words wider than a line are broken by character."""
+    space = word_width(" ", font, size)
+    lines, line, width = [], [], 0.0
+    for word in text.split():
+        w = word_width(word, font, size)
+        if w > max_width:
+            if line:
+                lines.append(" ".join(line)); line, width = [], 0.0
+            *full, word = _split_long(word, max_width, font, size)
+            lines += full
+            w = word_width(word, font, size)
+        if line and width + space + w > max_width:
+            lines.append(" ".join(line)); line, width = [word], w
+        else:
+            width += (space if line else 0.0) + w
+            line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+class PageWriter:
+    """
+    Top-down line writer over a canvas. All lines of a page go into one text object (one
+    BT..ET block), the font is only re-set when it changes, and page breaks are handled here.
+    """
+    def __init__(self, c: canvas.Canvas):
+        self.c = c
+        self.width, self.height = LETTER
+        self.y = self.height - MARGIN
+        self._text = None
+        self._font: Optional[Tuple[str, float]] = None
+
+    def _begin(self, font: str, size: float):
+        if self._text is None:
+            self._text, self._font = self.c.beginText(), None
+        if self._font != (font, size):
+            self._text.setFont(font, size)
+            self._font = (font, size)
+        return self._text
+
+    def flush(self) -> None:
+        if self._text is not None:
+            self.c.drawText(self._text)
+            self._text = None
+
+    def new_page(self) -> None:
+        self.flush()
+        self.c.showPage()
+        self.y = self.height - MARGIN
+
+    def line(self, text: str, size: float = 11, leading: float = 14, font: str = FONT) -> None:
+        if not text:
+            self.y -= leading
+            return
+        for ln in wrap(text, self.width - 2 * MARGIN, font, size):
+            if self.y < BOTTOM:
+                self.new_page()
+            t = self._begin(font, size)
+            t.setTextOrigin(MARGIN, self.y)
+            t.textOut(ln)
+            self.y -= leading
+
+    def header(self, text: str) -> None:
+        self.line(text, size=16, leading=20)
+
+# ---------- Documents ----------
+def draw_one_pager(pw: PageWriter, brief: Dict, matches: List[Dict]) -> None:
+    pw.header(f"{brief['name']} — One Pager")
+    pw.line(f"One-liner: {brief['one_liner']}")
+    pw.line(f"Sector: {', '.join(brief.get('sector', []))} · Stage: {brief.get('stage','')} · Geo: {brief.get('geo','N/A')}")
+    pw.line(""); pw.line("Why Now:", size=13)
+    pw.line(brief.get("ask") or "Raising intros to aligned investors.")
+    pw.line(""); pw.line("Traction:", size=13)
+    if brief.get("traction"):
+        for t in brief["traction"][:6]: pw.line(f"- {t}")
+    else:
+        pw.line("- Early traction with design partners.")
+    pw.line(""); pw.line("Top Target Investors:", size=13)
+    for m in matches[:TOP_INVESTORS]:
+        inv, sc = m["investor"], m["score"]
+        pw.line(f"- {inv.get('name')} ({inv.get('fund')}) — {sc['rationale']} (score {sc['fit_score']})")
+
+def render_one_pager(path: str, brief: Dict, matches: List[Dict]) -> int:
+    """Writes the one-pager PDF to `path`; returns its page count."""
+    c = canvas.Canvas(path, pagesize=LETTER)
+    pw = PageWriter(c)
+    draw_one_pager(pw, brief, matches)
+    pw.flush()
+    pages = c.getPageNumber()
+    c.save()
+    return pages
+
+def render_cohort_book(path: str, cohort: List[Tuple[Dict, List[Dict]]], title: str = "Cohort Book") -> int:
+    """One PDF for many startups: an index page, then each startup's one-pager from a fresh page, with outline entries."""
+    c = canvas.Canvas(path, pagesize=LETTER)
+    c.setTitle(title)
+    pw = PageWriter(c)
+    pw.header(f"{title} — {len(cohort)} startups")
+    pw.line("")
+    for i, (brief, _) in enumerate(cohort, start=1):
+        pw.line(f"{i}. {brief['name']} — {brief.get('one_liner','')}")
+    for i, (brief, matches) in enumerate(cohort, start=1):
+        pw.new_page()
+        key = f"s{i}"
+        c.bookmarkPage(key)
+        c.addOutlineEntry(f"{i}. {brief['name']}", key, level=0)
+        draw_one_pager(pw, brief, matches)
+    pw.flush()
+    pages = c.getPageNumber()
+    c.save()
+    return pages
+
+# ---------- Process pool ----------
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared render pool (spawned, so it is safe to start from threaded servers); None when PDF_WORKERS is 0."""
+    global _pool
+    if PDF_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=get_context("spawn"))
+    return _pool
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def render_many(jobs: List[Tuple[str, Dict, List[Dict]]]) -> List[int]:
+    """(path, brief, matches) one-pagers rendered in parallel on the pool; returns page counts in order."""
+    pool = get_pool()
+    jobs = [(path, brief, matches[:TOP_INVESTORS]) for path, brief, matches in jobs]
+    if pool is not None:
+        try:
+            return [f.result() for f in [pool.submit(render_one_pager, *job) for job in jobs]]
+        except BrokenProcessPool:
+            shutdown_pool()   # a worker died; render here and let the next call start a fresh pool
+    return [render_one_pager(*job) for job in jobs]
+
+def render(path: str, brief: Dict, matches: List[Dict]) -> int:
+    return render_many([(path, brief, matches)])[0]
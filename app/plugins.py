@@ -0,0 +1,52 @@
+import importlib, threading
+from typing import Any, Callable, Dict, List, Union
+
+class Registry:
+    """
+    Named plugins resolved on first use. Targets are registered as "module:attr" strings,
+    so a plugin's dependencies (reportlab, notion_client, google-generativeai…) are only
+    imported when something actually asks for it.
+    """
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._specs: Dict[str, Union[str, Callable]] = {}
+        self._loaded: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, target: Union[str, Callable]) -> None:
+        with self._lock:
+            self._specs[name] = target
+            self._loaded.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        obj = self._loaded.get(name)
+        if obj is not None:
+            return obj
+        with self._lock:
+            if name not in self._specs:
+                raise KeyError(f"unknown {self.kind} plugin {name!r}")
+            target = self._specs[name]
+            if isinstance(target, str):
+                module, _, attr = target.partition(":")
+                target = getattr(importlib.import_module(module), attr)
+            self._loaded[name] = target
+        return target
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def loaded(self) -> List[str]:
+        return list(self._loaded)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+# ---------- Export targets: fn(brief=..., matches=...) -> path or url ----------
+exporters = Registry("export")
+exporters.register("csv", "app.exports:export_csv")
+exporters.register("pdf", "app.exports:export_pdf")
+exporters.register("notion", "app.exports:export_notion")
+
+# ---------- LLM providers: factory() -> model with generate_content(prompt, stream=False) ----------
+llm_providers = Registry("llm")
+llm_providers.register("gemini", "app.tools.llm_gemini:new_gemini_model")
@@ -0,0 +1,85 @@
+import sys
+from typing import Any, Dict, Tuple
+
+FIELDS = ("name", "fund", "stages", "sectors", "check_min", "check_max", "geo",
+          "notable_investments", "recent_news", "urls", "warm_paths", "unique_key", "source")
+_FIELD_SET = frozenset(FIELDS)
+_SCHEMA_FIELDS = FIELDS[:-1]   # the Investor schema plus unique_key; `source` stays internal
+
+def _interned(values) -> Tuple[str, ...]:
+    return tuple(sys.intern(v) if type(v) is str else v for v in values or ())
+
+class InvestorRecord:
+    """
+    One investor from search through scoring: slotted, list fields as tuples, stage/sector/geo
+    interned so a corpus holds one copy of each taxonomy string. Records are shared (the seed
+    index hands out the same objects to every request), so never mutate one; use replace().
+    Reads like a dict (get, []) for exporters; to_dict() is the Investor shape for the API.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, name: str = "", fund: str = "", stages=(), sectors=(), check_min=None, check_max=None,
+                 geo=None, notable_investments=(), recent_news=(), urls=(), warm_paths=(), unique_key=None,
+                 source: str = ""):
+        self.name = name
+        self.fund = fund
+        self.stages = _interned(stages)
+        self.sectors = _interned(sectors)
+        self.check_min = check_min
+        self.check_max = check_max
+        self.geo = sys.intern(geo) if type(geo) is str else geo
+        self.notable_investments = tuple(notable_investments or ())
+        self.recent_news = tuple(recent_news or ())
+        self.urls = tuple(urls or ())
+        self.warm_paths = tuple(warm_paths or ())
+        self.unique_key = unique_key
+        self.source = source
+
+    @classmethod
+    def from_dict(cls, d: Dict, source: str = "") -> "InvestorRecord":
+        kw = {k: v for k, v in d.items() if k in _FIELD_SET}
+        if source:
+            kw["source"] = source
+        return cls(**kw)
+
+    def replace(self, **changes) -> "InvestorRecord":
+        return InvestorRecord(**{**{f: getattr(self, f) for f in FIELDS}, **changes})
+
+    def same_as(self, d: Dict) -> bool:
+        """Whether from_dict(d) would hold the same data, without building it (corpus reloads reuse the record)."""
+        g = d.get
+        return (self.name == g("name", "") and self.fund == g("fund", "") and self.geo == g("geo")
+                and self.check_min == g("check_min") and self.check_max == g("check_max")
+                and self.stages == tuple(g("stages") or ()) and self.sectors == tuple(g("sectors") or ())
+                and self.notable_investments == tuple(g("notable_investments") or ())
+                and self.recent_news == tuple(g("recent_news") or ()) and self.urls == tuple(g("urls") or ())
+                and self.warm_paths == tuple(g("warm_paths") or ()))
+
+    def to_dict(self) -> Dict:
+        # list fields stay tuples: JSON and the pydantic schemas read them as lists
+        return {f: getattr(self, f) for f in _SCHEMA_FIELDS}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, InvestorRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"InvestorRecord({self.name!r}, {self.fund!r}, unique_key={self.unique_key!r})"
+
+def as_record(inv) -> InvestorRecord:
+    return inv if isinstance(inv, InvestorRecord) else InvestorRecord.from_dict(inv)
+
+def as_dict(inv) -> Dict:
+    """Investor schema dict at the API / JSON boundary; plain dicts pass through."""
+    return inv.to_dict() if isinstance(inv, InvestorRecord) else inv
@@ -0,0 +1,95 @@
+import hashlib, json, threading, time
+from typing import Dict, List, Optional
+from .cache import LRUCache
+from .config import RESULT_CACHE_SIZE, RESULT_CACHE_TTL_S, RESULT_CACHE_PG
+from .schemas import StartupBrief
+from .records import InvestorRecord
+from .metrics import swallowed
+
+def brief_fingerprint(brief: dict) -> str:
+    """Stable hash of the brief after the StartupBrief validators (stage/sector normalization)."""
+    norm = StartupBrief.model_validate(brief).model_dump()
+    return hashlib.sha1(json.dumps(norm, sort_keys=True, default=str).encode()).hexdigest()
+
+def ranking_key(brief: dict, allow_scrape: bool, corpus_version: str) -> str:
+    return f"{brief_fingerprint(brief)}:{int(bool(allow_scrape))}:{corpus_version}"
+
+class RankingCache:
+    """
+    Ranked candidate lists ((record, score) pairs) keyed by ranking_key.
+    A ranking is stored to some depth; `complete` means it holds every candidate,
+    so any top_k can be served by slicing.
+    Tiers: in-process LRU, then (optionally) the Postgres result_cache table.
+
+    The corpus version only moves through corpus_changed (the reload hook), never from a request:
+    a request still on the previous snapshot neither clears the cache nor stores its ranking.
+    """
+    def __init__(self, maxsize: int = RESULT_CACHE_SIZE, ttl_s: float = RESULT_CACHE_TTL_S, use_pg: bool = RESULT_CACHE_PG):
+        self.lru = LRUCache(maxsize)
+        self.ttl_s = ttl_s
+        self.use_pg = use_pg
+        self.corpus_version = ""
+        self.pg_hits = 0
+        self._lock = threading.Lock()
+
+    def corpus_changed(self, corpus_version: str) -> None:
+        """A new corpus version is being served: drop what was cached against older ones."""
+        with self._lock:
+            if corpus_version == self.corpus_version:
+                return
+            self.corpus_version = corpus_version
+            self.lru.clear()
+        if self.use_pg:
+            # keys carry the version, so old rows are never served; purging them is housekeeping
+            threading.Thread(target=self._purge, args=(corpus_version,), name="ranking-purge", daemon=True).start()
+
+    def _purge(self, keep_version: str) -> None:
+        try:
+            from .db import purge_cached_rankings
+            purge_cached_rankings(keep_version=keep_version)
+        except Exception as e:
+            swallowed("purge_cached_rankings", e)
+
+    def _pg(self) -> bool:
+        if not self.use_pg:
+            return False
+        from .db import available
+        return available()      # skip the tier for a while after a failed connect
+
+    def get(self, key: str, top_k: int, corpus_version: str) -> Optional[List[Dict]]:
+        if self.corpus_version and corpus_version != self.corpus_version:
+            return None     # a request still on a replaced snapshot ranks afresh (and put() drops it)
+        entry = self.lru.get(key)
+        if entry is None and self._pg():
+            try:
+                from .db import get_cached_ranking
+                entry = get_cached_ranking(key, self.ttl_s)
+            except Exception as e:
+                swallowed("ranking_cache_get", e)
+                entry = None
+            if entry is not None:
+                entry["ranked"] = [(InvestorRecord.from_dict(d), d["_score"]) for d in entry["ranked"]]
+                self.pg_hits += 1
+                self.lru.put(key, entry)
+        if entry is None or time.time() - entry["stored_at"] > self.ttl_s:
+            return None
+        if not entry["complete"] and top_k > len(entry["ranked"]):
+            return None
+        return entry["ranked"][:top_k]
+
+    def put(self, key: str, ranked: List[Dict], complete: bool, corpus_version: str) -> None:
+        if self.corpus_version and corpus_version != self.corpus_version:
+            return      # ranked on a snapshot that has since been replaced
+        entry = {"ranked": ranked, "complete": complete, "stored_at": time.time()}
+        self.lru.put(key, entry)
+        if self._pg():
+            try:
+                from .db import put_cached_ranking
+                put_cached_ranking(key, corpus_version, [{**inv.to_dict(), "_score": sc} for inv, sc in ranked], complete)
+            except Exception as e:
+                swallowed("ranking_cache_put", e)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.lru.stats(), "pg_hits": self.pg_hits}
+
+rankings = RankingCache()
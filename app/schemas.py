@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, field_validator, ValidationInfo
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
+from .config import BATCH_MAX_BRIEFS, MAX_TOP_K
 
 _CANON_STAGES = {
     "angel": "angel",
@@ -69,10 +70,18 @@ class Match(BaseModel):
     email_draft: Optional[str] = None
 
 ExportKind = Literal["csv", "pdf", "notion"]
+BatchExportKind = Literal["cohort_book"]
+
+def _require_sector_and_stage(brief: StartupBrief) -> StartupBrief:
+    if not brief.sector:
+        raise ValueError("Please select at least one sector.")
+    if not brief.stage:
+        raise ValueError("Please select a stage.")
+    return brief
 
 class GenerateRequest(BaseModel):
     brief: StartupBrief
-    top_k: int = 25
+    top_k: int = Field(25, ge=1, le=MAX_TOP_K)
     use_llm: bool = True          # now ignored for batch (emails are on-demand)
     allow_scrape: bool = False
     exports: List[ExportKind] = ["csv"]
@@ -80,21 +89,73 @@ class GenerateRequest(BaseModel):
     @field_validator("brief")
     @classmethod
     def require_sector_and_stage(cls, brief: StartupBrief, info: ValidationInfo):
-        if not brief.sector:
-            raise ValueError("Please select at least one sector.")
-        if not brief.stage:
-            raise ValueError("Please select a stage.")
-        return brief
+        return _require_sector_and_stage(brief)
 
 class GenerateResponse(BaseModel):
     matches: List[Match]
     exports: dict
+    export_jobs: Dict[str, str] = {}      # kind -> job id; poll /api/jobs/{id}
+
+# Cohort ranking: many briefs scored against the corpus in one pass
+class GenerateBatchRequest(BaseModel):
+    briefs: List[StartupBrief]
+    top_k: int = Field(25, ge=1, le=MAX_TOP_K)   # per brief
+    cohort_top: int = 25          # investors in the cohort view
+    exports: List[BatchExportKind] = []   # cohort_book: one PDF, a section per startup
+
+    @field_validator("briefs")
+    @classmethod
+    def require_briefs(cls, briefs: List[StartupBrief]):
+        if not briefs:
+            raise ValueError("Please add at least one startup brief.")
+        if len(briefs) > BATCH_MAX_BRIEFS:
+            raise ValueError(f"At most {BATCH_MAX_BRIEFS} briefs per batch.")
+        for i, brief in enumerate(briefs):
+            try:
+                _require_sector_and_stage(brief)
+            except ValueError as e:
+                raise ValueError(f"Brief {i} ({brief.name or 'unnamed'}): {e}")
+        return briefs
+
+class BriefMatches(BaseModel):
+    startup: str
+    matches: List[Match]
+
+class CohortInvestor(BaseModel):
+    investor: Investor
+    briefs: int                   # briefs whose top-k include this investor
+    mean_fit: float
+    best_fit: float
+    startups: List[str]
+
+class GenerateBatchResponse(BaseModel):
+    results: List[BriefMatches]   # same order as the request's briefs
+    cohort: List[CohortInvestor]  # by reach, then mean fit
+    unmatched: List[str] = []     # startups with no candidate investors
+    export_jobs: Dict[str, str] = {}      # kind -> job id; poll /api/jobs/{id}
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[str] = None
+    download_url: Optional[str] = None
 
 # NEW: single-email generation
 class GenerateEmailRequest(BaseModel):
     brief: StartupBrief
     investor: Investor
     use_llm: bool = True
+    regenerate: bool = False      # bypass the draft cache
 
 class GenerateEmailResponse(BaseModel):
     email_draft: str
+
+# Batch email generation (streams one NDJSON line per draft)
+class GenerateEmailsRequest(BaseModel):
+    brief: StartupBrief
+    investors: List[Investor]
+    use_llm: bool = True
+    regenerate: bool = False
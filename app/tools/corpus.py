@@ -0,0 +1,147 @@
+import hashlib, json, os, threading, time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .index import InvestorIndex
+from ..config import CORPUS_CHECK_S
+from ..metrics import swallowed
+from ..records import InvestorRecord
+
+class CorpusManager:
+    """
+    The served investor corpus as immutable, versioned InvestorIndex snapshots.
+
+    current() stats the file at most every `check_s` seconds. When mtime/size moved and the
+    content hash changed, the new JSON is diffed against the live snapshot (records matched by
+    name and fund, reused when unchanged), a new index is derived from the old one, and it is
+    published with a single reference swap. Requests that already hold a snapshot finish on it.
+    After the first load, rebuilds run on a background thread; a file that fails to parse
+    (e.g. mid-write) leaves the current snapshot in place. Subscribers get each new version, in
+    publish order.
+    """
+    def __init__(self, path: str, make_record: Callable[[Dict], InvestorRecord], check_s: float = CORPUS_CHECK_S):
+        self.path = path
+        self.make_record = make_record
+        self.check_s = check_s
+        self._index: Optional[InvestorIndex] = None
+        self._pinned = False
+        self._stat: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()           # one rebuild at a time
+        self._check_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.last_reload: Dict = {}
+        self._listeners: List[Callable[[str], None]] = []
+
+    def subscribe(self, fn: Callable[[str], None]) -> None:
+        """Call fn(version) whenever a snapshot is published (and now, if one already is)."""
+        self._listeners.append(fn)
+        if self._index is not None:
+            fn(self._index.version)
+
+    def _announce(self, version: str) -> None:
+        for fn in self._listeners:
+            try:
+                fn(version)
+            except Exception as e:
+                swallowed("corpus_listener", e)
+
+    def current(self) -> InvestorIndex:
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._load()
+            return self._index
+        if not self._pinned and self.check_s >= 0 and time.monotonic() >= self._next_check:
+            self._check()
+        return index
+
+    def _check(self) -> None:
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.check_s
+            if self._changed() and not (self._worker and self._worker.is_alive()):
+                self._worker = threading.Thread(target=self.reload, name="corpus-reload", daemon=True)
+                self._worker.start()
+        finally:
+            self._check_lock.release()
+
+    def _changed(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) != self._stat
+
+    def reload(self) -> Dict:
+        """Re-read the file now (if it changed) and publish the new snapshot; returns last_reload."""
+        with self._lock:
+            if self._index is None:
+                self._load()
+            elif not self._pinned:
+                try:
+                    self._load()
+                except Exception as e:
+                    swallowed("corpus_reload", e)
+            return self.last_reload
+
+    def publish(self, index: Optional[InvestorIndex]) -> None:
+        """Serve a prebuilt index and stop watching the file (benchmarks); None goes back to the file."""
+        with self._lock:
+            self._index, self._pinned, self._stat = index, index is not None, None
+            if index is not None:
+                self._announce(index.version)
+
+    def _load(self) -> None:
+        t0 = time.perf_counter()
+        st = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        version = hashlib.sha1(raw).hexdigest()[:16]
+        old = self._index
+        if old is not None and version == old.version:
+            self._stat = (st.st_mtime_ns, st.st_size)
+            return
+        items = json.loads(raw)
+        if old is None:
+            index, diff = InvestorIndex([self.make_record(d) for d in items], version=version), {"added": len(items)}
+        else:
+            docs, reuse, diff = self._diff(old, items)
+            index = old.updated(docs, version, reuse)
+        self._index = index
+        self._stat = (st.st_mtime_ns, st.st_size)
+        self._announce(version)
+        self.reloads += 1
+        self.last_reload = {"version": version, "records": len(index), "kept": 0, "added": 0, "removed": 0, **diff,
+                            "seconds": round(time.perf_counter() - t0, 3), "at": time.time()}
+
+    def _diff(self, old: InvestorIndex, items: List[Dict]) -> Tuple[List[InvestorRecord], np.ndarray, Dict]:
+        """New records (unchanged ones are the old objects) and reuse[i] = old row of record i or -1."""
+        prev = old.docs
+        rows: Dict[Tuple[str, str], List[int]] = {}
+        for j, inv in enumerate(prev):
+            rows.setdefault((inv.name, inv.fund), []).append(j)
+        docs, reuse = [], np.full(len(items), -1, dtype=np.intp)
+        taken = bytearray(len(prev))
+        for i, d in enumerate(items):
+            # most edits leave records where they were: try the same row before looking it up
+            if i < len(prev) and not taken[i] and prev[i].same_as(d):
+                j = i
+            else:
+                j = next((j for j in rows.get((d.get("name", ""), d.get("fund", "")), ())
+                          if not taken[j] and prev[j].same_as(d)), None)
+            if j is None:
+                docs.append(self.make_record(d))
+            else:
+                taken[j] = 1
+                docs.append(prev[j])
+                reuse[i] = j
+        kept = int((reuse >= 0).sum())
+        return docs, reuse, {"kept": kept, "added": len(items) - kept, "removed": len(prev) - kept}
+
+    def stats(self) -> Dict:
+        index = self._index
+        return {"version": index.version if index else "", "records": len(index) if index else 0,
+                "reloads": self.reloads, "pinned": self._pinned, "last_reload": self.last_reload}
@@ -1,8 +1,44 @@
-import re
+import os, re, threading, time
 import requests
-import trafilatura
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
-from ..config import ALLOWED_DOMAINS
+from requests.adapters import HTTPAdapter
+from ..cache import DiskCache
+from ..metrics import FETCH, span
+from ..config import (ALLOWED_DOMAINS, SCRAPE_MAX_WORKERS, SCRAPE_PER_HOST, SCRAPE_DEADLINE_S,
+                      CACHE_DIR, FETCH_CACHE_TTL_S, FETCH_CACHE_MAX_MB)
+
+# Keep-alive connection pool shared by all scrape workers
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max(4, SCRAPE_MAX_WORKERS))
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+_cache: Optional[DiskCache] = None
+_cache_lock = threading.Lock()
+_stats: Counter = Counter()
+_stats_lock = threading.Lock()
+
+def _get_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache(os.path.join(CACHE_DIR, "fetch.sqlite"), max_bytes=FETCH_CACHE_MAX_MB * 1024 * 1024)
+    return _cache
+
+def _count(kind: str) -> None:
+    with _stats_lock:
+        _stats[kind] += 1
+
+def cache_stats() -> Dict[str, int]:
+    """hits (fresh, no network), revalidated (304), misses (downloaded + extracted), errors."""
+    with _stats_lock:
+        out = {k: _stats.get(k, 0) for k in ("hits", "revalidated", "misses", "errors")}
+    out.update(_get_cache().stats())
+    return out
 
 def allowed(url: str) -> bool:
     if not ALLOWED_DOMAINS:
@@ -10,13 +46,73 @@ def allowed(url: str) -> bool:
     host = urlparse(url).netloc
     return any(host.endswith(dom) for dom in ALLOWED_DOMAINS)
 
-def fetch_text(url: str) -> str:
+def fetch_text(url: str, timeout: float = 10) -> str:
+    with span(FETCH, outcome="errors") as labels:
+        text, labels["outcome"] = _fetch_text(url, timeout)
+    return text
+
+def _fetch_text(url: str, timeout: float) -> Tuple[str, str]:
+    """(text, outcome) where outcome is the cache_stats() counter it bumped, or "blocked"."""
     if not allowed(url):
-        return ""
+        return "", "blocked"
+    cache = _get_cache()
+    entry = cache.get(url)
+    if entry and time.time() - entry["stored_at"] <= FETCH_CACHE_TTL_S:
+        _count("hits")
+        return entry["value"], "hits"
+
+    headers = {}
+    if entry:
+        if entry["meta"].get("etag"): headers["If-None-Match"] = entry["meta"]["etag"]
+        if entry["meta"].get("last_modified"): headers["If-Modified-Since"] = entry["meta"]["last_modified"]
     try:
-        r = requests.get(url, timeout=10)
+        r = _session.get(url, timeout=timeout, headers=headers)
+        if entry and r.status_code == 304:
+            cache.touch(url)
+            _count("revalidated")
+            return entry["value"], "revalidated"
         r.raise_for_status()
+        import trafilatura  # heavy (lxml, courlan…); only scrape runs pay for it
         downloaded = trafilatura.extract(r.text, include_comments=False, include_tables=False) or ""
-        return re.sub(r"\s+", " ", downloaded).strip()
+        text = re.sub(r"\s+", " ", downloaded).strip()
+        cache.set(url, text, {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")})
+        _count("misses")
+        return text, "misses"
     except Exception:
-        return ""
+        _count("errors")
+        # a stale copy beats nothing when the origin is down
+        return (entry["value"] if entry else ""), "errors"
+
+def iter_fetch(urls: List[str], deadline_s: float = SCRAPE_DEADLINE_S,
+               max_workers: int = SCRAPE_MAX_WORKERS, per_host: int = SCRAPE_PER_HOST) -> Iterator[Tuple[str, str]]:
+    """
+    Fetch urls concurrently under a global and a per-host cap, yielding (url, text) as pages land.
+    Stops at the deadline; stragglers are abandoned (their own timeout bounds them).
+    """
+    urls = list(dict.fromkeys(u for u in urls if u and allowed(u)))
+    if not urls:
+        return
+    stop = time.monotonic() + deadline_s
+    host_slots = {urlparse(u).netloc: threading.BoundedSemaphore(max(1, per_host)) for u in urls}
+
+    def _one(u: str) -> str:
+        with host_slots[urlparse(u).netloc]:
+            remaining = stop - time.monotonic()
+            if remaining <= 0:
+                return ""
+            return fetch_text(u, timeout=min(10, remaining))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="scrape")
+    futures = {pool.submit(_one, u): u for u in urls}
+    try:
+        for f in as_completed(futures, timeout=deadline_s):
+            yield futures[f], f.result()
+    except FuturesTimeout:
+        pass
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def fetch_many(urls: List[str], deadline_s: float = SCRAPE_DEADLINE_S,
+               max_workers: int = SCRAPE_MAX_WORKERS, per_host: int = SCRAPE_PER_HOST) -> Dict[str, str]:
+    """{url: text} for whatever finished before the deadline."""
+    return {u: txt for u, txt in iter_fetch(urls, deadline_s, max_workers, per_host) if txt}
@@ -0,0 +1,132 @@
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+import numpy as np
+from .resolve import EntityIndex
+from ..records import InvestorRecord, as_record
+
+def _terms(values) -> set:
+    return {v.lower() for v in (values or []) if v}
+
+_NONE = np.empty(0, dtype=np.int32)
+
+def _merge(postings: Dict[str, np.ndarray], remap: np.ndarray, added: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    """Old postings under new row ids (remap[old] = new or -1), plus the rows tokenized since."""
+    out = {}
+    for term in postings.keys() | added.keys():
+        ids = remap[postings.get(term, _NONE)]
+        ids = ids[ids >= 0]
+        if term in added:
+            ids = np.concatenate([ids, np.asarray(added[term], dtype=np.int32)])
+        if ids.size:
+            out[term] = np.sort(ids)
+    return out
+
+class InvestorIndex:
+    """
+    Postings lists over the seed corpus, keyed by lowercased sector and stage.
+    Built once; retrieval touches only the postings of the requested terms.
+    """
+    def __init__(self, investors: List, version: str = ""):
+        self._start([as_record(inv) for inv in investors], version)
+        self._postings(range(len(self.docs)))
+
+    def _start(self, docs: List[InvestorRecord], version: str) -> None:
+        self.docs: List[InvestorRecord] = docs
+        self.version = version
+        self._entities: Optional[EntityIndex] = None
+        self._entities_lock = threading.Lock()
+        self._matrix = None
+        self._matrix_lock = threading.Lock()
+        self._row_of = None     # (sorted id() of docs, their rows), for rows()
+
+    def _postings(self, rows, previous: Optional["InvestorIndex"] = None, remap: Optional[np.ndarray] = None) -> None:
+        by_sector: Dict[str, List[int]] = defaultdict(list)
+        by_stage: Dict[str, List[int]] = defaultdict(list)
+        for i in rows:
+            inv = self.docs[i]
+            for s in _terms(inv.sectors): by_sector[s].append(i)
+            for s in _terms(inv.stages):  by_stage[s].append(i)
+        # postings as id arrays: retrieval is a scatter-add over the requested terms
+        self.by_sector = _merge(previous.by_sector, remap, by_sector) if previous else \
+            {k: np.asarray(v, dtype=np.int32) for k, v in by_sector.items()}
+        self.by_stage = _merge(previous.by_stage, remap, by_stage) if previous else \
+            {k: np.asarray(v, dtype=np.int32) for k, v in by_stage.items()}
+
+    def updated(self, investors: List[InvestorRecord], version: str, reuse: np.ndarray) -> "InvestorIndex":
+        """
+        Index over a new corpus version; reuse[i] is investors[i]'s row in this index (the same
+        record object) or -1. Only the new rows are tokenized; postings are remapped with one array
+        op per term, and the matrix and entity blocks, if built, carry their unchanged rows over.
+        This index is not modified, so requests holding it finish on the old version.
+        """
+        new = InvestorIndex.__new__(InvestorIndex)
+        new._start(list(investors), version)
+        remap = np.full(len(self.docs), -1, dtype=np.int32)
+        kept = np.flatnonzero(reuse >= 0)
+        remap[reuse[kept]] = kept
+        new._postings(np.flatnonzero(reuse < 0).tolist(), self, remap)
+        if self._matrix is not None:
+            new._matrix = self._matrix.updated(new.docs, reuse)
+        if self._entities is not None:
+            e = self._entities
+            new._entities = EntityIndex(new.docs, e.threshold, e.bands, e.rows, e.max_block, previous=e)
+        return new
+
+    def __len__(self):
+        return len(self.docs)
+
+    @property
+    def entities(self) -> EntityIndex:
+        """Entity-resolution blocks over the same corpus, built on first use."""
+        if self._entities is None:
+            with self._entities_lock:
+                if self._entities is None:
+                    self._entities = EntityIndex(self.docs)
+        return self._entities
+
+    @property
+    def matrix(self):
+        """InvestorMatrix over the whole corpus (rows are self.docs), built on first use; every ranking scores against it."""
+        if self._matrix is None:
+            with self._matrix_lock:
+                if self._matrix is None:
+                    from ..agents.matchmaker import InvestorMatrix
+                    self._matrix = InvestorMatrix(self.docs)
+        return self._matrix
+
+    def rows(self, records: List[InvestorRecord]) -> np.ndarray:
+        """Each record's row in self.docs (and the matrix) if it is that very object, else -1."""
+        if self._row_of is None:
+            with self._matrix_lock:
+                if self._row_of is None:
+                    addr = np.fromiter(map(id, self.docs), dtype=np.int64, count=len(self.docs))
+                    order = np.argsort(addr)
+                    self._row_of = (addr[order], order)
+        addr, order = self._row_of
+        want = np.fromiter(map(id, records), dtype=np.int64, count=len(records))
+        if not addr.size:
+            return np.full(len(records), -1, dtype=np.intp)
+        pos = np.minimum(np.searchsorted(addr, want), addr.size - 1)
+        return np.where(addr[pos] == want, order[pos], -1).astype(np.intp)
+
+    def candidate_ids(self, sector_terms: List[str], stage: str = "") -> np.ndarray:
+        """
+        Same set and order as the old linear scan: any sector overlap or exact stage hit,
+        sorted by (stage_match, sector_overlap) desc with ties kept in corpus order.
+        """
+        n = len(self.docs)
+        overlap = np.zeros(n, dtype=np.int32)
+        for s in _terms(sector_terms):
+            overlap[self.by_sector.get(s, _NONE)] += 1   # ids are distinct within a posting list
+        stage_hit = np.zeros(n, dtype=bool)
+        if stage:
+            stage_hit[self.by_stage.get(stage, _NONE)] = True
+
+        ids = np.flatnonzero((overlap > 0) | stage_hit)
+        return ids[np.lexsort((-overlap[ids], ~stage_hit[ids]))]   # lexsort is stable: ties stay in id order
+
+    def candidates(self, sector_terms: List[str], stage: str = "") -> List[InvestorRecord]:
+        """candidate_ids as the index's own records, not copies; they are immutable."""
+        docs = self.docs
+        return [docs[i] for i in self.candidate_ids(sector_terms, stage).tolist()]
@@ -1,9 +1,85 @@
-import google.generativeai as genai
-from ..config import GOOGLE_API_KEY
+import hashlib, os, threading, time
+from functools import lru_cache
+from typing import Iterator, Optional, Tuple
+from ..config import (PROJECT_ROOT, GOOGLE_API_KEY, GEMINI_MODEL, LLM_PROVIDER, LLM_RPM, LLM_TPM, LLM_MAX_RETRIES,
+                      LLM_BACKOFF_BASE_S, LLM_BACKOFF_MAX_S, LLM_WAIT_S, PROMPT_TRACTION_TOKENS)
+from .ratelimit import TokenBucketLimiter, Budget, backoff_delay
+from ..plugins import llm_providers
+from ..metrics import LLM, FALLBACK_EMAILS, span
+
+PROMPT_PATH = os.path.join(PROJECT_ROOT, "app", "prompts", "writer.md")
+BRIEF_FORMAT = "2"      # bump when compact_brief's layout changes
+
+# Shared by every Gemini call in the process
+limiter = TokenBucketLimiter(LLM_RPM, LLM_TPM)
+_EXPECTED_OUTPUT_TOKENS = 220
+
+_model = None
+_model_lock = threading.Lock()
 
 def gemini_available() -> bool:
     return bool(GOOGLE_API_KEY)
 
+def new_gemini_model():
+    import google.generativeai as genai  # ~0.8s of imports; deferred until the first draft
+    genai.configure(api_key=GOOGLE_API_KEY)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+def get_model():
+    """Process-wide model from the LLM_PROVIDER plugin, built once; safe to call from many threads."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = llm_providers.get(LLM_PROVIDER)()
+    return _model
+
+def warm_model() -> None:
+    """Builds the model off the startup path so workers take traffic while the SDK imports."""
+    if gemini_available():
+        threading.Thread(target=lambda: _quiet(get_model), name="llm-warm", daemon=True).start()
+
+def _quiet(fn) -> None:
+    try:
+        fn()
+    except Exception:
+        pass
+
+@lru_cache(maxsize=1)
+def prompt_template() -> str:
+    with open(PROMPT_PATH, "r") as f:
+        return f.read().strip()
+
+@lru_cache(maxsize=1)
+def prompt_version() -> str:
+    """Part of every draft-cache key: editing prompts/writer.md or the brief format rolls cached drafts over."""
+    spec = f"{prompt_template()}\n{BRIEF_FORMAT}:{PROMPT_TRACTION_TOKENS}"
+    return hashlib.sha1(spec.encode()).hexdigest()[:12]
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    # ~4 chars per token; cut on a word boundary
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+def compact_brief(brief: dict, traction_tokens: int = PROMPT_TRACTION_TOKENS) -> str:
+    """Only the fields the email uses, one per line; traction trimmed to a token budget."""
+    lines = [f"{brief.get('name','')} — {brief.get('one_liner','')}".strip(" —")]
+    if brief.get("sector"): lines.append(f"Sector: {', '.join(brief['sector'])}")
+    if brief.get("stage"): lines.append(f"Stage: {brief['stage']}")
+    if brief.get("geo"): lines.append(f"Geo: {brief['geo']}")
+    if brief.get("round_size_usd"): lines.append(f"Raising: ${brief['round_size_usd']:,.0f}")
+    if brief.get("traction"):
+        lines.append(f"Traction: {_truncate_tokens('; '.join(brief['traction']), traction_tokens)}")
+    if brief.get("ask"): lines.append(f"Ask: {brief['ask']}")
+    return "\n".join(lines)
+
+def build_prompt(investor_name: str, fund: str, rationale: str, brief: dict) -> str:
+    return prompt_template().format(
+        investor_name=investor_name, fund=fund, rationale=rationale.strip(), brief=compact_brief(brief)
+    )
+
 def _fallback_email(investor_name, fund, rationale, brief):
     traction = "; ".join(brief.get("traction", [])[:2]) or "early traction with design partners"
     return (
@@ -17,21 +93,102 @@ def _fallback_email(investor_name, fund, rationale, brief):
         f"— {brief['name']} team"
     )
 
-def draft_email_gemini(investor_name: str, fund: str, rationale: str, brief: dict, allow_llm: bool = True) -> str:
-    if not (allow_llm and gemini_available()):
-        return _fallback_email(investor_name, fund, rationale, brief)
+def _fallback(reason: str, investor_name, fund, rationale, brief) -> str:
+    FALLBACK_EMAILS.labels(reason=reason).inc()
+    return _fallback_email(investor_name, fund, rationale, brief)
+
+def _is_rate_limited(e: Exception) -> bool:
+    return (
+        getattr(e, "code", None) == 429
+        or e.__class__.__name__ in {"ResourceExhausted", "TooManyRequests"}
+        or "429" in str(e)
+    )
+
+def _estimate_tokens(prompt: str) -> int:
+    return len(prompt) // 4 + _EXPECTED_OUTPUT_TOKENS
+
+def _generate(model, prompt: str) -> str:
+    """One generate_content call under the shared limiter, retrying 429s with jittered backoff."""
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        if not limiter.acquire(_estimate_tokens(prompt), timeout=LLM_WAIT_S):
+            raise TimeoutError("LLM rate limiter wait exceeded")
+        with span(LLM, "llm", mode="generate", outcome="error") as labels:
+            try:
+                text = (model.generate_content(prompt).text or "").strip()
+                labels["outcome"] = "ok"
+                return text
+            except Exception as e:
+                limited = _is_rate_limited(e)
+                labels["outcome"] = "rate_limited" if limited else "error"
+                if not limited or attempt == LLM_MAX_RETRIES:
+                    raise
+        time.sleep(backoff_delay(attempt, LLM_BACKOFF_BASE_S, LLM_BACKOFF_MAX_S))
+    return ""
+
+def _generate_stream(model, prompt: str) -> Iterator[str]:
+    """Streaming generate_content under the shared limiter; 429s are retried until the first chunk lands."""
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        if not limiter.acquire(_estimate_tokens(prompt), timeout=LLM_WAIT_S):
+            raise TimeoutError("LLM rate limiter wait exceeded")
+        with span(LLM, "llm", mode="stream", outcome="error") as labels:
+            try:
+                chunks = iter(model.generate_content(prompt, stream=True))
+                first = next(chunks, None)
+            except Exception as e:
+                limited = _is_rate_limited(e)
+                labels["outcome"] = "rate_limited" if limited else "error"
+                if not limited or attempt == LLM_MAX_RETRIES:
+                    raise
+                chunks = None
+            if chunks is not None:
+                if first is not None:
+                    yield first.text or ""
+                for chunk in chunks:
+                    yield chunk.text or ""
+                labels["outcome"] = "ok"
+                return
+        time.sleep(backoff_delay(attempt, LLM_BACKOFF_BASE_S, LLM_BACKOFF_MAX_S))
+
+def stream_email(investor_name: str, fund: str, rationale: str, brief: dict, allow_llm: bool = True,
+                 model=None) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (text_piece, source) as Gemini streams the draft. Without an LLM, or if it fails before
+    the first piece, the fallback template is yielded at once with source "fallback". If the stream
+    breaks after pieces went out, the whole template follows with source "truncated": it replaces
+    the partial draft rather than extending it.
+    """
+    sent, reason = False, "disabled"
+    if allow_llm and (model is not None or gemini_available()):
+        reason = "error"
+        try:
+            for piece in _generate_stream(model or get_model(), build_prompt(investor_name, fund, rationale, brief)):
+                if piece:
+                    sent = True
+                    yield piece, "llm"
+        except Exception:
+            if sent:
+                yield _fallback("truncated", investor_name, fund, rationale, brief), "truncated"
+                return
+    if not sent:
+        yield _fallback(reason, investor_name, fund, rationale, brief), "fallback"
+
+def draft_email(investor_name: str, fund: str, rationale: str, brief: dict, allow_llm: bool = True,
+                budget: Optional[Budget] = None, model=None) -> Tuple[str, str]:
+    """
+    Returns (email, source) where source is "llm", "fallback" or "budget" (LLM skipped because the
+    run's budget is spent). `model` is anything with generate_content(prompt) -> obj with .text.
+    """
+    if not (allow_llm and (model is not None or gemini_available())):
+        return _fallback("disabled", investor_name, fund, rationale, brief), "fallback"
+    if budget is not None and not budget.take():
+        return _fallback("budget", investor_name, fund, rationale, brief), "budget"
     try:
-        genai.configure(api_key=GOOGLE_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = f"""
-            Write a concise 100–120 word intro email to {investor_name} at {fund}.
-            Startup brief: {brief}
-            Reason to contact (rationale): {rationale}
-            Tone: warm, direct, specific. Include one traction point if available. Ask for a 15-minute intro next week.
-            Return plain text only.
-        """
-        resp = model.generate_content(prompt)
-        text = (resp.text or "").strip()
-        return text or _fallback_email(investor_name, fund, rationale, brief)
+        text = _generate(model or get_model(), build_prompt(investor_name, fund, rationale, brief))
+        if text:
+            return text, "llm"
     except Exception:
-        return _fallback_email(investor_name, fund, rationale, brief)
+        pass
+    return _fallback("error", investor_name, fund, rationale, brief), "fallback"
+
+def draft_email_gemini(investor_name: str, fund: str, rationale: str, brief: dict, allow_llm: bool = True) -> str:
+    return draft_email(investor_name, fund, rationale, brief, allow_llm=allow_llm)[0]
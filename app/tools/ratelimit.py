@@ -0,0 +1,54 @@
+import random, threading, time
+from typing import Optional
+
+class TokenBucketLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets refilled continuously.
+    acquire() blocks until both have capacity (or the timeout passes). `burst` caps how many
+    requests can go out back-to-back (default: a full minute's worth).
+    """
+    def __init__(self, rpm: float, tpm: float, burst: Optional[float] = None):
+        self.rpm, self.tpm = float(rpm), float(tpm)
+        self.burst = float(burst) if burst else self.rpm
+        self._req, self._tok = self.burst, self.tpm
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        dt = now - self._last
+        self._last = now
+        self._req = min(self.burst, self._req + dt * self.rpm / 60.0)
+        self._tok = min(self.tpm, self._tok + dt * self.tpm / 60.0)
+
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> bool:
+        tokens = min(float(tokens), self.tpm)   # a single oversized call must still fit eventually
+        stop = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._req >= 1 and self._tok >= tokens:
+                    self._req -= 1
+                    self._tok -= tokens
+                    return True
+                wait = max((1 - self._req) * 60.0 / self.rpm, (tokens - self._tok) * 60.0 / self.tpm, 0.005)
+            if stop is not None and now + wait > stop:
+                return False
+            time.sleep(wait)
+
+class Budget:
+    """Thread-safe countdown of LLM calls allowed in one run."""
+    def __init__(self, n: int):
+        self.remaining = n
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+def backoff_delay(attempt: int, base_s: float, cap_s: float) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap_s, base_s * (2 ** attempt)))
@@ -0,0 +1,324 @@
+import re, unicodedata, zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+import numpy as np
+from ..records import InvestorRecord
+
+# Dropped when normalizing fund names ("Sequoia Capital, LLC" -> "sequoia"), unless nothing else is left
+_LEGAL = {"llc", "lp", "llp", "inc", "ltd", "limited", "gmbh", "co", "corp", "corporation", "plc", "sa", "ag", "bv"}
+_GENERIC = {"capital", "ventures", "venture", "partners", "partner", "vc", "vcs", "fund", "funds", "management",
+            "investments", "investment", "holdings", "group", "the", "and"}
+# Hosts that say nothing about which fund a link belongs to
+_SHARED_HOSTS = {"linkedin", "crunchbase", "twitter", "x", "medium", "techcrunch", "google", "wikipedia", "pitchbook",
+                 "youtube", "substack", "github", "angel", "forbes", "bloomberg", "businessinsider", "cbinsights"}
+_TWO_PART_TLDS = {"co.uk", "com.au", "co.in", "co.jp", "com.br", "co.il", "com.sg"}
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+_LIST_FIELDS = ("stages", "sectors", "notable_investments", "recent_news", "urls", "warm_paths")
+_EVIDENCE_FIELDS = ("notable_investments", "recent_news", "urls", "warm_paths")
+
+def _words(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    text = text.replace(".", "").replace("&", " and ")  # "L.L.C." -> "llc"
+    return _NON_WORD.sub(" ", text).split()
+
+def normalize_name(text: str) -> str:
+    return " ".join(_words(text))
+
+def normalize_fund(text: str) -> str:
+    """Lowercase, ASCII, no punctuation, legal and generic VC suffixes dropped."""
+    words = _words(text)
+    kept = [w for w in words if w not in _LEGAL and w not in _GENERIC]
+    return " ".join(kept or [w for w in words if w not in _LEGAL] or words)
+
+def url_domain(url: str) -> str:
+    """Registrable label of a URL: https://www.sequoiacap.com/x -> "sequoiacap"."""
+    host = urlparse(url if "//" in url else f"//{url}").netloc.lower().split(":")[0]
+    parts = [p for p in host.split(".") if p and p != "www"]
+    if len(parts) >= 3 and ".".join(parts[-2:]) in _TWO_PART_TLDS:
+        return parts[-3]
+    return parts[-2] if len(parts) >= 2 else (parts[0] if parts else "")
+
+def _own_domain(urls: Iterable[str]) -> str:
+    for u in urls or ():
+        d = url_domain(u or "")
+        if d and d not in _SHARED_HOSTS:
+            return d
+    return ""
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+# ---------- MinHash LSH ----------
+_PRIME = 4294967311  # > 2**32, so (a*h + b) % p fits uint64 for 32-bit h and 31-bit a, b
+
+def minhash(shingles: List[Set[str]], num_perm: int = 16, seed: int = 1) -> np.ndarray:
+    """(n, num_perm) MinHash signatures; every set must be non-empty."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+    sizes = np.fromiter((len(s) for s in shingles), dtype=np.int64, count=len(shingles))
+    hashes = np.fromiter((zlib.crc32(t.encode()) for s in shingles for t in s), dtype=np.uint64, count=int(sizes.sum()))
+    vals = (hashes[:, None] * a + b) % np.uint64(_PRIME)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    return np.minimum.reduceat(vals, starts, axis=0)
+
+def lsh_buckets(sig: np.ndarray, bands: int) -> Iterable[np.ndarray]:
+    """Groups of row ids whose signatures agree on at least one band."""
+    rows = sig.shape[1] // bands
+    for band in range(bands):
+        chunk = np.ascontiguousarray(sig[:, band * rows:(band + 1) * rows]).view(f"V{rows * 8}").ravel()
+        _, inverse, counts = np.unique(chunk, return_inverse=True, return_counts=True)
+        order = np.argsort(inverse, kind="stable")
+        for group in np.split(order, np.cumsum(counts)[:-1]):
+            if len(group) > 1:
+                yield group
+
+# ---------- Resolution ----------
+class _Sets:
+    """Union-find over ids; the smallest id is the root so clusters keep input order."""
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> None:
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+def _record_keys(inv: InvestorRecord) -> Tuple[str, str, str]:
+    """(normalized fund, normalized person or "" for a fund-level record, own URL domain)."""
+    fund = normalize_fund(inv.fund or inv.name or "")
+    person = normalize_fund(inv.name or "")
+    # fund-level record: live hits name the fund itself ("Sequoia Capital" / "Sequoia Capital")
+    person = "" if not person or person == fund else normalize_name(inv.name)
+    return fund, person, _own_domain(inv.urls)
+
+def _fund_pairs(grams: List[Set[str]], domains: Dict[int, Set[str]], bands: int, rows: int,
+                max_block: int) -> Set[Tuple[int, int]]:
+    """Fund ids sharing an LSH band of their trigram MinHash or an own domain; oversized blocks are skipped."""
+    sig = minhash([g or {"?"} for g in grams], num_perm=bands * rows)
+    by_domain: Dict[str, List[int]] = defaultdict(list)
+    for f, ds in domains.items():
+        for d in ds:
+            by_domain[d].append(f)
+    pairs: Set[Tuple[int, int]] = set()
+    for block in [g.tolist() for g in lsh_buckets(sig, bands)] + list(by_domain.values()):
+        if 1 < len(block) <= max_block:
+            block = sorted(block)
+            pairs.update((i, j) for x, i in enumerate(block) for j in block[x + 1:])
+    return pairs
+
+def _people(persons: List[str], threshold: float, max_block: int) -> List[int]:
+    """Cluster id per distinct person name within one fund, by trigram similarity to earlier names."""
+    reps: List[Set[str]] = []
+    out = []
+    for p in persons:
+        grams = trigrams(p)
+        match = next((c for c, g in enumerate(reps) if jaccard(g, grams) >= threshold), None) \
+            if len(reps) <= max_block else None
+        if match is None:
+            match = len(reps)
+            reps.append(grams)
+        out.append(match)
+    return out
+
+def cluster(records: List[InvestorRecord], threshold: float = 0.6, bands: int = 10, rows: int = 3,
+            max_block: int = 200) -> List[List[int]]:
+    """
+    Groups of indices that refer to the same investor, in first-seen order.
+    Funds are resolved first over distinct normalized names (LSH blocking, trigram Jaccard, a
+    shared own domain lowers the bar); people are then matched within each fund. Two people at one
+    fund stay apart, and fund-level records join the fund's first person.
+    """
+    if not records:
+        return []
+    keys = [_record_keys(r) for r in records]
+    fund_ids: Dict[str, int] = {}
+    fund_of = [fund_ids.setdefault(fund, len(fund_ids)) for fund, _, _ in keys]
+    grams = [trigrams(f) for f in fund_ids]
+    domains: Dict[int, Set[str]] = defaultdict(set)
+    for (_, _, domain), f in zip(keys, fund_of):
+        if domain:
+            domains[f].add(domain)
+
+    funds = _Sets(len(grams))
+    for i, j in _fund_pairs(grams, domains, bands, rows, max_block):
+        shared = domains.get(i, set()) & domains.get(j, set())
+        if jaccard(grams[i], grams[j]) >= (threshold / 2 if shared else threshold):
+            funds.union(i, j)
+
+    by_fund: Dict[int, List[int]] = {}
+    for i, f in enumerate(fund_of):
+        by_fund.setdefault(funds.find(f), []).append(i)
+    groups: List[List[int]] = []
+    for members in by_fund.values():
+        people = [i for i in members if keys[i][1]]
+        fund_level = [i for i in members if not keys[i][1]]
+        names = list(dict.fromkeys(keys[i][1] for i in people))
+        ids = dict(zip(names, _people(names, threshold, max_block)))
+        split: Dict[int, List[int]] = {}
+        for i in people:
+            split.setdefault(ids[keys[i][1]], []).append(i)
+        parts = list(split.values()) or [[]]
+        parts[0] = sorted(parts[0] + fund_level)
+        groups += parts
+    return sorted(groups, key=lambda g: g[0])
+
+def _rank(inv: InvestorRecord) -> tuple:
+    # person-level first, then the best-documented
+    return (bool(_record_keys(inv)[1]), len(inv.urls))
+
+def merge_records(group: List[InvestorRecord], primary: Optional[InvestorRecord] = None) -> InvestorRecord:
+    """
+    One record for a cluster. Identity, taxonomy and check size come from the primary (the seed
+    record, else the best person-level one), since live hits only carry the query's guess for
+    those; evidence lists are unioned in cluster order.
+    """
+    if len(group) == 1:
+        return group[0]
+    primary = primary or max(group, key=_rank)
+    changes = {}
+    for f in _LIST_FIELDS:
+        if f in _EVIDENCE_FIELDS or not primary[f]:
+            changes[f] = tuple(dict.fromkeys(v for inv in [primary] + group for v in inv[f] if v))
+    for f in ("check_min", "check_max"):
+        if primary[f] is None:
+            changes[f] = next((inv[f] for inv in group if inv[f] is not None), None)
+    if not primary.geo or primary.geo == "global":
+        changes["geo"] = next((inv.geo for inv in group if inv.geo and inv.geo != "global"), primary.geo)
+    return primary.replace(**changes)
+
+def resolve(records: List[InvestorRecord], threshold: float = 0.6) -> List[InvestorRecord]:
+    """Near-duplicate investors merged into one record each, ordered by first appearance."""
+    return [merge_records([records[i] for i in g]) for g in cluster(records, threshold)]
+
+# ---------- Live hits against the seed ----------
+class EntityIndex:
+    """
+    Blocking structures over a fixed, already-deduplicated corpus (the seed), built once, so a
+    request's live hits resolve against it without comparing to every record.
+    """
+    def __init__(self, records: List[InvestorRecord], threshold: float = 0.6, bands: int = 10, rows: int = 3,
+                 max_block: int = 200, previous: Optional["EntityIndex"] = None):
+        """
+        `previous` (an index over an earlier version of the corpus) lends its keys for records it
+        already holds and its MinHash signatures for funds it already saw; only the rest are computed.
+        """
+        self.records = records
+        self.threshold, self.bands, self.rows, self.max_block = threshold, bands, rows, max_block
+        if previous is not None and (previous.bands, previous.rows) != (bands, rows):
+            previous = None
+        seen = {id(r): k for r, k in zip(previous.records, previous.keys)} if previous else {}
+        self.keys = [seen.get(id(r)) or _record_keys(r) for r in records]
+        self.by_fund: Dict[str, List[int]] = {}
+        for i, (fund, _, _) in enumerate(self.keys):
+            self.by_fund.setdefault(fund, []).append(i)
+        self.funds = list(self.by_fund)
+        self.fund_ids = {f: i for i, f in enumerate(self.funds)}
+        old = [previous.fund_ids.get(f, -1) for f in self.funds] if previous else [-1] * len(self.funds)
+        self.grams = [previous.grams[o] if o >= 0 else trigrams(f) for f, o in zip(self.funds, old)]
+        self.domains: Dict[int, Set[str]] = defaultdict(set)
+        self.by_domain: Dict[str, Set[int]] = defaultdict(set)
+        for fund, _, domain in self.keys:
+            if domain:
+                self.domains[self.fund_ids[fund]].add(domain)
+                self.by_domain[domain].add(self.fund_ids[fund])
+        self.sig = np.empty((len(self.funds), bands * rows), dtype=np.uint64)
+        old = np.asarray(old, dtype=np.intp)
+        kept, fresh = np.flatnonzero(old >= 0), np.flatnonzero(old < 0)
+        if kept.size:
+            self.sig[kept] = previous.sig[old[kept]]
+        if fresh.size:
+            self.sig[fresh] = self._signatures([self.grams[f] for f in fresh.tolist()])
+        self.buckets: Dict[bytes, List[int]] = defaultdict(list)
+        if kept.size:
+            # carry the previous blocks over under the new fund ids; only fresh funds get new keys
+            remap = np.full(len(previous.funds), -1, dtype=np.intp)
+            remap[old[kept]] = kept
+            remap = remap.tolist()
+            for k, block in previous.buckets.items():
+                moved = [remap[f] for f in block if remap[f] >= 0]
+                if moved:
+                    self.buckets[k] = moved
+        for f, band_keys in zip(fresh.tolist(), self._keys_of(self.sig[fresh])):
+            for k in band_keys:
+                self.buckets[k].append(f)
+
+    def _signatures(self, grams: List[Set[str]]) -> np.ndarray:
+        return minhash([g or {"?"} for g in grams], num_perm=self.bands * self.rows)
+
+    def _keys_of(self, sig: np.ndarray) -> List[List[bytes]]:
+        r = self.rows
+        return [[bytes([b]) + row[b * r:(b + 1) * r].tobytes() for b in range(self.bands)] for row in sig]
+
+    def _band_keys(self, grams: List[Set[str]]) -> List[List[bytes]]:
+        return self._keys_of(self._signatures(grams)) if grams else []
+
+    def _fund(self, fund: str, domain: str) -> Optional[int]:
+        if fund in self.fund_ids:
+            return self.fund_ids[fund]
+        grams = trigrams(fund)
+        cands = set(self.by_domain.get(domain, ())) if domain else set()
+        for k in self._band_keys([grams])[0]:
+            block = self.buckets.get(k, ())
+            if len(block) <= self.max_block:
+                cands.update(block)
+        best, best_sim = None, 0.0
+        for f in sorted(cands):
+            sim = jaccard(grams, self.grams[f])
+            if sim >= (self.threshold / 2 if domain in self.domains.get(f, ()) else self.threshold) and sim > best_sim:
+                best, best_sim = f, sim
+        return best
+
+    def match(self, inv: InvestorRecord) -> Optional[int]:
+        """Position of the corpus record `inv` is the same investor as, or None."""
+        fund, person, domain = _record_keys(inv)
+        f = self._fund(fund, domain)
+        if f is None:
+            return None
+        members = self.by_fund[self.funds[f]]
+        if not person:
+            # fund-level hit: the fund's first person, as in cluster()
+            return next((i for i in members if self.keys[i][1]), members[0])
+        grams = trigrams(person)
+        sims = [(jaccard(grams, trigrams(self.keys[i][1])), -i) for i in members if self.keys[i][1]]
+        best = max(sims, default=(0.0, 0))
+        return -best[1] if best[0] >= self.threshold else None
+
+def resolve_live(live: List[InvestorRecord], seed: List[InvestorRecord], index: EntityIndex) -> List[InvestorRecord]:
+    """
+    Live hits deduped among themselves and folded into the seed record they refer to (pulled in
+    even if it was not a candidate), followed by the untouched seed candidates in order. The seed
+    is curated, so its records are never merged with each other.
+    """
+    pos = {inv.unique_key: p for p, inv in enumerate(seed)}
+    out: List[InvestorRecord] = []
+    merged: Dict[str, int] = {}     # seed unique_key -> position in out
+    for inv in resolve(live, index.threshold):
+        i = index.match(inv)
+        if i is None:
+            out.append(inv)
+            continue
+        base = index.records[i]
+        key = base.unique_key
+        if key in merged:
+            out[merged[key]] = merge_records([out[merged[key]], inv], primary=out[merged[key]])
+            continue
+        base = seed[pos[key]] if key in pos else base
+        merged[key] = len(out)
+        out.append(merge_records([base, inv], primary=base))
+    return out + [inv for inv in seed if inv.unique_key not in merged]
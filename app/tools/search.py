@@ -1,6 +1,15 @@
-import json, os, hashlib, re
-from typing import List, Dict
-from ..config import PROJECT_ROOT, SERPAPI_API_KEY
+import json, os, hashlib, re, threading, time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Sequence, Tuple
+from ..cache import DiskCache
+from ..config import (PROJECT_ROOT, SERPAPI_API_KEY, CACHE_DIR, SERP_CACHE_TTL_S, RETRIEVAL, SQL_CANDIDATES,
+                      CORPUS_CHECK_S)
+from .corpus import CorpusManager
+from .index import InvestorIndex
+from .resolve import EntityIndex, resolve_live
+from ..records import InvestorRecord
+from ..metrics import SERPAPI, span, swallowed
 from urllib.parse import urlparse
 
 SEED_PATH = os.path.join(PROJECT_ROOT, "app", "data", "seed_investors.json")
@@ -9,12 +18,84 @@ def _unique_key(inv: Dict) -> str:
     raw = f"{inv.get('name','')}|{inv.get('fund','')}".strip().lower()
     return hashlib.sha1(raw.encode()).hexdigest()
 
-def load_seed_investors() -> List[Dict]:
-    with open(SEED_PATH, "r") as f:
-        data = json.load(f)
-    for inv in data:
-        inv["unique_key"] = _unique_key(inv)
-    return data
+def _seed_record(inv: Dict) -> InvestorRecord:
+    return InvestorRecord.from_dict({**inv, "unique_key": _unique_key(inv)}, source="seed")
+
+def load_seed_investors() -> List[InvestorRecord]:
+    with open(SEED_PATH, "rb") as f:
+        return [_seed_record(inv) for inv in json.load(f)]
+
+# Versioned snapshots of the seed file, reloaded when it changes (see corpus.CorpusManager)
+seed_corpus = CorpusManager(SEED_PATH, _seed_record)
+
+def get_seed_index() -> InvestorIndex:
+    """
+    Current seed corpus snapshot (parsed on first use, warmed at API startup). Hold on to the
+    returned index for the whole request: a reload publishes a new one without touching it.
+    """
+    return seed_corpus.current()
+
+# ---------- Postgres corpus (RETRIEVAL=postgres) ----------
+_pg_version: Tuple[str, float] = ("", 0.0)     # (version, monotonic time it was read)
+_pg_version_lock = threading.Lock()
+
+def _pg_version_stale() -> bool:
+    version, at = _pg_version
+    return not version or (CORPUS_CHECK_S >= 0 and time.monotonic() - at >= CORPUS_CHECK_S)
+
+_pg_listeners: List[Callable[[str], None]] = []
+
+def _postgres_version(refresh: bool = False) -> str:
+    """investors table version, re-read at most every CORPUS_CHECK_S seconds (or now, with refresh)."""
+    global _pg_version
+    if refresh or _pg_version_stale():
+        with _pg_version_lock:
+            if refresh or _pg_version_stale():
+                from ..db import investors_version
+                previous = _pg_version[0]
+                _pg_version = (investors_version(), time.monotonic())
+                if _pg_version[0] != previous:
+                    for fn in _pg_listeners:
+                        try:
+                            fn(_pg_version[0])
+                        except Exception as e:
+                            swallowed("corpus_listener", e)
+    return _pg_version[0]
+
+def on_corpus_change(fn: Callable[[str], None]) -> None:
+    """Call fn(version) each time the served corpus (seed snapshot or investors table) moves on."""
+    if RETRIEVAL == "postgres":
+        _pg_listeners.append(fn)
+    else:
+        seed_corpus.subscribe(fn)
+
+def corpus_snapshot() -> Tuple[Optional[InvestorIndex], str]:
+    """
+    (index, version) for one request: the seed snapshot and its content hash, or with
+    RETRIEVAL=postgres no index and the investors table's version. The version is part of every
+    result-cache key.
+    """
+    if RETRIEVAL == "postgres":
+        return None, _postgres_version()
+    index = get_seed_index()
+    return index, index.version
+
+def seed_version() -> str:
+    return corpus_snapshot()[1]
+
+def corpus_stats(reload: bool = False) -> Dict:
+    """What /api/corpus reports; `reload` re-reads the seed file or the table version now."""
+    if RETRIEVAL == "postgres":
+        return {"retrieval": RETRIEVAL, "version": _postgres_version(refresh=reload)}
+    if reload:
+        seed_corpus.reload()
+    return {"retrieval": RETRIEVAL, **seed_corpus.stats()}
+
+def _sql_candidates(sector_terms: List[str], stage: str, geo_hint: str) -> List[InvestorRecord]:
+    from ..db import retrieve_candidates
+    from ..agents.matchmaker import WEIGHTS, stage_credit_sets
+    rows = retrieve_candidates(sector_terms, stage, geo_hint, stage_credit_sets(stage), WEIGHTS, SQL_CANDIDATES)
+    return [InvestorRecord.from_dict(r, source="seed") for r in rows]
 
 # ---------- SerpAPI live search ----------
 def _query_strings(sectors: List[str], stage: str, geo_hint: str = "") -> List[str]:
@@ -45,6 +126,8 @@ def _query_strings(sectors: List[str], stage: str, geo_hint: str = "") -> List[s
         ]
     return queries
 
+_NAME_RE = re.compile(r"([A-Z][A-Za-z&'\s]+)\s+(Capital|Ventures|Partners|VC)")
+
 def _parse_snippet_for_names(snippet: str) -> List[Dict]:
     out = []
     if not snippet:
@@ -52,109 +135,170 @@ def _parse_snippet_for_names(snippet: str) -> List[Dict]:
     tokens = re.split(r"[•\-\–\—\|,;]", snippet)
     for t in tokens:
         t = t.strip()
-        m = re.search(r"([A-Z][A-Za-z&'\s]+)\s+(Capital|Ventures|Partners|VC)", t)
+        m = _NAME_RE.search(t)
         if m:
             fund = f"{m.group(1).strip()} {m.group(2)}"
             out.append({"fund": fund})
     return out
 
-def _normalize(inv: Dict, sectors: List[str], stage: str) -> Dict:
-    inv = {**inv}
-    inv.setdefault("name", inv.get("name") or inv.get("fund") or "Investor")
-    inv.setdefault("fund", inv.get("fund") or inv.get("name"))
-    inv.setdefault("stages", [stage] if stage else ["seed"])
-    inv.setdefault("sectors", sectors or ["ai","infra"])
-    inv.setdefault("geo", "global")
-    inv.setdefault("urls", inv.get("urls") or [])
-    inv.setdefault("notable_investments", [])
-    inv.setdefault("recent_news", [])
-    inv.setdefault("warm_paths", [])
-    inv["unique_key"] = _unique_key(inv)
-    return inv
-
-def search_live_investors(sectors: List[str], stage: str, geo_hint: str = "") -> List[Dict]:
-    if not SERPAPI_API_KEY:
-        return []
-    queries = _query_strings(sectors, stage, geo_hint)
-    if not queries:
-        return []
+def _normalize(inv: Dict, sectors: List[str], stage: str) -> InvestorRecord:
+    name = inv.get("name") or inv.get("fund") or "Investor"
+    fund = inv.get("fund") or name
+    return InvestorRecord(
+        name=name, fund=fund,
+        stages=inv.get("stages") or ([stage] if stage else ["seed"]),
+        sectors=inv.get("sectors") or sectors or ["ai","infra"],
+        geo=inv.get("geo") or "global",
+        urls=inv.get("urls") or [],
+        unique_key=_unique_key({"name": name, "fund": fund}),
+        source="live",
+    )
+
+def _parse_organic(data: Dict) -> List[Dict]:
+    """Raw fund guesses ({fund, urls}) from one SerpAPI response, in result order."""
+    out = []
+    for item in (data.get("organic_results") or []):
+        title = (item.get("title") or "").strip()
+        link = item.get("link") or ""
+        snippet = (item.get("snippet") or "").strip()
+
+        candidates = []
+        m = _NAME_RE.search(title)
+        if m:
+            fund = f"{m.group(1).strip()} {m.group(2)}"
+            candidates.append({"fund": fund, "urls": [link]})
 
+        candidates += [{"fund": c.get("fund"), "urls": [link]} for c in _parse_snippet_for_names(snippet)]
+
+        if not candidates and link:
+            host = urlparse(link).netloc.split(".")
+            if len(host) >= 2:
+                guess = host[-2]
+                if guess and guess.isalpha() and len(guess) > 2:
+                    candidates.append({"fund": guess.capitalize(), "urls": [link]})
+        out += candidates
+    return out
+
+def _query_key(q: str) -> str:
+    return " ".join(q.lower().split())
+
+_serp_cache: Optional[DiskCache] = None
+_serp_cache_lock = threading.Lock()
+_serp_stats: Counter = Counter()
+_serp_stats_lock = threading.Lock()
+
+def _get_serp_cache() -> DiskCache:
+    global _serp_cache
+    if _serp_cache is None:
+        with _serp_cache_lock:
+            if _serp_cache is None:
+                _serp_cache = DiskCache(os.path.join(CACHE_DIR, "serp.sqlite"))
+    return _serp_cache
+
+def _count(kind: str) -> None:
+    with _serp_stats_lock:
+        _serp_stats[kind] += 1
+
+def serp_cache_stats() -> Dict[str, int]:
+    with _serp_stats_lock:
+        out = {k: _serp_stats.get(k, 0) for k in ("hits", "misses", "errors")}
+    out.update(_get_serp_cache().stats())
+    return out
+
+def _serpapi_client(params: Dict) -> Dict:
+    from serpapi import GoogleSearch
+    return GoogleSearch(params).get_dict()
+
+def _run_query(q: str, client: Callable[[Dict], Dict]) -> List[Dict]:
+    """Parsed candidates for one query, served from the persistent cache when fresh."""
+    with span(SERPAPI, outcome="errors") as labels:
+        parsed, labels["outcome"] = _query(q, client)
+    return parsed
+
+def _query(q: str, client: Callable[[Dict], Dict]) -> Tuple[List[Dict], str]:
+    cache, key = _get_serp_cache(), _query_key(q)
+    entry = cache.get_fresh(key, SERP_CACHE_TTL_S)
+    if entry is not None:
+        _count("hits")
+        return json.loads(entry["value"]), "hits"
+    params = {
+        "api_key": SERPAPI_API_KEY,
+        "engine": "google",
+        "q": q,
+        "num": "10",
+        "hl": "en",
+        "safe": "active",
+    }
     try:
-        from serpapi import GoogleSearch
+        parsed = _parse_organic(client(params))
     except Exception:
-        return []
+        _count("errors")
+        return [], "errors"
+    _count("misses")
+    cache.set(key, json.dumps(parsed))
+    return parsed, "misses"
 
-    results: Dict[str, Dict] = {}
-    for q in queries:
-        params = {
-            "api_key": SERPAPI_API_KEY,
-            "engine": "google",
-            "q": q,
-            "num": "10",
-            "hl": "en",
-            "safe": "active",
-        }
+def search_live_investors(sectors: List[str], stage: str, geo_hint: str = "",
+                          client: Optional[Callable[[Dict], Dict]] = None) -> List[InvestorRecord]:
+    """
+    Queries run concurrently; `client(params) -> dict` defaults to SerpAPI's GoogleSearch and can
+    be swapped for a fake in offline runs.
+    """
+    if client is None:
+        if not SERPAPI_API_KEY:
+            return []
         try:
-            search = GoogleSearch(params)
-            data = search.get_dict()
-            for item in (data.get("organic_results") or []):
-                title = (item.get("title") or "").strip()
-                link = item.get("link") or ""
-                snippet = (item.get("snippet") or "").strip()
-
-                candidates = []
-                m = re.search(r"([A-Z][A-Za-z&'\s]+)\s+(Capital|Ventures|Partners|VC)", title)
-                if m:
-                    fund = f"{m.group(1).strip()} {m.group(2)}"
-                    candidates.append({"fund": fund, "urls": [link]})
-
-                candidates += [{"fund": c.get("fund"), "urls": [link]} for c in _parse_snippet_for_names(snippet)]
-
-                if not candidates and link:
-                    host = urlparse(link).netloc.split(".")
-                    if len(host) >= 2:
-                        guess = host[-2]
-                        if guess and guess.isalpha() and len(guess) > 2:
-                            candidates.append({"fund": guess.capitalize(), "urls": [link]})
-
-                for c in candidates:
-                    inv = _normalize(c, sectors, stage)
-                    results[inv["unique_key"]] = inv
+            from serpapi import GoogleSearch  # noqa: F401
         except Exception:
-            continue
+            return []
+        client = _serpapi_client
+    queries = _query_strings(sectors, stage, geo_hint)
+    if not queries:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix="serp") as pool:
+        per_query = list(pool.map(lambda q: _run_query(q, client), queries))
 
+    results: Dict[str, InvestorRecord] = {}
+    for candidates in per_query:
+        for c in candidates:
+            inv = _normalize(c, sectors, stage)
+            results[inv.unique_key] = inv
     return list(results.values())[:80]
 
-def search_investors_by_hint(sector_terms: List[str], stage: str, geo_hint: str = "") -> List[Dict]:
+def _hint_terms(sector_terms: List[str], stage: str, geo_hint: str = "") -> Tuple[List[str], str, bool]:
     sector_terms = [s for s in sector_terms if s]
     stage = (stage or "").strip().lower()
-    has_signal = bool(sector_terms or stage or geo_hint)
+    return sector_terms, stage, bool(sector_terms or stage or geo_hint)
+
+def seed_candidate_ids(sector_terms: List[str], stage: str, geo_hint: str = "",
+                       index: Optional[InvestorIndex] = None) -> Sequence[int]:
+    """The seed half of search_investors_by_hint as row ids into `index` (no live search)."""
+    sector_terms, stage, has_signal = _hint_terms(sector_terms, stage, geo_hint)
+    if not has_signal:
+        return []
+    return (index or get_seed_index()).candidate_ids(sector_terms, stage)
+
+def seed_candidates_sql(sector_terms: List[str], stage: str, geo_hint: str = "") -> List[InvestorRecord]:
+    """The seed half of search_investors_by_hint with RETRIEVAL=postgres: pre-scored rows from SQL."""
+    sector_terms, stage, has_signal = _hint_terms(sector_terms, stage, geo_hint)
+    return _sql_candidates(sector_terms, stage, geo_hint) if has_signal else []
+
+def search_investors_by_hint(sector_terms: List[str], stage: str, geo_hint: str = "",
+                             index: Optional[InvestorIndex] = None) -> List[InvestorRecord]:
+    sector_terms, stage, has_signal = _hint_terms(sector_terms, stage, geo_hint)
 
     live = search_live_investors(sector_terms, stage, geo_hint) if has_signal else []
-    seed = load_seed_investors() if has_signal else []
-
-    # Filter seed for relevance
-    sector_terms_lower = {s.lower() for s in sector_terms}
-    seed_scored = []
-    if seed:
-        for inv in seed:
-            inv_sectors = {s.lower() for s in inv.get("sectors", [])}
-            inv_stages = {s.lower() for s in inv.get("stages", [])}
-            sector_overlap = len(sector_terms_lower & inv_sectors)
-            stage_match = 1 if (stage and stage in inv_stages) else 0
-            if sector_overlap or stage_match:
-                inv["_seed_sector_overlap"] = sector_overlap
-                inv["_seed_stage_match"] = stage_match
-                seed_scored.append(inv)
-        seed_scored.sort(key=lambda x: (x.get("_seed_stage_match",0), x.get("_seed_sector_overlap",0)), reverse=True)
-
-    # Merge + dedupe (prefer entries with URLs)
-    merged: Dict[str, Dict] = {}
-    for inv in live + seed_scored:
-        key = inv.get("unique_key") or _unique_key(inv)
-        if key in merged:
-            if not merged[key].get("urls") and inv.get("urls"):
-                merged[key] = inv
-        else:
-            merged[key] = inv
-    return list(merged.values())
+    if RETRIEVAL == "postgres":
+        # same relevance filter, run in SQL; only the best pre-scored rows leave the database
+        seed_scored = _sql_candidates(sector_terms, stage, geo_hint) if has_signal else []
+        if not live:
+            return seed_scored
+        return resolve_live(live, seed_scored, EntityIndex(seed_scored))
+
+    # Relevance filter via postings lookup (any sector overlap or exact stage hit)
+    index = index or get_seed_index()
+    seed_scored = index.candidates(sector_terms, stage) if has_signal else []
+
+    # Entity resolution: "Sequoia Capital" from search and the seed's Sequoia team become one record
+    return resolve_live(live, seed_scored, index.entities) if live else seed_scored
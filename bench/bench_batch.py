@@ -0,0 +1,48 @@
+"""
+Cohort ranking: one matchmaker.run per brief (what /api/generate does per startup, minus live
+search and the ranking cache) vs matchmaker.rank_batch over the index's corpus-wide matrix.
+Asserts both produce the same top-k for every brief.
+
+    python -m bench.bench_batch [--n 100000] [--briefs 200] [--top-k 25]
+"""
+import argparse, random, time
+from app.agents import matchmaker, researcher
+from app.records import InvestorRecord
+from app.tools.index import InvestorIndex
+from bench.synth import GEOS, make_brief, make_corpus
+
+def make_cohort(b: int):
+    r = random.Random(11)
+    return [{**make_brief(seed=i), "name": f"Startup {i}", "geo": r.choice(GEOS)} for i in range(b)]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--briefs", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=25)
+    args = ap.parse_args()
+
+    index = InvestorIndex([InvestorRecord.from_dict(d, source="seed") for d in make_corpus(args.n)])
+    briefs = make_cohort(args.briefs)
+
+    t0 = time.perf_counter()
+    expected = [matchmaker.run(b, [index.docs[i] for i in researcher.seed_ids(b, index)], top_k=args.top_k)
+                for b in briefs]
+    t_loop = time.perf_counter() - t0
+
+    t0 = time.perf_counter(); mat = index.matrix; t_enc = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = matchmaker.rank_batch(briefs, mat, [researcher.seed_ids(b, index) for b in briefs], top_k=args.top_k)
+    t_batch = time.perf_counter() - t0
+
+    for e, g in zip(expected, got):
+        assert [(inv.unique_key, inv.name, sc) for inv, sc in e] == [(inv.unique_key, inv.name, sc) for inv, sc in g], \
+            "batch ranking diverged from per-brief ranking"
+    print(f"{args.briefs} briefs x {args.n:,} investors, top {args.top_k} each (identical rankings)")
+    print(f"  per-brief run        {t_loop:8.2f} s  ({t_loop / args.briefs * 1000:.1f} ms per brief)")
+    print(f"  corpus matrix (once) {t_enc:8.2f} s")
+    print(f"  rank_batch           {t_batch:8.2f} s  ({t_batch / args.briefs * 1000:.1f} ms per brief)  "
+          f"x{t_loop / t_batch:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Seed corpus hot reload: a CorpusManager over a synthetic seed file, with postings, the corpus
+matrix and the entity blocks warm. A fraction of records is edited, some removed and some
+added, then the manager reloads. The derived snapshot is compared with a cold build of the
+same file (candidates, rankings, entity matches), and so is the snapshot an in-flight request
+still holds.
+
+    python -m bench.bench_corpus [--n 100000] [--edit 0.01]
+"""
+import argparse, json, os, random, tempfile, time
+from app.agents import matchmaker
+from app.tools.corpus import CorpusManager
+from app.tools.search import _seed_record
+from bench.bench_batch import make_cohort
+from bench.synth import SECTORS, make_corpus
+
+def _warm(index):
+    index.matrix, index.entities
+    return index
+
+def _fingerprint(index, briefs, probes):
+    """Candidates and top-50 per brief, plus entity matches for `probes`."""
+    out = []
+    for brief in briefs:
+        ids = index.candidate_ids(brief["sector"], brief["stage"])
+        ranked = matchmaker.rank_batch([brief], index.matrix, [ids], top_k=50)[0]
+        out.append((ids.tolist(), [(x.unique_key, s) for x, s in ranked]))
+    return out, [index.entities.match(p) for p in probes]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--edit", type=float, default=0.01, help="fraction of records edited, and of removed/added")
+    args = ap.parse_args()
+
+    r = random.Random(3)
+    corpus = make_corpus(args.n)
+    path = os.path.join(tempfile.mkdtemp(), "seed.json")
+    with open(path, "w") as f:
+        json.dump(corpus, f)
+
+    mgr = CorpusManager(path, _seed_record, check_s=-1)
+    t0 = time.perf_counter(); old = _warm(mgr.current()); t_cold = time.perf_counter() - t0
+
+    k = int(args.n * args.edit)
+    for d in r.sample(corpus, k):
+        d["sectors"] = r.sample(SECTORS, 2)
+        d["recent_news"] = ["Closed a new fund"]
+    removed = set(r.sample(range(len(corpus)), k))
+    corpus = [d for i, d in enumerate(corpus) if i not in removed]
+    corpus += [{**d, "name": d["name"] + " (new)"} for d in make_corpus(k, seed=99)]
+    with open(path, "w") as f:
+        json.dump(corpus, f)
+
+    briefs = make_cohort(20)
+    probes = old.docs[::max(1, args.n // 200)]
+    held = _fingerprint(old, briefs, probes)
+
+    t0 = time.perf_counter(); diff = mgr.reload(); t_reload = time.perf_counter() - t0
+    new = mgr.current()
+    t0 = time.perf_counter(); cold = _warm(CorpusManager(path, _seed_record, check_s=-1).current())
+    t_rebuild = time.perf_counter() - t0
+
+    ok = _fingerprint(new, briefs, probes) == _fingerprint(cold, briefs, probes)
+    kept = new is not old and _fingerprint(old, briefs, probes) == held
+    print(f"{args.n:,} investors, warm (postings + matrix + entity blocks) in {t_cold:.2f}s")
+    print(f"edit {k:,} / remove {k:,} / add {k:,}: {json.dumps({x: diff[x] for x in ('kept', 'added', 'removed')})}")
+    print(f"  incremental reload  {t_reload:6.2f} s  (version {old.version} -> {new.version})")
+    print(f"  cold rebuild        {t_rebuild:6.2f} s  x{t_rebuild / t_reload:.1f}")
+    print(f"  reloaded snapshot == cold build: {ok}; old snapshot untouched for in-flight requests: {kept}")
+    assert ok and kept
+
+if __name__ == "__main__":
+    main()
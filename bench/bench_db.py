@@ -0,0 +1,61 @@
+"""
+Bulk persistence against a local Postgres (uses the PG* settings from .env).
+Writes into throwaway bench_* copies of the investors/matches tables.
+
+    python -m bench.bench_db [--investors 100000] [--matches 1000000]
+"""
+import argparse, random, time
+from app import db
+from app.tools.search import _unique_key
+from bench.synth import make_corpus
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--investors", type=int, default=100_000)
+    ap.add_argument("--matches", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    investors = make_corpus(args.investors)
+    for inv in investors:
+        inv["unique_key"] = _unique_key(inv)
+
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DROP TABLE IF EXISTS bench_matches; DROP TABLE IF EXISTS bench_investors;")
+        cur.execute("CREATE TABLE bench_investors (LIKE investors INCLUDING ALL);")
+        cur.execute("CREATE TABLE bench_matches (LIKE matches INCLUDING ALL);")
+
+    # row-by-row baseline on a 5k slice, extrapolated
+    sample = investors[:5_000]
+    cols = ", ".join(db._INVESTOR_COLS)
+    marks = ", ".join(["%s"] * len(db._INVESTOR_COLS))
+    t0 = time.perf_counter()
+    with db.connection() as conn:
+        cur = conn.cursor()
+        for inv in sample:
+            cur.execute(f"INSERT INTO bench_investors ({cols}) VALUES ({marks}) ON CONFLICT (unique_key) DO NOTHING",
+                        db._investor_row(inv))
+        cur.execute("TRUNCATE bench_investors")
+    t_rows = (time.perf_counter() - t0) * args.investors / len(sample)
+
+    t0 = time.perf_counter()
+    with db.connection() as conn:
+        ids = db.upsert_investors(conn.cursor(), investors, table="bench_investors")
+    t_bulk = time.perf_counter() - t0
+    print(f"investors x{args.investors:,}: row-by-row ~{t_rows:6.1f}s (extrapolated) | staged COPY upsert {t_bulk:6.1f}s")
+
+    r = random.Random(1)
+    id_list = list(ids.values())
+    rows = ((f"run{n // 25}", r.choice(id_list), 71.5, 1.0, 0.67, 1.0, 0.5, "stage aligns, sector overlap", None)
+            for n in range(args.matches))
+    t0 = time.perf_counter()
+    with db.connection() as conn:
+        db._copy_rows(conn.cursor(), "bench_matches", db._MATCH_COLS, rows)
+    t_copy = time.perf_counter() - t0
+    print(f"matches   x{args.matches:,}: COPY in one transaction {t_copy:6.1f}s ({args.matches / t_copy:,.0f} rows/s)")
+
+    with db.connection() as conn:
+        conn.cursor().execute("DROP TABLE bench_matches; DROP TABLE bench_investors;")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Batch email drafting against a fake Gemini model that injects latency and 429s.
+Shows concurrency, limiter pacing, retry on 429 and the per-run LLM budget; tests/test_llm.py
+asserts the same behaviour.
+
+    python -m bench.bench_emails [--investors 20] [--budget 12] [--rpm 120] [--p429 0.3]
+"""
+import argparse, random, threading, time
+from app.agents import writer
+from app.tools import llm_gemini
+from app.tools.ratelimit import TokenBucketLimiter
+from bench.synth import make_brief, make_corpus
+
+class ResourceExhausted(Exception):
+    code = 429
+
+class FakeGemini:
+    def __init__(self, latency_s: float, p429: float, seed: int = 3):
+        self.latency_s, self.p429 = latency_s, p429
+        self.calls = self.throttled = 0
+        self._r = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+            throttle = self._r.random() < self.p429
+            self.throttled += throttle
+        time.sleep(self.latency_s)
+        if throttle:
+            raise ResourceExhausted("429 Resource has been exhausted")
+        return type("Resp", (), {"text": "Hi — fake draft."})()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--investors", type=int, default=20)
+    ap.add_argument("--budget", type=int, default=12)
+    ap.add_argument("--rpm", type=float, default=120)
+    ap.add_argument("--latency", type=float, default=0.5)
+    ap.add_argument("--p429", type=float, default=0.3)
+    ap.add_argument("--concurrency", type=int, default=4)
+    args = ap.parse_args()
+
+    llm_gemini.limiter = TokenBucketLimiter(args.rpm, 1_000_000)
+    llm_gemini.LLM_BACKOFF_BASE_S, llm_gemini.LLM_BACKOFF_MAX_S = 0.2, 2.0
+    model = FakeGemini(args.latency, args.p429)
+    investors, brief = make_corpus(args.investors), make_brief()
+
+    t0 = time.perf_counter()
+    sources = {}
+    for i, _, source in writer.iter_batch(investors, brief, budget=args.budget,
+                                          concurrency=args.concurrency, model=model):
+        sources[source] = sources.get(source, 0) + 1
+        print(f"{time.perf_counter() - t0:6.2f}s  #{i:<3} {source}")
+    wall = time.perf_counter() - t0
+    print(f"\n{args.investors} drafts in {wall:.2f}s | {sources} | model calls {model.calls}, 429s {model.throttled}")
+    print(f"sequential at {args.latency}s/call would take >= {min(args.budget, args.investors) * args.latency:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Cold import of app.main measured with `python -X importtime`, asserted against a budget.
+Also fails if an optional integration (PDF, Notion, Gemini, scraping) is imported eagerly.
+
+    python -m bench.bench_importtime [--budget-ms 1500] [--runs 3]
+"""
+import argparse, re, subprocess, sys
+
+LAZY = ("reportlab", "notion_client", "google.generativeai", "trafilatura", "serpapi")
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def measure(module: str = "app.main"):
+    """(cumulative µs for `module`, {top-level package: cumulative µs}) from one fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    total, loaded = 0, {}
+    for m in _LINE.finditer(proc.stderr):
+        cum, name = int(m.group(2)), m.group(4)
+        if name == module:
+            total = cum
+        loaded[name] = max(loaded.get(name, 0), cum)
+    return total, loaded
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget-ms", type=float, default=1500)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--top", type=int, default=8)
+    args = ap.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    best_us, loaded = min(runs, key=lambda r: r[0])
+    print(f"import app.main: best {best_us / 1000:.0f}ms over {args.runs} runs "
+          f"(all: {', '.join(f'{r[0] / 1000:.0f}' for r in runs)} ms)")
+    tops = sorted(((us, n) for n, us in loaded.items() if "." not in n and n != "app"), reverse=True)[:args.top]
+    for us, name in tops:
+        print(f"  {name:<28} {us / 1000:7.1f} ms")
+
+    eager = [n for n in LAZY if n in loaded]
+    ok = best_us / 1000 <= args.budget_ms and not eager
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+    if best_us / 1000 > args.budget_ms:
+        print(f"FAIL: over budget ({args.budget_ms:.0f}ms)")
+    if ok:
+        print("OK")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Per-investor score_one loop vs the columnar matchmaker path, as a request sees it.
+
+  loop         score_one per candidate, then sort (the original path)
+  per-request  InvestorMatrix(candidates) encoded for the request, then rank
+  prebuilt     rank_rows against the index's corpus matrix (and row lookup), built once per
+               corpus version; only candidates that are not corpus rows (live hits) are encoded
+
+The headline speedup is the prebuilt path, which is what /api/generate runs.
+
+    python -m bench.bench_matchmaker [--sizes 10000 1000000] [--top-k 25] [--live 20]
+"""
+import argparse, time
+from app.agents import matchmaker
+from app.records import InvestorRecord
+from app.tools.index import InvestorIndex
+from bench.synth import make_brief, make_corpus
+
+def _loop(brief, investors, top_k):
+    out = []
+    for inv in investors:
+        inv_copy = dict(inv)
+        inv_copy["_score"] = matchmaker.score_one(brief, inv)
+        out.append(inv_copy)
+    out.sort(key=lambda x: x["_score"]["fit_score"], reverse=True)
+    return out[:top_k]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    ap.add_argument("--top-k", type=int, default=25)
+    ap.add_argument("--live", type=int, default=20, help="candidates that are not corpus rows (live hits)")
+    args = ap.parse_args()
+    brief = make_brief()
+
+    for n in args.sizes:
+        corpus = make_corpus(n)
+        index = InvestorIndex([InvestorRecord.from_dict(d, source="seed") for d in corpus])
+        live = [InvestorRecord.from_dict({**d, "name": d["name"] + " (live)"}, source="serpapi")
+                for d in make_corpus(args.live, seed=7)]
+        candidates = live + index.candidates(brief["sector"], brief["stage"])
+        dicts = [c.to_dict() for c in candidates]
+        t0 = time.perf_counter(); index.matrix, index.rows([]); t_corpus = time.perf_counter() - t0
+
+        t0 = time.perf_counter(); expected = _loop(brief, dicts, args.top_k); t_loop = time.perf_counter() - t0
+        t0 = time.perf_counter(); fresh = matchmaker.run(brief, candidates, args.top_k); t_fresh = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = matchmaker.rank_rows(brief, index.matrix, candidates, index.rows(candidates), args.top_k)
+        t_pre = time.perf_counter() - t0
+        want = [(d["name"], d["_score"]) for d in expected]
+        assert [(inv.name, sc) for inv, sc in fresh] == want and [(inv.name, sc) for inv, sc in got] == want, \
+            "columnar ranking diverged from score_one"
+        print(f"n={n:>9,} ({len(candidates):,} candidates)  loop {t_loop*1000:8.1f} ms | "
+              f"per-request encode+score {t_fresh*1000:8.1f} ms (x{t_loop / t_fresh:4.1f}) | "
+              f"prebuilt {t_pre*1000:7.1f} ms (x{t_loop / t_pre:5.1f}; corpus matrix {t_corpus*1000:.0f} ms once)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+PDF one-pager throughput: the old per-character-estimate renderer vs pdf_render (font-metric
+wrap with cached word widths, one text object per page, binary streams), serially and on the process pool, plus a
+multi-startup cohort book.
+
+    python -m bench.bench_pdf [--briefs 48] [--workers 4] [--rounds 7]
+"""
+import argparse, os, random, tempfile, time
+from reportlab import rl_config
+from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfgen import canvas
+from app import pdf_render
+from app.orchestrator import _assemble
+from app.agents import matchmaker
+from bench.synth import SECTORS, STAGES, make_brief, make_corpus
+
+# ---------- the renderer before pdf_render, kept verbatim for comparison ----------
+def _legacy_wrap(text, max_width, font_size):
+    max_chars = int(max_width / (font_size * 0.55))
+    words, line, out = text.split(), "", []
+    for w in words:
+        if len(line) + len(w) + 1 > max_chars:
+            out.append(line.rstrip()); line = w + " "
+        else:
+            line += w + " "
+    if line.strip(): out.append(line.rstrip())
+    return out
+
+def legacy_render(path, brief, matches):
+    c = canvas.Canvas(path, pagesize=LETTER)
+    width, height = LETTER
+    x, y = 50, height - 50
+
+    def write_line(text, size=11, leading=14):
+        nonlocal y
+        c.setFont("Helvetica", size)
+        for line in _legacy_wrap(text, width - 100, size):
+            if y < 80:
+                c.showPage(); y = height - 50; c.setFont("Helvetica", size)
+            c.drawString(x, y, line); y -= leading
+
+    write_line(f"{brief['name']} — One Pager", size=16, leading=20)
+    write_line(f"One-liner: {brief['one_liner']}")
+    write_line(f"Sector: {', '.join(brief.get('sector', []))} · Stage: {brief.get('stage','')} · Geo: {brief.get('geo','N/A')}")
+    write_line(""); write_line("Why Now:", size=13)
+    write_line(brief.get("ask") or "Raising intros to aligned investors.")
+    write_line(""); write_line("Traction:", size=13)
+    for t in brief["traction"][:6]: write_line(f"- {t}")
+    write_line(""); write_line("Top Target Investors:", size=13)
+    for m in matches[:10]:
+        inv, sc = m["investor"], m["score"]
+        write_line(f"- {inv.get('name')} ({inv.get('fund')}) — {sc['rationale']} (score {sc['fit_score']})")
+    pages = c.getPageNumber()
+    c.save()
+    return pages
+
+def _cohort(n, n_matches):
+    investors, out = make_corpus(2000), []
+    for i in range(n):
+        r = random.Random(i)
+        brief = {**make_brief(i), "name": f"Startup {i}", "sector": r.sample(SECTORS, 2), "stage": r.choice(STAGES),
+                 "traction": [f"{r.randint(2, 40)} design partners", f"${r.randint(5, 90)}k MRR", "SOC2 in progress"]}
+        out.append((brief, _assemble(matchmaker.run(brief, investors, top_k=n_matches))))
+    return out
+
+def _best(fn, rounds):
+    """(pages, seconds) of the fastest of `rounds` runs."""
+    best = None
+    for _ in range(rounds):
+        t0 = time.perf_counter(); pages = fn(); dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return pages, best
+
+def _rate(label, pages, secs):
+    print(f"{label:<34} {pages:5d} pages in {secs * 1000:8.1f} ms  → {pages / secs:8.1f} pages/s")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--briefs", type=int, default=48)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    ap.add_argument("--matches", type=int, default=10)
+    ap.add_argument("--rounds", type=int, default=7)
+    args = ap.parse_args()
+
+    cohort = _cohort(args.briefs, args.matches)
+    out = tempfile.mkdtemp(prefix="bench_pdf_")
+    jobs = [(os.path.join(out, f"{i}.pdf"), b, m) for i, (b, m) in enumerate(cohort)]
+
+    def legacy():
+        rl_config.useA85 = 1   # the old renderer ran with reportlab's default ASCII85 streams
+        try:
+            return sum(legacy_render(*j) for j in jobs)
+        finally:
+            rl_config.useA85 = 0
+
+    # interleaved rounds so both sides see the same machine noise
+    old, new = [], []
+    for _ in range(args.rounds):
+        old.append(_best(legacy, 1))
+        new.append(_best(lambda: sum(pdf_render.render_one_pager(*j) for j in jobs), 1))
+    _rate("legacy, serial", *min(old, key=lambda r: r[1]))
+    _rate("pdf_render, serial", *min(new, key=lambda r: r[1]))
+
+    pdf_render.PDF_WORKERS = args.workers
+    pdf_render.render_many(jobs[: args.workers])   # spawn + warm the workers
+    _rate(f"pdf_render, pool x{args.workers}", *_best(lambda: sum(pdf_render.render_many(jobs)), args.rounds))
+    pdf_render.shutdown_pool()
+
+    book = os.path.join(out, "book.pdf")
+    _rate(f"cohort book ({len(cohort)} startups)", *_best(lambda: pdf_render.render_cohort_book(book, cohort), args.rounds))
+    print(f"word width cache: {pdf_render.word_width.cache_info()}")
+
+if __name__ == "__main__":
+    main()
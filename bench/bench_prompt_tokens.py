@@ -0,0 +1,53 @@
+"""
+Email prompt size: the old f-string with the raw brief repr vs prompts/writer.md + compact_brief.
+Counts with Gemini's count_tokens when GOOGLE_API_KEY is set, else a chars/4 estimate.
+
+    python -m bench.bench_prompt_tokens [--briefs 50]
+"""
+import argparse, random, statistics
+from app.tools import llm_gemini
+from app.schemas import StartupBrief
+from bench.synth import make_brief
+
+TRACTION = ["12 design partners", "$20k MRR growing 15% MoM", "3 paid pilots with Fortune 500 SRE teams",
+            "Reduced MTTR by 42% at two customers", "Waitlist of 1,800 engineers", "Ex-Google SRE founding team",
+            "SOC 2 Type I in progress", "Open-source CLI with 4k GitHub stars"]
+
+def _old_prompt(investor_name, fund, rationale, brief):
+    return f"""
+            Write a concise 100–120 word intro email to {investor_name} at {fund}.
+            Startup brief: {brief}
+            Reason to contact (rationale): {rationale}
+            Tone: warm, direct, specific. Include one traction point if available. Ask for a 15-minute intro next week.
+            Return plain text only.
+        """
+
+def _briefs(n):
+    r = random.Random(11)
+    for i in range(n):
+        b = make_brief(seed=i)
+        b["traction"] = r.sample(TRACTION, r.randint(0, len(TRACTION)))
+        yield StartupBrief(**b).model_dump()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--briefs", type=int, default=50)
+    args = ap.parse_args()
+    if llm_gemini.gemini_available():
+        model = llm_gemini.get_model()
+        count, how = (lambda p: model.count_tokens(p).total_tokens), "count_tokens"
+    else:
+        count, how = (lambda p: len(p) // 4), "chars/4 estimate"
+
+    rationale = "Conviction invests at pre-seed, seed, series-a in ai, infrastructure. stage aligns, sector overlap "
+    old, new = [], []
+    for b in _briefs(args.briefs):
+        old.append(count(_old_prompt("Sarah Guo", "Conviction", rationale, b)))
+        new.append(count(llm_gemini.build_prompt("Sarah Guo", "Conviction", rationale, b)))
+    print(f"{args.briefs} briefs, tokens via {how}")
+    print(f"  before: mean {statistics.mean(old):6.1f}  max {max(old)}")
+    print(f"  after:  mean {statistics.mean(new):6.1f}  max {max(new)}")
+    print(f"  saved:  {100 * (1 - sum(new) / sum(old)):.0f}% of input tokens")
+
+if __name__ == "__main__":
+    main()
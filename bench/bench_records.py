@@ -0,0 +1,103 @@
+"""
+Investor corpus memory and per-request allocations: plain dicts (the old representation) vs
+slotted InvestorRecords with interned stage/sector/geo strings.
+
+The request part replays only what changed. Before, the index copied every candidate and
+annotated it, rank copied the top rows again to attach `_score`, and _match rebuilt a fresh
+investor dict. Now the index hands out shared records, rank pairs them with their scores, and
+the record becomes a dict once at the API boundary. Scores are computed once up front and used
+by both paths.
+
+    python -m bench.bench_records [--n 100000] [--depth 200] [--rounds 5]
+"""
+import argparse, gc, json, sys, time, tracemalloc
+from app.agents import matchmaker
+from app.config import RESULT_CACHE_DEPTH
+from app.orchestrator import _assemble
+from app.records import InvestorRecord, as_dict
+from app.tools.index import InvestorIndex
+from app.tools.search import _unique_key
+from bench.synth import make_brief, make_corpus
+
+def _legacy_match(inv):
+    return {
+        "investor": {k: inv.get(k) for k in ("name", "fund", "stages", "sectors", "check_min", "check_max", "geo",
+                                             "notable_investments", "recent_news", "urls", "warm_paths", "unique_key")},
+        "score": inv["_score"], "email_draft": None,
+    }
+
+def _api(matches):
+    return [{"investor": as_dict(m["investor"]), **m["score"], "email_draft": None} for m in matches]
+
+def measure(fn, rounds=1):
+    """(result, retained KiB, peak KiB, blocks held by the result, best seconds)."""
+    best = float("inf")
+    for _ in range(rounds):
+        gc.collect(); t0 = time.perf_counter(); out = fn(); best = min(best, time.perf_counter() - t0); del out
+    gc.collect()
+    blocks0 = sys.getallocatedblocks()
+    out = fn()
+    blocks = sys.getallocatedblocks() - blocks0
+    del out
+    gc.collect()
+    tracemalloc.start()
+    out = fn()
+    cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, cur / 1024, peak / 1024, blocks, best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100_000)
+    ap.add_argument("--depth", type=int, default=RESULT_CACHE_DEPTH, help="rows ranked per request")
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+
+    corpus = make_corpus(args.n)
+    for inv in corpus:
+        inv["unique_key"] = _unique_key(inv)
+    raw = json.dumps(corpus)     # the seed is parsed from JSON; json.loads does not share value strings
+    del corpus
+
+    dicts, d_kib, _, d_blocks, _ = measure(lambda: json.loads(raw))
+    records, r_kib, _, r_blocks, _ = measure(lambda: [InvestorRecord.from_dict(d, source="seed") for d in json.loads(raw)])
+    per = 100_000 / args.n
+    print(f"corpus of {args.n:,} investors (scaled to per 100k):")
+    print(f"  dicts    {d_kib * per / 1024:8.1f} MiB  {d_blocks * per:>12,.0f} blocks")
+    print(f"  records  {r_kib * per / 1024:8.1f} MiB  {r_blocks * per:>12,.0f} blocks   "
+          f"({(1 - r_kib / d_kib) * 100:.0f}% less memory)")
+
+    brief = make_brief()
+    index = InvestorIndex(records)
+    cands = index.candidates(brief["sector"], brief["stage"])
+    pos = {id(r): i for i, r in enumerate(index.docs)}
+    mat = matchmaker.InvestorMatrix(cands)
+    cols = matchmaker.score_matrix(brief, mat)
+    order = matchmaker._top_k(cols["fit_score"], args.depth)
+    scores = {int(i): matchmaker._score_dict(float(cols["stage_fit"][i]), float(cols["sector_fit"][i]),
+                                             float(cols["geo_fit"][i]), float(cols["momentum"][i]), bool(mat.has_news[i]))
+              for i in order}
+
+    def before():
+        copies = [dict(dicts[pos[id(r)]], _seed_sector_overlap=0, _seed_stage_match=0)
+                  for r in index.candidates(brief["sector"], brief["stage"])]
+        ranked = []
+        for i in order:
+            inv = dict(copies[i]); inv["_score"] = scores[int(i)]; ranked.append(inv)
+        return _api([_legacy_match(inv) for inv in ranked]), copies, ranked
+
+    def after():
+        shared = index.candidates(brief["sector"], brief["stage"])
+        ranked = [(shared[i], scores[int(i)]) for i in order]
+        return _api(_assemble(ranked)), shared, ranked
+
+    a, b = before()[0], after()[0]
+    assert [m["investor"]["name"] for m in a] == [m["investor"]["name"] for m in b]
+    print(f"per request: {len(cands):,} candidates, top {len(order)} ranked and returned")
+    for name, fn in (("dict copies", before), ("records", after)):
+        _, kib, peak, blocks, best = measure(fn, args.rounds)
+        print(f"  {name:<12} {best * 1000:8.1f} ms  peak {peak / 1024:7.1f} MiB  "
+              f"{blocks:>10,} blocks allocated (candidates, ranking, response)")
+
+if __name__ == "__main__":
+    main()
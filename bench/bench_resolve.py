@@ -0,0 +1,119 @@
+"""
+Entity resolution over noisy investor records: suffix/legal/case/punctuation variants, typos,
+fund-level live hits next to person-level seed rows, and own vs shared-host URLs.
+Reports wall time, candidate pairs vs all pairs, and pairwise precision/recall against the
+generator's ground truth, next to the old exact name|fund SHA-1 dedupe; then the request path,
+where live hits are matched one by one against an EntityIndex over the seed.
+
+    python -m bench.bench_resolve [--records 100000] [--seed 7]
+"""
+import argparse, random, time
+from collections import Counter
+from app.tools import resolve as er
+from app.tools.search import _unique_key
+from app.records import InvestorRecord
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "ten", "vo", "zu", "bel", "cor", "dan", "fi", "gra", "hel", "jo", "mar",
+             "nor", "pel", "qui", "sol", "tra", "ul", "ven", "wy", "xan", "yor", "ze", "ash", "bri", "cal", "dre",
+             "em", "fal", "gen", "hux", "ith", "kor", "lum", "mod", "nix", "orb", "pax", "rho", "syn", "tor", "ux",
+             "vik", "wen", "yul", "zor", "bo", "cy", "dax", "eon", "fen", "gol", "hap", "ivo", "jen", "kel", "lyr"]
+SUFFIXES = ["Capital", "Ventures", "Partners", "VC", "Fund", "Venture Partners", ""]
+LEGAL = ["", "", "", ", LLC", " L.P.", " Inc.", " Management"]
+FIRST = ["Sarah", "Mike", "Priya", "Chen", "Ana", "Tom", "Lena", "Omar", "Kai", "Rosa", "Ivan", "Maya"]
+LAST = ["Guo", "Vernal", "Shah", "Wei", "Lopez", "Berg", "Novak", "Haddad", "Ito", "Silva", "Petrov", "Reyes"]
+SHARED = ["https://www.linkedin.com/company/", "https://www.crunchbase.com/organization/", "https://techcrunch.com/"]
+
+def _word(r: random.Random, syllables: int) -> str:
+    return "".join(r.choice(SYLLABLES) for _ in range(r.randint(syllables, syllables + 1))).capitalize()
+
+def _typo(r: random.Random, s: str) -> str:
+    i = r.randrange(1, max(2, len(s) - 1))
+    op = r.random()
+    if op < 0.33: return s[:i] + s[i + 1:]
+    if op < 0.66: return s[:i - 1] + s[i] + s[i - 1] + s[i + 1:]
+    return s[:i] + r.choice("aeiou") + s[i + 1:]
+
+def make_noisy(n: int, seed: int = 7):
+    """(records, entity_ids): ~n/4 investors, each seen 1-7 times with noise."""
+    r = random.Random(seed)
+    records, truth, entity = [], [], 0
+    while len(records) < n:
+        stem = f"{_word(r, 2)} {_word(r, 2)}" if r.random() < 0.4 else _word(r, 3)
+        suffix = r.choice(SUFFIXES)
+        domain = stem.replace(" ", "").lower() + r.choice(["", "vc", "cap"]) + r.choice([".com", ".vc", ".co.uk"])
+        person = f"{r.choice(FIRST)} {r.choice(LAST)}" if r.random() < 0.4 else ""
+        for _ in range(r.randint(1, 7)):
+            fund = f"{stem} {r.choice([suffix] * 3 + SUFFIXES)}".strip() + r.choice(LEGAL)
+            if r.random() < 0.2: fund = _typo(r, fund)
+            fund = r.choice([fund, fund, fund.upper(), fund.lower(), fund.replace(" ", "-", 1)])
+            name = fund
+            if person and r.random() < 0.6:
+                name = _typo(r, person) if r.random() < 0.1 else person
+            u = r.random()
+            urls = ([f"https://{r.choice(['www.', ''])}{domain}/{r.choice(['', 'team', 'portfolio'])}"] if u < 0.6
+                    else [r.choice(SHARED) + stem.lower().replace(" ", "-")] if u < 0.8 else [])
+            records.append(InvestorRecord(name=name, fund=fund, urls=urls, stages=["seed"], sectors=["ai"]))
+            truth.append(entity)
+        entity += 1
+    return records[:n], truth[:n]
+
+def _pairs(sizes) -> int:
+    return sum(s * (s - 1) // 2 for s in sizes)
+
+def score(groups, truth):
+    predicted = _pairs(len(g) for g in groups)
+    correct = sum(_pairs(Counter(truth[i] for i in g).values()) for g in groups)
+    actual = _pairs(Counter(truth).values())
+    return correct / max(predicted, 1), correct / max(actual, 1)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--records", type=int, default=100_000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    records, truth = make_noisy(args.records, args.seed)
+    print(f"{len(records)} records, {len(set(truth))} true investors")
+
+    exact = {}
+    for i, inv in enumerate(records):
+        exact.setdefault(_unique_key(inv), []).append(i)
+    p, rc = score(list(exact.values()), truth)
+    print(f"exact sha1(name|fund): {len(exact):>7} records out  precision {p:.3f}  recall {rc:.3f}")
+
+    for n in (args.records // 4, args.records // 2, args.records):
+        t0 = time.perf_counter()
+        groups = er.cluster(records[:n])
+        wall = time.perf_counter() - t0
+        p, rc = score(groups, truth[:n])
+        funds = list(dict.fromkeys(er._record_keys(inv)[0] for inv in records[:n]))
+        pairs = er._fund_pairs([er.trigrams(f) for f in funds], {}, 10, 3, 200)
+        print(f"resolve n={n:>7}: {wall:6.2f}s  {len(groups):>7} records out  precision {p:.3f}  recall {rc:.3f}  "
+              f"{len(pairs):,} LSH candidate pairs over {len(funds):,} distinct funds "
+              f"(all pairs: {len(funds) * (len(funds) - 1) // 2:,})")
+
+    t0 = time.perf_counter()
+    merged = er.resolve(records)
+    print(f"resolve + merge fields n={len(records)}: {time.perf_counter() - t0:.2f}s -> {len(merged)} records")
+
+    # request path: the first sighting of each investor is the seed, the rest arrive as live hits
+    first = {}
+    for i, e in enumerate(truth):
+        first.setdefault(e, i)
+    seed = [records[i] for i in first.values()]
+    seed_truth = [truth[i] for i in first.values()]
+    live = [i for i in range(len(records)) if first[truth[i]] != i]
+    t0 = time.perf_counter()
+    index = er.EntityIndex(seed)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = [index.match(records[i]) for i in live]
+    t_match = time.perf_counter() - t0
+    right = sum(1 for i, g in zip(live, got) if g is not None and seed_truth[g] == truth[i])
+    wrong = sum(1 for i, g in zip(live, got) if g is not None and seed_truth[g] != truth[i])
+    print(f"EntityIndex over {len(seed)} seed investors: build {t_build:.2f}s (once per corpus); "
+          f"{len(live)} live hits matched in {t_match:.2f}s ({t_match / len(live) * 1e6:.0f} us each): "
+          f"{right / len(live):.3f} to the right investor, {wrong / len(live):.3f} to a wrong one")
+
+if __name__ == "__main__":
+    main()
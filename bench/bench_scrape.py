@@ -0,0 +1,50 @@
+"""
+Deadline-bounded scraping against a local stub server with fast, slow and hanging pages.
+Wall time should track --deadline, not the number of URLs. Pages are cached in a throwaway
+directory, so every run goes to the network. The assertion-based version is tests/test_fetch.py.
+
+    python -m bench.bench_scrape [--urls 60] [--deadline 2.0]
+"""
+import argparse, os, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from app.cache import DiskCache
+from app.tools import fetch
+
+PAGE = b"<html><body><article><p>Conviction invested in an AI infra startup. The fund raised $100M.</p></article></body></html>"
+
+class _Stub(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/slow"): time.sleep(1.5)
+        elif self.path.startswith("/hang"): time.sleep(30)
+        self.send_response(200); self.send_header("Content-Type", "text/html"); self.end_headers()
+        try: self.wfile.write(PAGE)
+        except OSError: pass
+
+    def log_message(self, *args): pass
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--urls", type=int, default=60)
+    ap.add_argument("--deadline", type=float, default=2.0)
+    args = ap.parse_args()
+
+    fetch.ALLOWED_DOMAINS = []  # stub runs on 127.0.0.1
+    fetch._cache = DiskCache(os.path.join(tempfile.mkdtemp(), "fetch.sqlite"))
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_port}"
+    kinds = ["fast", "slow", "hang"]
+    urls = [f"{base}/{kinds[i % 3]}/{i}" for i in range(args.urls)]
+
+    t0 = time.perf_counter()
+    got = fetch.fetch_many(urls, deadline_s=args.deadline, max_workers=8, per_host=4)
+    wall = time.perf_counter() - t0
+    print(f"{len(urls)} urls ({args.urls // 3} hanging), deadline {args.deadline:.1f}s -> "
+          f"wall {wall:.2f}s, {len(got)} pages returned")
+    print(f"sequential worst case at 10s timeout: {len(urls) * 10}s")
+    assert wall < args.deadline + 0.5, "enrichment overran its deadline"
+    srv.shutdown()
+
+if __name__ == "__main__":
+    main()
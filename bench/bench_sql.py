@@ -0,0 +1,82 @@
+"""
+SQL-side candidate retrieval against a local Postgres (uses the PG* settings from .env).
+Loads a synthetic corpus into a throwaway bench_investors copy of the investors table (TEXT[]
+columns, GIN-indexed key columns), then for a set of briefs compares:
+
+  memory  the in-process index: candidates() over the whole corpus, then matchmaker.run
+  sql     db.retrieve_candidates: predicate + pre-score in Postgres, top --limit rows fetched,
+          then matchmaker.run on those
+
+and checks both give the same top-k.
+
+    python -m bench.bench_sql [--n 200000] [--briefs 20] [--limit 1000] [--top-k 25]
+"""
+import argparse, time
+from app import db
+from app.agents import matchmaker
+from app.records import InvestorRecord
+from app.tools.index import InvestorIndex
+from app.tools.search import _unique_key
+from bench.bench_batch import make_cohort
+from bench.synth import make_corpus
+
+TABLE = "bench_investors"
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000)
+    ap.add_argument("--briefs", type=int, default=20)
+    ap.add_argument("--limit", type=int, default=1000, help="rows fetched per brief (SQL_CANDIDATES)")
+    ap.add_argument("--top-k", type=int, default=25)
+    args = ap.parse_args()
+
+    corpus = make_corpus(args.n)
+    for inv in corpus:
+        inv["unique_key"] = _unique_key(inv)
+    db.init_db()
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"DROP TABLE IF EXISTS {TABLE}; CREATE TABLE {TABLE} (LIKE investors INCLUDING ALL);")
+    t0 = time.perf_counter()
+    db.load_investors(corpus, table=TABLE)
+    print(f"loaded {args.n:,} investors into {TABLE} in {time.perf_counter() - t0:.1f}s")
+
+    index = InvestorIndex([InvestorRecord.from_dict(d, source="seed") for d in corpus])
+    briefs = make_cohort(args.briefs)
+    t_mem = t_sql = t_fetch = 0.0
+    fetched = total = same = 0
+    for brief in briefs:
+        sectors, stage, geo = brief["sector"], brief["stage"], brief["geo"]
+        t0 = time.perf_counter()
+        cands = index.candidates(sectors, stage)
+        want = matchmaker.run(brief, cands, top_k=args.top_k)
+        t_mem += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        rows = db.retrieve_candidates(sectors, stage, geo, matchmaker.stage_credit_sets(stage), matchmaker.WEIGHTS,
+                                      args.limit, table=TABLE)
+        t_fetch += time.perf_counter() - t0
+        got = matchmaker.run(brief, [InvestorRecord.from_dict(r, source="seed") for r in rows], top_k=args.top_k)
+        t_sql += time.perf_counter() - t0
+
+        fetched += len(rows); total += len(cands)
+        same += [(i.unique_key, s) for i, s in want] == [(i.unique_key, s) for i, s in got]
+
+    with db.connection() as conn:
+        cur = conn.cursor()
+        b = briefs[0]
+        cur.execute(f"EXPLAIN SELECT id FROM {TABLE} WHERE sector_keys && %s::TEXT[] OR stage_keys @> ARRAY[%s]::TEXT[]",
+                    (b["sector"], b["stage"]))
+        plan = [r[0].strip() for r in cur.fetchall() if "Scan" in r[0]]
+        cur.execute(f"DROP TABLE {TABLE};")
+
+    k = len(briefs)
+    print(f"{k} briefs, {total / k:,.0f} candidates each of {args.n:,}; top {args.top_k}:")
+    print(f"  memory (whole corpus in the worker)  {t_mem / k * 1000:8.1f} ms per brief")
+    print(f"  sql (top {args.limit} pre-scored rows)   {t_sql / k * 1000:8.1f} ms per brief "
+          f"({t_fetch / k * 1000:.1f} ms in Postgres + transfer, {fetched / k:,.0f} rows fetched)")
+    print(f"  identical top-{args.top_k}: {same}/{k}")
+    print("  plan: " + " | ".join(plan))
+
+if __name__ == "__main__":
+    main()
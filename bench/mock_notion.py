@@ -0,0 +1,207 @@
+"""
+Local mock of the Notion endpoints the exporter uses (pages, databases, block children), with
+injected 429/5xx responses and "lost" writes (applied, then answered with a 504), plus a demo
+run against it: a full table export, a database export, and an export that dies partway and is
+resumed. Lost writes must not show up as duplicate rows.
+
+    python -m bench.mock_notion [--matches 1000] [--p429 0.1] [--p500 0.05] [--plost 0.03] [--rps 3]
+"""
+import argparse, json, os, random, tempfile, threading, time, uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from app import notion_export
+from app.agents import matchmaker
+from app.cache import DiskCache
+from app.orchestrator import _assemble
+from app.tools.ratelimit import TokenBucketLimiter
+from bench.synth import make_brief, make_corpus
+
+class MockNotion:
+    def __init__(self, p429: float = 0.0, p500: float = 0.0, plost: float = 0.0, seed: int = 1):
+        self.p429, self.p500, self.plost = p429, p500, plost
+        self.fail_next = 0          # force this many 503s in a row
+        self.lose_calls = set()     # these write calls (1-based) are applied, then answered with a 504
+        self.children = {}          # block/page id -> list of child blocks
+        self.db_rows = {}           # database id -> list of row properties
+        self.calls, self.errors, self.lost, self.max_children, self.times = 0, 0, 0, 0, []
+        self._r = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def handle(self, method: str, path: str, body: dict, query: dict = None):
+        """(status, payload, headers) for one request."""
+        with self._lock:
+            if method == "GET" or path.endswith("/query"):
+                return self._read(method, path, body, query or {})
+            self.calls += 1
+            self.times.append(time.monotonic())
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                self.errors += 1
+                return 503, {"object": "error", "code": "service_unavailable", "message": "down"}, {}
+            roll = self._r.random()
+            if roll < self.p429:
+                self.errors += 1
+                return 429, {"object": "error", "code": "rate_limited", "message": "slow down"}, {"Retry-After": "0.2"}
+            if roll < self.p429 + self.p500:
+                self.errors += 1
+                return 502, {"object": "error", "code": "internal_server_error", "message": "oops"}, {}
+            status, payload, headers = self._write(method, path, body)
+            if status == 200 and (roll < self.p429 + self.p500 + self.plost or self.calls in self.lose_calls):
+                self.errors += 1
+                self.lost += 1
+                return 504, {"object": "error", "code": "gateway_timeout", "message": "lost"}, {}
+            return status, payload, headers
+
+    def _read(self, method: str, path: str, body: dict, query: dict):
+        if method == "GET" and path.startswith("/v1/pages/"):
+            pid = path.split("/")[3]
+            return 200, {"object": "page", "id": pid, "url": f"https://notion.so/{pid}"}, {}
+        if method == "GET" and path.startswith("/v1/blocks/") and path.endswith("/children"):
+            kids = self.children.get(path.split("/")[3], [])
+            start, size = int(query.get("start_cursor") or 0), int(query.get("page_size") or 100)
+            more = start + size < len(kids)
+            return 200, {"object": "list", "results": kids[start:start + size], "has_more": more,
+                         "next_cursor": str(start + size) if more else None}, {}
+        if method == "POST" and path.startswith("/v1/databases/"):
+            cond = body.get("filter") or {}
+            rows = [r for r in self.db_rows.get(path.split("/")[3], [])
+                    if not cond or r.get(cond["property"], {}).get("number") == cond["number"]["equals"]]
+            return 200, {"object": "list", "results": [{"object": "page", "properties": r} for r in rows], "has_more": False}, {}
+        return 404, {"object": "error", "code": "object_not_found", "message": path}, {}
+
+    def _write(self, method: str, path: str, body: dict):
+        children = body.get("children") or []
+        nested = [len((b.get(b.get("type"), {}) or {}).get("children") or []) for b in children]
+        self.max_children = max([self.max_children, len(children)] + nested)
+        if len(children) > 100 or any(n > 100 for n in nested):
+            return 400, {"object": "error", "code": "validation_error", "message": "children > 100"}, {}
+        if method == "POST" and path == "/v1/pages":
+            parent = body["parent"]
+            pid = uuid.uuid4().hex
+            if "database_id" in parent:
+                self.db_rows.setdefault(parent["database_id"], []).append(body["properties"])
+            else:
+                title = "".join(t["text"]["content"] for t in body["properties"]["title"])
+                self.children.setdefault(parent["page_id"], []).append(
+                    {"object": "block", "id": pid, "type": "child_page", "child_page": {"title": title}})
+            self.children[pid] = list(children)
+            return 200, {"object": "page", "id": pid, "url": f"https://notion.so/{pid}"}, {}
+        if method == "POST" and path == "/v1/databases":
+            did = uuid.uuid4().hex
+            self.db_rows[did] = []
+            self.children.setdefault(body["parent"]["page_id"], []).append(
+                {"object": "block", "id": did, "type": "child_database", "child_database": {"title": "Target Investors"}})
+            return 200, {"object": "database", "id": did}, {}
+        if method == "PATCH" and path.startswith("/v1/blocks/") and path.endswith("/children"):
+            block_id = path.split("/")[3]
+            results = []
+            for b in children:
+                bid = uuid.uuid4().hex
+                self.children[bid] = list((b.get(b.get("type"), {}) or {}).get("children") or [])
+                results.append({"object": "block", "id": bid, "type": b.get("type")})
+            self.children.setdefault(block_id, []).extend({**b, "id": r["id"]} for b, r in zip(children, results))
+            return 200, {"object": "list", "results": results}, {}
+        return 404, {"object": "error", "code": "object_not_found", "message": path}, {}
+
+def serve(mock: MockNotion) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(n) or b"{}")
+            path, _, qs = self.path.partition("?")
+            status, payload, headers = mock.handle(self.command, path, body, {k: v[0] for k, v in parse_qs(qs).items()})
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+        do_GET = do_POST = do_PATCH = _reply
+
+        def log_message(self, *a):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _exporter(port, mode, rps, state, **kw):
+    from notion_client import Client
+    client = Client(auth="secret_mock", base_url=f"http://127.0.0.1:{port}")
+    return notion_export.NotionExporter(client=client, mode=mode, parent_page_id="parent",
+                                        rate_limiter=TokenBucketLimiter(rps * 60, 1e12, burst=rps), state=state, **kw)
+
+def _table_rows(mock):
+    # rows live under the table block: the only block whose children are table_rows
+    return max((len(v) for v in mock.children.values() if v and v[0].get("type") == "table_row"), default=0)
+
+def _run_as_job(ex, brief, matches, attempts: int = 5):
+    """Like the job queue: a failed run (retries used up) is run again, resuming from its checkpoint."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return ex.run(brief, matches), attempt
+        except Exception:
+            if attempt == attempts:
+                raise
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--matches", type=int, default=1000)
+    ap.add_argument("--db-rows", type=int, default=40)
+    ap.add_argument("--p429", type=float, default=0.1)
+    ap.add_argument("--p500", type=float, default=0.05)
+    ap.add_argument("--plost", type=float, default=0.03)
+    ap.add_argument("--rps", type=float, default=3)
+    args = ap.parse_args()
+
+    brief = make_brief()
+    matches = _assemble(matchmaker.run(brief, make_corpus(args.matches * 3), top_k=args.matches))
+    state = DiskCache(os.path.join(tempfile.mkdtemp(prefix="mock_notion_"), "state.sqlite"))
+
+    # 1) table mode with injected 429/5xx
+    mock = MockNotion(args.p429, args.p500, args.plost)
+    server = serve(mock)
+    ex = _exporter(server.server_port, "table", args.rps, state)
+    t0 = time.perf_counter(); url, runs = _run_as_job(ex, brief, matches); dt = time.perf_counter() - t0
+    span = mock.times[-1] - mock.times[0]
+    print(f"table:    {len(matches)} matches → {_table_rows(mock) - 1} rows, {mock.calls} requests "
+          f"({mock.errors} injected errors incl. {mock.lost} lost writes, {ex.retries} retries, {ex.reconciled} re-reads, {runs} run(s)), "
+          f"max children/request {mock.max_children}, "
+          f"{mock.calls / span if span else 0:.2f} req/s, {dt:.1f}s → {url}")
+
+    # 2) database mode (one request per row, so keep it small at 3 req/s)
+    ex = _exporter(server.server_port, "database", args.rps, state)
+    t0 = time.perf_counter(); _, runs = _run_as_job(ex, brief, matches[:args.db_rows]); dt = time.perf_counter() - t0
+    print(f"database: {args.db_rows} matches → {sum(len(v) for v in mock.db_rows.values())} rows, {ex.requests} requests "
+          f"({ex.reconciled} re-reads, {runs} run(s)), {dt:.1f}s")
+
+    # 3) an export that fails partway (5xx beyond the retry budget), then is run again
+    mock2 = MockNotion()
+    server2 = serve(mock2)
+    brief2 = {**brief, "name": "Resume Test"}
+    crashing = _exporter(server2.server_port, "table", 50, state, max_retries=1, sleep=lambda s: None)
+    real_append = crashing._client().blocks.children.append
+    calls = {"n": 0}
+
+    def flaky_append(**kw):
+        calls["n"] += 1
+        if calls["n"] == 4:
+            mock2.fail_next = 2      # two 503s in a row: more than max_retries=1 absorbs
+        return real_append(**kw)
+    crashing._client().blocks.children.append = flaky_append
+    try:
+        crashing.run(brief2, matches)
+        print("resume:   export did not fail?")
+    except Exception as e:
+        partial = _table_rows(mock2) - 1
+        resumed = _exporter(server2.server_port, "table", 50, state)
+        url = resumed.run(brief2, matches)
+        pages = sum(1 for v in mock2.children.values() if v and v[0].get("type") == "paragraph")
+        print(f"resume:   failed after {partial} rows ({e.__class__.__name__}); rerun finished with "
+              f"{_table_rows(mock2) - 1} rows on {pages} page(s) using {resumed.requests} requests → {url}")
+    server.shutdown(); server2.shutdown()
+
+if __name__ == "__main__":
+    main()
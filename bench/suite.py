@@ -0,0 +1,126 @@
+"""
+End-to-end micro-benchmark suite: search → match → pipeline → exports on synthetic corpora.
+
+Each stage runs `--repeat` times per corpus size for latency percentiles, then once more under
+tracemalloc for its peak allocation. Network is stubbed (no SerpAPI, canned page text, no
+Postgres writes) and the ranking cache is disabled so every pipeline run does the full work.
+Results go to JSON; with --baseline the run fails if any stage's p50 regresses past --threshold.
+
+    python -m bench.suite [--sizes 1000 10000 100000] [--repeat 5] [--out bench/results/latest.json]
+    python -m bench.suite --sizes 1000000 --repeat 3            # 1M rows needs a few GB of RAM
+    python -m bench.suite --baseline bench/results/main.json --threshold 0.2
+"""
+import argparse, json, os, platform, sys, tempfile, time, tracemalloc
+from typing import Callable, Dict, List
+from app import exports, orchestrator
+from app.agents import matchmaker, researcher
+from app.result_cache import RankingCache
+from app.tools import search
+from app.tools.index import InvestorIndex
+from bench.synth import make_brief, make_corpus
+
+PAGE_TEXT = "Announced today: the firm led a $12M Series A. Raised a new $300M fund last month."
+
+def _stub_network() -> None:
+    search.search_live_investors = lambda *a, **k: []
+    researcher.iter_fetch = lambda urls, **k: ((u, PAGE_TEXT) for u in urls)
+    orchestrator.save_matches = lambda *a, **k: 0
+    orchestrator.rankings = RankingCache(maxsize=0, use_pg=False)
+    exports.EXPORTS_DIR = tempfile.mkdtemp(prefix="bench_exports_")
+
+def _pct(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, max(0, int(round(q * len(xs) + 0.5)) - 1))]
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    fn()   # warm-up: lazy imports, index caches
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "p50_ms": round(_pct(times, 0.50), 3), "p95_ms": round(_pct(times, 0.95), 3),
+        "p99_ms": round(_pct(times, 0.99), 3), "mean_ms": round(sum(times) / len(times), 3),
+        "min_ms": round(min(times), 3), "peak_kb": round(peak / 1024, 1),
+    }
+
+def run_size(n: int, repeat: int, top_k: int, export_rows: int) -> Dict[str, Dict]:
+    brief = make_brief()
+    search.seed_corpus.publish(InvestorIndex(make_corpus(n), version=f"synth-{n}"))
+    sectors, stage, geo = brief["sector"], brief["stage"], brief["geo"]
+
+    candidates = search.search_investors_by_hint(sectors, stage, geo)
+    ranked = matchmaker.run(brief, candidates, top_k=export_rows)
+    matches = orchestrator._assemble(ranked)
+    stages = {
+        "search": lambda: search.search_investors_by_hint(sectors, stage, geo),
+        "matchmaker": lambda: matchmaker.run(brief, candidates, top_k=top_k),
+        "run_pipeline": lambda: orchestrator.run_pipeline(brief, top_k=top_k, allow_scrape=True, exports=[]),
+        "export_csv": lambda: os.remove(exports.export_csv(matches)),
+        "export_pdf": lambda: os.remove(exports.export_pdf(brief, matches)),
+    }
+    out = {"candidates": len(candidates)}
+    for name, fn in stages.items():
+        out[name] = measure(fn, repeat)
+        r = out[name]
+        print(f"  {name:<13} p50 {r['p50_ms']:10.2f} ms  p95 {r['p95_ms']:10.2f} ms  "
+              f"p99 {r['p99_ms']:10.2f} ms  peak {r['peak_kb'] / 1024:9.1f} MiB")
+    search.seed_corpus.publish(None)
+    return out
+
+def regressions(current: Dict, baseline: Dict, threshold: float, floor_ms: float) -> List[str]:
+    """p50 slowdowns beyond `threshold` (fractional) on stages present in both runs."""
+    out = []
+    for size, stages in current["results"].items():
+        for stage, r in stages.items():
+            b = baseline.get("results", {}).get(size, {}).get(stage)
+            if not isinstance(r, dict) or not isinstance(b, dict):
+                continue
+            if r["p50_ms"] > b["p50_ms"] * (1 + threshold) and r["p50_ms"] - b["p50_ms"] > floor_ms:
+                out.append(f"n={size} {stage}: p50 {b['p50_ms']:.2f} → {r['p50_ms']:.2f} ms "
+                           f"(+{(r['p50_ms'] / b['p50_ms'] - 1) * 100:.0f}%)")
+    return out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top-k", type=int, default=25)
+    ap.add_argument("--export-rows", type=int, default=100)
+    ap.add_argument("--out", default=os.path.join("bench", "results", "latest.json"))
+    ap.add_argument("--baseline", default="")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown, e.g. 0.2 = 20%%")
+    ap.add_argument("--floor-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = ap.parse_args()
+
+    _stub_network()
+    report = {
+        "meta": {"ts": int(time.time()), "python": platform.python_version(), "platform": platform.platform(),
+                 "repeat": args.repeat, "top_k": args.top_k, "export_rows": args.export_rows},
+        "results": {},
+    }
+    for n in args.sizes:
+        print(f"n={n:,}")
+        report["results"][str(n)] = run_size(n, args.repeat, args.top_k, args.export_rows)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            bad = regressions(report, json.load(f), args.threshold, args.floor_ms)
+        for line in bad:
+            print(f"REGRESSION {line}")
+        if bad:
+            sys.exit(1)
+        print(f"no regressions vs {args.baseline} (threshold {args.threshold:.0%})")
+
+if __name__ == "__main__":
+    main()
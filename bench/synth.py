@@ -0,0 +1,47 @@
+import random
+from typing import Dict, List
+
+STAGES = ["angel", "pre-seed", "seed", "seed+", "pre-series-a", "series-a", "series-b", "series-c", "Series A", "preseed"]
+SECTORS = [
+    "ai", "agents", "llm infra", "infrastructure", "infra", "security", "developer tools", "saas", "data",
+    "fintech", "payments", "crypto", "healthcare", "biotech", "climate", "energy", "robotics", "hardware",
+    "consumer", "marketplaces", "enterprise", "edtech", "proptech", "logistics",
+]
+GEOS = ["US", "EU", "UK", "India", "global", "remote", "US/EU", "LATAM", ""]
+WORDS = ["Alpha", "Beacon", "Cedar", "Delta", "Ember", "Fjord", "Granite", "Harbor", "Iris", "Juniper", "Kite", "Lumen"]
+SUFFIXES = ["Capital", "Ventures", "Partners", "VC", "Fund"]
+
+def make_corpus(n: int, seed: int = 7) -> List[Dict]:
+    """Synthetic investors shaped like app/data/seed_investors.json."""
+    r = random.Random(seed)
+    out = []
+    for i in range(n):
+        fund = f"{r.choice(WORDS)} {r.choice(WORDS)} {r.choice(SUFFIXES)}"
+        lo = r.choice([100_000, 250_000, 500_000, 1_000_000])
+        out.append({
+            "name": f"{fund} Team {i}",
+            "fund": fund,
+            "stages": r.sample(STAGES, r.randint(1, 3)),
+            "sectors": r.sample(SECTORS, r.randint(1, 5)),
+            "check_min": lo,
+            "check_max": lo * r.choice([4, 8, 10]),
+            "geo": r.choice(GEOS),
+            "notable_investments": r.sample(WORDS, 2),
+            "recent_news": ["Led a new round"] if r.random() < 0.3 else [],
+            "urls": [f"https://{fund.split()[0].lower()}{i}.vc/"],
+            "warm_paths": ["Operator network"] if r.random() < 0.5 else [],
+        })
+    return out
+
+def make_brief(seed: int = 7) -> Dict:
+    r = random.Random(seed)
+    return {
+        "name": "IncidentDesk AI",
+        "one_liner": "AI copilot for on-call engineers",
+        "sector": r.sample(SECTORS[:10], 3),
+        "stage": r.choice(["pre-seed", "seed", "series-a"]),
+        "round_size_usd": 2_000_000,
+        "geo": "US",
+        "traction": ["12 design partners", "$20k MRR", "3 paid pilots"],
+        "ask": "Raising intro meetings with aligned investors.",
+    }
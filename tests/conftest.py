@@ -0,0 +1,42 @@
+"""
+Offline test settings, applied before `app` is imported: caches and export files in a throwaway
+directory, no Postgres (its best-effort tiers fail fast on a missing socket) and no API keys, so
+nothing reaches the network.
+"""
+import os, sys, tempfile, threading
+
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="copilot-tests-")
+os.environ["EXPORTS_DIR"] = os.path.join(os.environ["CACHE_DIR"], "exports")
+os.environ["PGHOST"] = os.path.join(os.environ["CACHE_DIR"], "no-postgres")
+os.environ["GOOGLE_API_KEY"] = ""
+os.environ["SERPAPI_API_KEY"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture
+def pg(monkeypatch):
+    """
+    app.db on a scratch schema of the Postgres server named by TEST_PGHOST (plus TEST_PGUSER,
+    TEST_PGDATABASE, TEST_PGPASSWORD), with the app's tables created; skipped when it is unset.
+    """
+    host = os.environ.get("TEST_PGHOST")
+    if not host:
+        pytest.skip("TEST_PGHOST not set")
+    import psycopg2
+    from psycopg2.pool import ThreadedConnectionPool
+    from app import db
+    kw = dict(host=host, user=os.environ.get("TEST_PGUSER"), dbname=os.environ.get("TEST_PGDATABASE"),
+              password=os.environ.get("TEST_PGPASSWORD"))
+    schema = f"copilot_test_{os.getpid()}"
+    admin = psycopg2.connect(**kw)
+    admin.autocommit = True
+    admin.cursor().execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};")
+    pool = ThreadedConnectionPool(1, 4, options=f"-c search_path={schema}", **kw)
+    monkeypatch.setattr(db, "_pool", pool)
+    monkeypatch.setattr(db, "_slots", threading.BoundedSemaphore(4))
+    db.init_db()
+    yield db
+    pool.closeall()
+    admin.cursor().execute(f"DROP SCHEMA {schema} CASCADE;")
+    admin.close()
@@ -0,0 +1,146 @@
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+import psycopg2
+import pytest
+from psycopg2.pool import PoolError
+from app import db
+
+class FakeConn:
+    def __init__(self):
+        self.closed = 0
+        self.rolled_back = self.committed = False
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        if self.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+        self.rolled_back = True
+
+class FakePool:
+    def __init__(self):
+        self.conn, self.returned = FakeConn(), []
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        self.returned.append(close)
+
+@pytest.fixture
+def pool(monkeypatch):
+    p = FakePool()
+    monkeypatch.setattr(db, "get_pool", lambda: p)
+    return p
+
+def test_healthy_connection_goes_back_to_the_pool(pool):
+    with db.connection():
+        pass
+    assert pool.conn.committed and pool.returned == [False]
+
+def test_query_error_rolls_back_and_keeps_the_connection(pool):
+    with pytest.raises(psycopg2.errors.UniqueViolation):
+        with db.connection():
+            raise psycopg2.errors.UniqueViolation("duplicate key")
+    assert pool.conn.rolled_back and pool.returned == [False]
+
+@pytest.mark.parametrize("error", [psycopg2.OperationalError("server closed the connection"),
+                                   psycopg2.InterfaceError("connection already closed")])
+def test_broken_connection_is_discarded(pool, error):
+    with pytest.raises(type(error)):
+        with db.connection():
+            raise error
+    assert pool.returned == [True]
+
+def test_closed_connection_is_discarded_without_rollback(pool):
+    with pytest.raises(RuntimeError):
+        with db.connection() as conn:
+            conn.closed = 2
+            raise RuntimeError("lost mid-query")
+    assert not pool.conn.rolled_back and pool.returned == [True]
+
+def test_upsert_takes_ids_only_for_new_investors(pg):
+    from bench.synth import make_corpus
+    invs = [{**d, "unique_key": f"k{i}"} for i, d in enumerate(make_corpus(5))]
+    with pg.connection() as conn:
+        ids = pg.upsert_investors(conn.cursor(), invs[:3])
+    with pg.connection() as conn:                                  # re-saves and one changed row: no new ids
+        ids2 = pg.upsert_investors(conn.cursor(), invs[:2] + [{**invs[2], "geo": "Mars"}])
+    with pg.connection() as conn:
+        new = pg.upsert_investors(conn.cursor(), invs[3:])
+    assert ids == ids2
+    assert sorted(new.values()) == [max(ids.values()) + 1, max(ids.values()) + 2]
+
+def test_sql_retrieval_keeps_the_in_memory_top_k(pg, monkeypatch):
+    from app.agents import matchmaker
+    from app.records import InvestorRecord
+    from app.tools.index import InvestorIndex
+    from bench.synth import make_corpus
+    # few sectors/geos: thousands of candidates share a handful of fit scores
+    corpus = [{**d, "sectors": d["sectors"][:2], "unique_key": f"k{i}"} for i, d in enumerate(make_corpus(3000, seed=3))]
+    pg.load_investors(corpus)
+    index = InvestorIndex([InvestorRecord.from_dict(d, source="seed") for d in corpus])
+    for brief in ({"sector": ["agents", "edtech"], "stage": "seed", "geo": "US"},
+                  {"sector": ["healthcare", "biotech", "agents", "data", "robotics", "energy", "logistics"],
+                   "stage": "series-a", "geo": "EU"}):
+        credit = matchmaker.stage_credit_sets(brief["stage"])
+        memory = matchmaker.run(brief, index.candidates(brief["sector"], brief["stage"]), top_k=25)
+        rows = pg.retrieve_candidates(brief["sector"], brief["stage"], brief["geo"], credit, matchmaker.WEIGHTS, 25)
+        sql = matchmaker.run(brief, [InvestorRecord.from_dict(r, source="seed") for r in rows], top_k=25)
+        assert [(i.unique_key, s["fit_score"]) for i, s in sql] == [(i.unique_key, s["fit_score"]) for i, s in memory]
+
+def test_failed_connect_marks_postgres_down(monkeypatch):
+    def refuse():
+        raise psycopg2.OperationalError("could not connect to server")
+    monkeypatch.setattr(db, "get_pool", refuse)
+    monkeypatch.setattr(db, "_down_until", 0.0)
+    assert db.available()
+    with pytest.raises(psycopg2.OperationalError):
+        with db.connection():
+            pass
+    assert not db.available()
+
+class BoundedPool(FakePool):
+    """Like ThreadedConnectionPool: getconn() raises PoolError at once when maxconn are out."""
+    def __init__(self, maxconn):
+        super().__init__()
+        self.maxconn, self.out, self.lock = maxconn, 0, threading.Lock()
+
+    def getconn(self):
+        with self.lock:
+            if self.out >= self.maxconn:
+                raise PoolError("connection pool exhausted")
+            self.out += 1
+        return FakeConn()
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            self.out -= 1
+
+def test_callers_beyond_the_pool_size_wait_for_a_connection(monkeypatch):
+    pool = BoundedPool(2)
+    monkeypatch.setattr(db, "get_pool", lambda: pool)
+    monkeypatch.setattr(db, "_slots", threading.BoundedSemaphore(2))
+    def use():
+        with db.connection():
+            time.sleep(0.05)
+    with ThreadPoolExecutor(5) as ex:
+        for f in [ex.submit(use) for _ in range(5)]:
+            f.result()                               # N+1 and more: all succeed, none get PoolError
+
+def test_waiting_for_a_connection_is_bounded(monkeypatch):
+    monkeypatch.setattr(db, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(db, "PG_POOL_WAIT_S", 0.05)
+    db._slots.acquire()
+    with pytest.raises(PoolError):
+        with db.connection():
+            pass
+
+def test_more_concurrent_users_than_pooled_connections(pg):
+    def use():
+        with pg.connection() as conn:
+            conn.cursor().execute("SELECT pg_sleep(0.05)")
+    with ThreadPoolExecutor(8) as ex:                # the fixture's pool holds 4
+        for f in [ex.submit(use) for _ in range(8)]:
+            f.result()
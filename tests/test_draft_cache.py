@@ -0,0 +1,23 @@
+import psycopg2
+from app import db
+from app.draft_cache import DraftCache
+from app.metrics import SWALLOWED
+
+def test_missing_postgres_is_tried_once_per_backoff_window(monkeypatch):
+    attempts = []
+    def refuse():
+        attempts.append(1)
+        raise psycopg2.OperationalError("could not connect to server")
+    monkeypatch.setattr(db, "get_pool", refuse)
+    monkeypatch.setattr(db, "_down_until", 0.0)
+    failed = SWALLOWED.labels(where="draft_cache_get", type="OperationalError")
+    before = failed._value.get()
+    cache = DraftCache(maxsize=8)
+    for i in range(5):
+        assert cache.get(f"k{i}") is None
+        cache.put(f"k{i}", {"name": "Acme"}, {"name": "Fund", "unique_key": "u"}, "hi")
+    assert len(attempts) == 1 and failed._value.get() == before + 1
+    assert cache.get("k3") == "hi"                    # the LRU tier keeps working
+    monkeypatch.setattr(db, "_down_until", 0.0)       # window over: Postgres is tried again
+    cache.get("missing")
+    assert len(attempts) == 2
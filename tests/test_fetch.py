@@ -0,0 +1,50 @@
+import os, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import trafilatura  # noqa: F401  (imported on the first page otherwise, which would eat the deadline)
+from app.cache import DiskCache
+from app.tools import fetch
+
+PAGE = b"<html><body><article><p>Conviction invested in an AI infra startup. The fund raised $100M.</p></article></body></html>"
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    """Local server with fast, slow (1.5 s) and hanging pages; a fresh, empty fetch cache."""
+    release = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/slow"): time.sleep(1.5)
+            elif self.path.startswith("/hang"): release.wait(30)
+            self.send_response(200); self.send_header("Content-Type", "text/html"); self.end_headers()
+            try: self.wfile.write(PAGE)
+            except OSError: pass
+
+        def log_message(self, *args): pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(fetch, "ALLOWED_DOMAINS", [])
+    monkeypatch.setattr(fetch, "_cache", DiskCache(os.path.join(tmp_path, "fetch.sqlite")))
+    yield f"http://127.0.0.1:{srv.server_port}"
+    release.set()
+    srv.shutdown()
+
+def test_iter_fetch_returns_within_deadline_when_hosts_are_slow(stub):
+    kinds = ["fast", "slow", "hang"]
+    urls = [f"{stub}/{kinds[i % 3]}/{i}" for i in range(30)]
+    deadline = 1.0
+    t0 = time.monotonic()
+    got = dict(fetch.iter_fetch(urls, deadline_s=deadline, max_workers=8, per_host=4))
+    wall = time.monotonic() - t0
+    assert wall < deadline + 0.5, f"iter_fetch overran its deadline: {wall:.2f}s"
+    assert not any(got.get(u) for u in urls if "/hang/" in u or "/slow/" in u)
+    assert any(got.get(u) for u in urls if "/fast/" in u)
+
+def test_cached_pages_skip_the_network(stub):
+    url = f"{stub}/fast/0"
+    assert fetch.fetch_text(url)
+    t0 = time.monotonic()
+    assert dict(fetch.iter_fetch([url, f"{stub}/hang/1"], deadline_s=0.5))[url]
+    assert time.monotonic() - t0 < 1.0
@@ -0,0 +1,50 @@
+import os, time
+from app import db, jobs
+
+def _queue(tmp_path, **kw):
+    q = jobs.JobQueue(str(tmp_path / "jobs.sqlite"), **kw)
+    q.register("csv", lambda p: "ok")
+    q.register("persist", lambda p: "")
+    return q
+
+def test_lanes_only_claim_their_kinds(tmp_path):
+    q = _queue(tmp_path)
+    persist = q.enqueue("persist", {})
+    export = q.enqueue("csv", {})
+    assert q.run_once(skip=jobs.BACKGROUND_KINDS)
+    assert q.get(export)["status"] == "done" and q.get(persist)["status"] == "queued"
+    assert not q.run_once(skip=jobs.BACKGROUND_KINDS)
+    assert q.run_once(kinds=jobs.BACKGROUND_KINDS) and q.get(persist)["status"] == "done"
+
+def test_failed_jobs_back_off_before_the_retry(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "backoff_delay", lambda attempt, base, cap: 60.0)
+    q = _queue(tmp_path)
+    def down(p):
+        raise ConnectionError("postgres down")
+    q.register("persist", down)
+    job = q.enqueue("persist", {})
+    assert q.run_once()
+    assert q.get(job)["status"] == "queued"
+    assert not q.run_once()          # not claimable again until its backoff has passed
+
+def test_sweep_drops_old_jobs_and_their_files(tmp_path):
+    artifacts = tmp_path / "exports"
+    artifacts.mkdir()
+    made, outside = artifacts / "matches.csv", tmp_path / "keep.csv"
+    made.write_text("x"); outside.write_text("x")
+    q = _queue(tmp_path, ttl_s=0, artifacts_dir=str(artifacts))
+    q.register("csv", lambda p: p["path"])
+    jobs_ = [q.enqueue("csv", {"path": str(made)}), q.enqueue("csv", {"path": str(outside)})]
+    while q.run_once():
+        pass
+    time.sleep(0.01)
+    assert q.sweep() == 2
+    assert all(q.get(j) is None for j in jobs_)
+    assert not made.exists() and outside.exists()
+
+def test_persist_is_not_queued_while_postgres_is_down(tmp_path, monkeypatch):
+    q = _queue(tmp_path)
+    monkeypatch.setattr(jobs, "queue", q)
+    monkeypatch.setattr(db, "_down_until", time.monotonic() + 60)
+    assert jobs.enqueue_persist("run", "fp", []) is None
+    assert not q.run_once()
@@ -0,0 +1,88 @@
+import threading, time
+import pytest
+from app.agents import writer
+from app.tools import llm_gemini
+from app.tools.ratelimit import Budget, TokenBucketLimiter, backoff_delay
+from bench.synth import make_brief, make_corpus
+
+class ResourceExhausted(Exception):
+    code = 429
+
+class FakeGemini:
+    """Raises `fail` for the first `n_fail` calls, then drafts."""
+    def __init__(self, n_fail: int = 0, fail=ResourceExhausted("429 Resource has been exhausted"), name: str = "fake"):
+        self.n_fail, self.fail, self.model_name = n_fail, fail, name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+            failing = self.calls <= self.n_fail
+        if failing:
+            raise self.fail
+        return type("Resp", (), {"text": "Hi — fake draft."})()
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Backoff attempts requested by the retry loop (without sleeping); a limiter that never waits."""
+    seen = []
+    monkeypatch.setattr(llm_gemini, "backoff_delay", lambda attempt, base, cap: seen.append(attempt) or 0.0)
+    monkeypatch.setattr(llm_gemini, "limiter", TokenBucketLimiter(60_000, 10 ** 9))
+    monkeypatch.setattr(llm_gemini, "LLM_MAX_RETRIES", 3)
+    return seen
+
+INV, BRIEF = make_corpus(1)[0], make_brief()
+
+def _draft(model, budget=None):
+    return llm_gemini.draft_email(INV["name"], INV["fund"], "fit", BRIEF, budget=budget, model=model)
+
+def test_429s_are_retried_with_backoff(delays):
+    model = FakeGemini(n_fail=2)
+    assert _draft(model) == ("Hi — fake draft.", "llm")
+    assert model.calls == 3 and delays == [0, 1]
+
+def test_retries_stop_at_the_limit_and_fall_back(delays):
+    model = FakeGemini(n_fail=100)
+    email, source = _draft(model)
+    assert source == "fallback" and email.startswith("Subject: Intro")
+    assert model.calls == 4 and delays == [0, 1, 2]
+
+def test_other_errors_are_not_retried(delays):
+    model = FakeGemini(n_fail=100, fail=ValueError("bad request"))
+    assert _draft(model)[1] == "fallback"
+    assert model.calls == 1 and delays == []
+
+def test_budget_exhaustion_serves_the_template(delays):
+    model = FakeGemini(name="fake-budget")
+    sources = {i: s for i, _, s in writer.iter_batch(make_corpus(8), BRIEF, budget=3, concurrency=4, model=model)}
+    assert len(sources) == 8
+    assert list(sources.values()).count("llm") == 3
+    assert [s for s in sources.values() if s != "llm"] == ["budget"] * 5
+    assert model.calls == 3
+
+def test_budget_is_a_shared_countdown():
+    budget = Budget(50)
+    took = []
+    threads = [threading.Thread(target=lambda: took.extend(budget.take() for _ in range(20))) for _ in range(5)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert took.count(True) == 50 and budget.remaining == 0
+
+def test_backoff_delay_stays_within_bounds():
+    for attempt in range(12):
+        cap = min(20.0, 1.0 * 2 ** attempt)
+        xs = [backoff_delay(attempt, 1.0, 20.0) for _ in range(200)]
+        assert all(0.0 <= x <= cap for x in xs)
+    assert max(backoff_delay(30, 1.0, 20.0) for _ in range(200)) <= 20.0
+
+def test_token_bucket_paces_requests_and_tokens():
+    limiter = TokenBucketLimiter(rpm=600, tpm=10 ** 6, burst=2)     # one request per 0.1 s after the burst
+    assert limiter.acquire(timeout=0) and limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.01)
+    t0 = time.monotonic()
+    assert limiter.acquire(timeout=1.0)
+    assert 0.03 <= time.monotonic() - t0 <= 0.5
+    tokens = TokenBucketLimiter(rpm=10 ** 6, tpm=600)
+    assert tokens.acquire(600, timeout=0)
+    assert not tokens.acquire(300, timeout=0.05)    # 300 tokens take 30 s to refill
@@ -0,0 +1,53 @@
+import json, time
+import psycopg2
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app import main
+from app.agents import writer
+from pydantic import ValidationError
+from app.config import MAX_TOP_K
+from app.schemas import GenerateRequest, GenerateBatchRequest
+
+BRIEF = {"name": "Acme", "one_liner": "AI infra", "sector": ["ai", "infra"], "stage": "seed", "geo": "US"}
+
+@pytest.mark.parametrize("error, status", [(RuntimeError("boom"), 500), (psycopg2.OperationalError("down"), 503)])
+def test_generate_surfaces_pipeline_failures(monkeypatch, error, status):
+    def fail(**kw):
+        raise error
+    monkeypatch.setattr(main, "run_pipeline", fail)
+    with pytest.raises(HTTPException) as e:
+        main.generate(GenerateRequest(brief=BRIEF))
+    assert e.value.status_code == status
+
+def test_generate_keeps_matches_when_exports_cannot_be_queued(monkeypatch):
+    match = {"investor": {"name": "Fund"}, "score": dict.fromkeys(
+        ("fit_score", "stage_fit", "sector_fit", "geo_fit", "momentum"), 0.5) | {"rationale": "fit"}}
+    monkeypatch.setattr(main, "run_pipeline", lambda **kw: ([match], {}, {}))
+    def enqueue(*a):
+        raise OSError("queue unavailable")
+    monkeypatch.setattr(main, "enqueue_exports", enqueue)
+    out = main.generate(GenerateRequest(brief=BRIEF, exports=["csv"]))
+    assert len(out["matches"]) == 1 and out["export_jobs"] == {}
+
+@pytest.mark.parametrize("top_k", [0, MAX_TOP_K + 1])
+def test_top_k_is_bounded(top_k):
+    with pytest.raises(ValidationError):
+        GenerateRequest(brief=BRIEF, top_k=top_k)
+    with pytest.raises(ValidationError):
+        GenerateBatchRequest(briefs=[BRIEF], top_k=top_k)
+    assert GenerateRequest(brief=BRIEF, top_k=MAX_TOP_K).top_k == MAX_TOP_K
+
+def test_generate_emails_streams_in_completion_order(monkeypatch):
+    delays = {"A": 0.45, "B": 0.0, "C": 0.3, "D": 0.15}     # finish B, D, C, A
+    def slow_provider(name, fund, rationale, brief, allow_llm=True, budget=None, model=None):
+        time.sleep(delays[name])
+        return f"Hi {name}", "llm"
+    monkeypatch.setattr(writer, "draft_email", slow_provider)
+    monkeypatch.setattr(writer.drafts, "put", lambda *a: None)
+    investors = [{"name": n, "fund": f"{n} Fund", "stages": ["seed"], "sectors": ["ai"]} for n in delays]
+    with TestClient(main.app).stream("POST", "/api/generate_emails",
+                                     json={"brief": BRIEF, "investors": investors, "regenerate": True}) as r:
+        lines = [json.loads(line) for line in r.iter_lines() if line]
+    assert [x["index"] for x in lines] == [1, 3, 2, 0]
+    assert [x["email_draft"] for x in lines] == ["Hi B", "Hi D", "Hi C", "Hi A"]
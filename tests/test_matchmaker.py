@@ -0,0 +1,21 @@
+from app.agents import matchmaker
+from app.records import InvestorRecord
+from app.tools.index import InvestorIndex
+from bench.synth import make_brief, make_corpus
+
+def _plain(ranked):
+    return [(inv.name, inv.fund, sc) for inv, sc in ranked]
+
+def test_rank_rows_matches_fresh_encode_with_live_and_enriched_candidates():
+    index = InvestorIndex([InvestorRecord.from_dict(d, source="seed") for d in make_corpus(3000)])
+    brief = make_brief()
+    live = [InvestorRecord.from_dict({**d, "name": d["name"] + " (live)"}, source="serpapi")
+            for d in make_corpus(15, seed=5)]
+    candidates = live + index.candidates(brief["sector"], brief["stage"])
+    # enrichment swaps records for copies: those are no longer corpus rows
+    candidates[20] = candidates[20].replace(recent_news=["Led a new round"])
+    rows = index.rows(candidates)
+    assert (rows[:15] == -1).all() and rows[20] == -1 and (rows[21:] >= 0).all()
+    for top_k in (10, None):
+        assert _plain(matchmaker.rank_rows(brief, index.matrix, candidates, rows, top_k)) == \
+            _plain(matchmaker.run(brief, candidates, top_k))
@@ -0,0 +1,77 @@
+import pytest
+pytest.importorskip("notion_client")
+from app.agents import matchmaker
+from app.cache import DiskCache
+from app.orchestrator import _assemble
+from bench.mock_notion import MockNotion, serve, _exporter, _table_rows
+from bench.synth import make_brief, make_corpus
+
+BRIEF = make_brief()
+MATCHES = _assemble(matchmaker.run(BRIEF, make_corpus(900), top_k=300))
+
+@pytest.fixture
+def mock():
+    m = MockNotion(plost=0.5, seed=3)
+    server = serve(m)
+    m.port = server.server_port
+    yield m
+    server.shutdown()
+
+def test_lost_appends_are_reconciled_not_duplicated(mock, tmp_path):
+    ex = _exporter(mock.port, "table", 1000, DiskCache(str(tmp_path / "s.sqlite")), max_retries=8, sleep=lambda s: None)
+    ex.run(BRIEF, MATCHES)
+    assert mock.lost and ex.reconciled
+    assert _table_rows(mock) == len(MATCHES) + 1     # header + one row per match, none written twice
+
+def test_lost_database_rows_are_reconciled_not_duplicated(mock, tmp_path):
+    ex = _exporter(mock.port, "database", 1000, DiskCache(str(tmp_path / "s.sqlite")), max_retries=8, sleep=lambda s: None)
+    ex.run(BRIEF, MATCHES[:20])
+    assert mock.lost
+    ranks = sorted(r["Rank"]["number"] for rows in mock.db_rows.values() for r in rows)
+    assert ranks == list(range(1, 21))
+
+class Refused(Exception):
+    status = 429
+
+class Unavailable(Exception):
+    status = 503
+
+def test_writes_without_reconcile_are_only_retried_when_refused(tmp_path):
+    from app.notion_export import NotionExporter
+    from app.tools.ratelimit import TokenBucketLimiter
+    ex = NotionExporter(client=object(), rate_limiter=TokenBucketLimiter(1e6, 1e12, burst=100),
+                        state=DiskCache(str(tmp_path / "s.sqlite")), max_retries=3, sleep=lambda s: None)
+    errors = [Refused(), Unavailable()]
+    def create(**kw):
+        if errors:
+            raise errors.pop(0)
+        return {"id": "page"}
+    with pytest.raises(Unavailable):       # the 5xx'd create may have landed: not repeated in place
+        ex._call(create)
+    assert ex.requests == 2 and ex.retries == 1
+    errors.append(Unavailable())
+    assert ex._call(create, reconcile=lambda: None) == {"id": "page"}    # re-read shows it did not land
+    errors.append(Unavailable())
+    assert ex._call(create, reconcile=lambda: {"id": "landed"}) == {"id": "landed"}
+
+@pytest.mark.parametrize("mode, lost", [("table", 1), ("table", 2), ("table", 4), ("database", 1), ("database", 2), ("database", 5)])
+def test_rerun_after_a_lost_write_resumes_without_duplicates(tmp_path, mode, lost):
+    # write `lost` (1 = the page, 2 = the table or database, later = rows) lands but its response is a
+    # 504, and no retries are left: the run fails; the job queue's rerun must not write it again
+    m = MockNotion()
+    m.lose_calls = {lost}
+    server = serve(m)
+    state = DiskCache(str(tmp_path / "s.sqlite"))
+    matches = MATCHES if mode == "table" else MATCHES[:6]
+    try:
+        with pytest.raises(Exception):
+            _exporter(server.server_port, mode, 1000, state, max_retries=0).run(BRIEF, matches)
+        _exporter(server.server_port, mode, 1000, state, max_retries=0).run(BRIEF, matches)
+    finally:
+        server.shutdown()
+    assert m.lost == 1
+    assert [b["type"] for b in m.children["parent"]] == ["child_page"]
+    if mode == "table":
+        assert _table_rows(m) == len(matches) + 1
+    else:
+        assert sorted(r["Rank"]["number"] for rows in m.db_rows.values() for r in rows) == list(range(1, 7))
@@ -0,0 +1,46 @@
+from app import orchestrator
+
+BRIEF = {"name": "Acme", "one_liner": "AI infra", "sector": ["ai", "infra"], "stage": "seed", "geo": "US"}
+
+def test_stream_ends_once_exports_are_queued(monkeypatch):
+    queued = {}
+    def enqueue(brief, matches, kinds):
+        queued.update({k: f"job-{k}" for k in kinds})
+        return dict(queued)
+    monkeypatch.setattr(orchestrator, "enqueue_exports", enqueue)
+    events = list(orchestrator.iter_pipeline(BRIEF, top_k=5, exports=["csv", "pdf"], background_exports=True))
+    assert [e["event"] for e in events[-2:]] == ["exports_queued", "done"]
+    assert events[-2]["jobs"] == {"csv": "job-csv", "pdf": "job-pdf"}
+    assert not any(e["event"] == "export_done" for e in events)
+
+def test_sql_truncated_rankings_are_not_cached_as_complete(monkeypatch):
+    from app.records import InvestorRecord
+    from bench.synth import make_corpus
+    stored = {}
+    rows = [InvestorRecord.from_dict(d, source="seed") for d in make_corpus(30)]
+    monkeypatch.setattr(orchestrator, "corpus_snapshot", lambda: (None, "pg-test"))
+    monkeypatch.setattr(orchestrator, "SQL_CANDIDATES", 30)
+    monkeypatch.setattr(orchestrator.researcher, "search", lambda brief, index=None: list(rows))
+    monkeypatch.setattr(orchestrator.rankings, "put", lambda key, ranked, complete, corpus_version: stored.update(complete=complete))
+    monkeypatch.setattr(orchestrator.rankings, "get", lambda key, top_k, version: None)
+    orchestrator.rank(BRIEF, top_k=5)
+    assert stored == {"complete": False}
+    rows.pop()      # one short of the SQL limit: everything that matched came back
+    orchestrator.rank(BRIEF, top_k=5)
+    assert stored == {"complete": True}
+
+def test_matches_are_persisted_by_a_background_job(monkeypatch, tmp_path):
+    from app import db, jobs
+    saved = []
+    monkeypatch.setattr(db, "save_matches", lambda run_id, matches, brief_fp=None: saved.append((brief_fp, matches)))
+    monkeypatch.setattr(db, "available", lambda: True)
+    queue = jobs.JobQueue(str(tmp_path / "jobs.sqlite"))
+    queue.handlers = dict(jobs.queue.handlers)
+    monkeypatch.setattr(jobs, "queue", queue)
+    events = list(orchestrator.iter_pipeline(BRIEF, top_k=3, exports=[]))
+    assert events[-1]["event"] == "done" and saved == []      # nothing written on the response path
+    assert queue.run_once()
+    (brief_fp, matches), = saved
+    assert brief_fp == orchestrator.brief_fingerprint(BRIEF)
+    assert [m["investor"]["name"] for m in matches] == \
+        [m["investor"].name for e in events if e["event"] == "matches" for m in e["matches"]]
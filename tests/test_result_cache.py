@@ -0,0 +1,68 @@
+import json, time
+from app.records import InvestorRecord
+from app.result_cache import RankingCache
+from app.tools.corpus import CorpusManager
+from app.tools.search import _seed_record
+
+def _ranked(name):
+    return [(InvestorRecord.from_dict({"name": name, "fund": "F"}), {"fit_score": 50.0})]
+
+def test_requests_on_an_old_snapshot_do_not_move_the_version_back():
+    cache = RankingCache(maxsize=16, use_pg=False)
+    cache.corpus_changed("v1")
+    cache.put("a:v1", _ranked("a"), complete=True, corpus_version="v1")
+    cache.corpus_changed("v2")
+    assert cache.lru.stats()["size"] == 0
+    cache.put("b:v2", _ranked("b"), complete=True, corpus_version="v2")
+    # a request that started before the reload finishes on v1
+    assert cache.get("a:v1", 10, "v1") is None
+    cache.put("a:v1", _ranked("a"), complete=True, corpus_version="v1")
+    assert cache.corpus_version == "v2"
+    assert cache.get("a:v1", 10, "v1") is None
+    assert cache.get("b:v2", 10, "v2")[0][0].name == "b"
+
+def test_corpus_manager_announces_versions_in_publish_order(tmp_path):
+    path = tmp_path / "seed.json"
+    path.write_text(json.dumps([{"name": "A", "fund": "F", "stages": ["seed"], "sectors": ["ai"]}]))
+    mgr = CorpusManager(str(path), _seed_record, check_s=-1)
+    seen = []
+    mgr.subscribe(seen.append)
+    first = mgr.current().version
+    path.write_text(json.dumps([{"name": "B", "fund": "F", "stages": ["seed"], "sectors": ["ai"]}]))
+    mgr.reload()
+    assert seen == [first, mgr.current().version] and seen[0] != seen[1]
+
+def test_a_failing_listener_does_not_break_postgres_snapshots(monkeypatch):
+    from app import db
+    from app.tools import search
+    versions = iter(["pg-1", "pg-2"])
+    monkeypatch.setattr(db, "investors_version", lambda: next(versions))
+    seen = []
+    def broken(version):
+        raise RuntimeError("purge failed")
+    monkeypatch.setattr(search, "_pg_listeners", [broken, seen.append])
+    monkeypatch.setattr(search, "_pg_version", ("", 0.0))
+    assert search._postgres_version() == "pg-1"
+    assert search._postgres_version(refresh=True) == "pg-2"
+    assert seen == ["pg-1", "pg-2"]
+
+def test_postgres_tier_failures_are_counted(monkeypatch):
+    from app import db
+    from app.metrics import SWALLOWED
+    def down(*a, **kw):
+        raise ConnectionError("no postgres")
+    monkeypatch.setattr(db, "available", lambda: True)
+    monkeypatch.setattr(db, "get_cached_ranking", down)
+    monkeypatch.setattr(db, "put_cached_ranking", down)
+    count = lambda where: SWALLOWED.labels(where=where, type="ConnectionError")._value.get()
+    before = count("ranking_cache_get"), count("ranking_cache_put")
+    cache = RankingCache(maxsize=16, use_pg=True)
+    cache.put("a:v1", _ranked("a"), complete=True, corpus_version="v1")
+    assert cache.get("b:v1", 10, "v1") is None
+    assert (count("ranking_cache_get"), count("ranking_cache_put")) == (before[0] + 1, before[1] + 1)
+
+def test_get_ignores_requests_on_a_replaced_snapshot():
+    cache = RankingCache(maxsize=16, use_pg=False)
+    cache.corpus_changed("v2")
+    cache.lru.put("a:v1", {"ranked": _ranked("a"), "complete": True, "stored_at": time.time()})
+    assert cache.get("a:v1", 10, "v1") is None
@@ -0,0 +1,58 @@
+import os, threading, time
+import pytest
+from app.cache import DiskCache
+from app.tools import search
+
+def _response(q):
+    return {"organic_results": [
+        {"title": "Conviction Capital — AI seed fund", "link": "https://conviction.com", "snippet": ""},
+        {"title": "Top investors", "link": "https://example.org/list", "snippet": "Northwind Ventures, Acme Partners"},
+    ]}
+
+class FakeSerp:
+    """client(params) -> dict; records queries, optionally slow or failing."""
+    def __init__(self, delay_s: float = 0.0, fail: bool = False):
+        self.delay_s, self.fail = delay_s, fail
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def __call__(self, params):
+        with self._lock:
+            self.queries.append(params["q"])
+        time.sleep(self.delay_s)
+        if self.fail:
+            raise ConnectionError("serpapi down")
+        return _response(params["q"])
+
+@pytest.fixture(autouse=True)
+def serp_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(search, "_serp_cache", DiskCache(os.path.join(tmp_path, "serp.sqlite")))
+    search._serp_stats.clear()
+
+def test_queries_fan_out_concurrently_and_dedupe():
+    client = FakeSerp(delay_s=0.3)
+    t0 = time.monotonic()
+    got = search.search_live_investors(["ai"], "seed", client=client)
+    assert time.monotonic() - t0 < 0.55       # two queries at 0.3 s each, run side by side
+    assert len(client.queries) == 2
+    funds = [inv.fund for inv in got]
+    assert sorted(funds) == sorted(set(funds)) and "Conviction Capital" in funds
+
+def test_repeat_searches_are_served_from_the_query_cache():
+    client = FakeSerp()
+    first = search.search_live_investors(["ai"], "seed", client=client)
+    again = search.search_live_investors(["AI"], "seed", client=client)    # same queries up to case
+    assert len(client.queries) == 2
+    assert [i.unique_key for i in again] == [i.unique_key for i in first]
+    assert {k: search._serp_stats[k] for k in ("hits", "misses")} == {"hits": 2, "misses": 2}
+
+def test_client_errors_return_nothing_and_are_not_cached():
+    assert search.search_live_investors(["ai"], "seed", client=FakeSerp(fail=True)) == []
+    assert search._serp_stats["errors"] == 2
+    client = FakeSerp()
+    assert search.search_live_investors(["ai"], "seed", client=client)
+    assert len(client.queries) == 2
+
+def test_no_signal_sends_no_queries():
+    client = FakeSerp()
+    assert search.search_live_investors([], "", client=client) == [] and client.queries == []
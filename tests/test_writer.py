@@ -0,0 +1,56 @@
+from app.agents import writer
+from app.draft_cache import drafts
+
+BRIEF = {"name": "Acme", "one_liner": "payments for clinics", "sector": ["fintech"], "stage": "seed",
+         "geo": "US", "traction": ["$40k MRR"]}
+INVESTOR = {"name": "Sarah Guo", "fund": "Conviction", "stages": ["seed"], "sectors": ["ai"]}
+SCORE = {"rationale": "Thesis alignment."}
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+class BrokenStream:
+    """Streams `pieces`, then raises: a connection dropped mid-draft."""
+    model_name = "broken-stream"
+
+    def __init__(self, pieces, fail=True):
+        self.pieces, self.fail = pieces, fail
+
+    def generate_content(self, prompt, stream=False):
+        def chunks():
+            for p in self.pieces:
+                yield _Chunk(p)
+            if self.fail:
+                raise ConnectionError("stream reset")
+        return chunks()
+
+def _events(model, **kw):
+    return list(writer.iter_draft(INVESTOR, SCORE, BRIEF, model=model, **kw))
+
+def test_mid_stream_failure_replaces_draft_and_is_not_cached():
+    model = BrokenStream(["Hi Sarah, ", "we are"])
+    events = _events(model)
+    assert [e["event"] for e in events] == ["chunk", "chunk", "fallback", "done"]
+    assert events[-1]["source"] == "fallback"
+    assert events[2]["text"].startswith("Subject: Intro")
+    assert drafts.get(writer._cache_key(INVESTOR, BRIEF, model)) is None
+    # and the next draft does not come back from the cache
+    assert writer.draft(INVESTOR, SCORE, BRIEF, model=BrokenStream(["x"]))[1] == "fallback"
+
+def test_complete_stream_is_cached():
+    model = BrokenStream(["Hi Sarah, ", "we are building Acme."], fail=False)
+    model.model_name = "complete-stream"
+    events = _events(model)
+    assert events[-1]["source"] == "llm"
+    assert writer.draft(INVESTOR, SCORE, BRIEF, model=model) == ("Hi Sarah, we are building Acme.", "cache")
+
+def test_prompt_edit_rolls_the_draft_cache_key(monkeypatch):
+    from app.tools import llm_gemini
+    before = writer._cache_key(INVESTOR, BRIEF, None)
+    llm_gemini.prompt_version.cache_clear()
+    monkeypatch.setattr(llm_gemini, "prompt_template", lambda: "Write to {investor_name} at {fund}.\n{brief}")
+    try:
+        assert writer._cache_key(INVESTOR, BRIEF, None) != before
+    finally:
+        llm_gemini.prompt_version.cache_clear()
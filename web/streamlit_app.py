@@ -1,11 +1,15 @@
-import os, time, threading, requests
+import os, json, requests
 import streamlit as st
 import pandas as pd
 from urllib.parse import urlparse
 
 API_BASE = os.getenv("COPILOT_API_URL_BASE", "http://127.0.0.1:8000")
 API_GENERATE = f"{API_BASE}/api/generate"
+API_GENERATE_STREAM = f"{API_BASE}/api/generate/stream"
 API_EMAIL = f"{API_BASE}/api/generate_email"
+API_EMAIL_STREAM = f"{API_BASE}/api/generate_email/stream"
+API_EMAILS = f"{API_BASE}/api/generate_emails"
+API_JOBS = f"{API_BASE}/api/jobs"
 
 st.set_page_config(page_title="Fundraise Copilot", layout="wide")
 st.title("🚀 Startup Fundraising Copilot")
@@ -35,13 +39,46 @@ def domain(u: str) -> str:
     except Exception:
         return u
 
-def run_pipeline(payload, out: dict, err: dict):
+def stream_pipeline(payload):
+    """Yields the NDJSON stage events of /api/generate/stream as they arrive."""
+    with requests.post(API_GENERATE_STREAM, json=payload, stream=True, timeout=(10, 180)) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if line:
+                yield json.loads(line)
+
+def stream_email(payload, placeholder) -> str:
+    """Renders the draft into `placeholder` as /api/generate_email/stream emits chunks; returns the full text."""
+    text = ""
+    with requests.post(API_EMAIL_STREAM, json=payload, stream=True, timeout=(10, 120)) as r:
+        r.raise_for_status()
+        for line in r.iter_lines():
+            if not line:
+                continue
+            ev = json.loads(line)
+            if ev["event"] in ("chunk", "fallback"):
+                # a fallback replaces a draft that broke off midway
+                text = ev["text"] if ev["event"] == "fallback" else text + ev["text"]
+                placeholder.code(text, language="markdown")
+    placeholder.empty()
+    return text.strip()
+
+def job_status(job_id: str) -> dict:
     try:
-        r = requests.post(API_GENERATE, json=payload, timeout=180)
+        r = requests.get(f"{API_JOBS}/{job_id}", timeout=10)
         r.raise_for_status()
-        out["data"] = r.json()
+        return r.json()
     except Exception as e:
-        err["error"] = str(e)
+        return {"status": "unknown", "error": str(e)}
+
+def job_artifact(job: dict) -> bytes:
+    # downloaded once per job, then kept for reruns
+    cache = st.session_state.setdefault("artifacts", {})
+    if job["id"] not in cache:
+        r = requests.get(f"{API_BASE}{job['download_url']}", timeout=60)
+        r.raise_for_status()
+        cache[job["id"]] = r.content
+    return cache[job["id"]]
 
 def matches_to_df(matches):
     rows=[]
@@ -108,20 +145,39 @@ if generate:
         "allow_scrape":allow_scrape,
         "exports":export_opts
     }
-    res, err = {}, {}
-    t = threading.Thread(target=run_pipeline, args=(payload,res,err))
-    t.start()
+    final, prelim, export_jobs, scraped = [], [], {}, 0
     with st.status("Running pipeline…", expanded=True) as s:
-        for msg in ["🔎 Researcher…","🧮 Matchmaker…","✉️ Writer (on-demand)…"]:
-            st.write(msg); time.sleep(0.2)
-        t.join()
-        if err.get("error"):
-            s.update(label="❌ Error", state="error"); st.error(err["error"])
-        else:
+        table, scrape_note = st.empty(), st.empty()
+        try:
+            for ev in stream_pipeline(payload):
+                kind = ev["event"]
+                if kind == "search_started":
+                    st.write("🔎 Researcher: searching investors…")
+                elif kind == "search_completed":
+                    st.write(f"🔎 {ev['candidates']} candidates" + (" (cached)" if ev.get("cached") else ""))
+                elif kind == "matches":
+                    # preliminary batches show up while scraping continues; final ones replace them
+                    if ev["final"]: final += ev["matches"]
+                    else: prelim += ev["matches"]
+                    table.dataframe(matches_to_df(final or prelim), use_container_width=True, hide_index=True)
+                elif kind == "scrape_completed":
+                    scraped += 1; scrape_note.caption(f"🌐 Enriched {scraped} pages…")
+                elif kind == "scoring_done":
+                    st.write(f"🧮 Matchmaker: {ev['count']} investors ranked")
+                elif kind == "exports_queued":
+                    # the stream ends here; the results panel polls the jobs
+                    export_jobs = ev["jobs"]
+                    if export_jobs:
+                        st.write(f"📦 Exports queued: {', '.join(k.upper() for k in export_jobs)}")
+                elif kind == "error":
+                    raise RuntimeError(ev["detail"])
+            table.empty()
             s.update(label="✅ Complete", state="complete")
-            st.session_state["results"] = res.get("data", {})
+            st.session_state["results"] = {"matches": final, "exports": {}, "export_jobs": export_jobs}
             # Save current brief for on-demand email calls
             st.session_state["brief_for_email"] = payload["brief"]
+        except Exception as e:
+            s.update(label="❌ Error", state="error"); st.error(str(e))
 
 # ====== RESULTS ======
 st.write(""); st.markdown("---"); st.header("🏁 Results")
@@ -131,22 +187,36 @@ if not data:
     st.info("Generate targets first, then create emails per investor.")
 else:
     matches = data.get("matches", [])
-    exports = data.get("exports", {})
+    export_jobs = data.get("export_jobs", {})
+    jobs = {kind: job_status(job_id) for kind, job_id in export_jobs.items()}
 
     c1,c2,c3,c4 = st.columns(4)
     total=len(matches); avg= round(sum(m["fit_score"] for m in matches)/total,1) if total else 0
     top_fund = matches[0]["investor"]["fund"] if total else "—"
-    exported = " • ".join([x for x in ["CSV" if exports.get("csv") else "", "PDF" if exports.get("pdf") else "", "Notion" if exports.get("notion") else ""] if x])
+    exported = " • ".join(f"{kind.upper()} ({job['status']})" for kind, job in jobs.items())
     with c1: st.metric("Total matches", total)
     with c2: st.metric("Average score", avg)
     with c3: st.metric("Top-ranked fund", top_fund)
     with c4: st.metric("Exports", exported or "None")
-    if exported:
-        links=[]
-        if exports.get("csv"): links.append(f"CSV: `{exports['csv']}`")
-        if exports.get("pdf"): links.append(f"PDF: `{exports['pdf']}`")
-        if exports.get("notion"): links.append(f"[Notion Page]({exports['notion']})")
-        st.markdown("**Download / Links:** " + " • ".join(links))
+    if jobs:
+        cols = st.columns(len(jobs) + 1)
+        for col, (kind, job) in zip(cols, jobs.items()):
+            with col:
+                if job["status"] == "done" and kind == "notion":
+                    st.markdown(f"[Notion Page]({job['result']})" if job.get("result") else "Notion: not configured")
+                elif job["status"] == "done" and job.get("download_url"):
+                    try:
+                        st.download_button(f"Download {kind.upper()}", job_artifact(job),
+                                           file_name=os.path.basename(job["result"]), key=f"dl_{job['id']}")
+                    except Exception as e:
+                        st.caption(f"{kind.upper()}: download failed ({e})")
+                elif job["status"] == "failed":
+                    st.caption(f"{kind.upper()} failed: {job.get('error')}")
+                else:
+                    st.caption(f"{kind.upper()}: {job['status']}…")
+        with cols[-1]:
+            if any(j["status"] in ("queued", "running") for j in jobs.values()):
+                st.button("↻ Refresh exports")
 
     st.write(""); st.subheader("Ranked Investors (sortable table)")
     st.dataframe(matches_to_df(matches), use_container_width=True, hide_index=True)
@@ -155,6 +225,28 @@ else:
     if "emails" not in st.session_state: st.session_state["emails"] = {}
     if "visible" not in st.session_state: st.session_state["visible"] = {}
 
+    bL, bR = st.columns([5, 2])
+    with bR:
+        draft_all = st.button("✉️ Draft all emails", use_container_width=True)
+    if draft_all and st.session_state.get("brief_for_email"):
+        todo = [(i, m["investor"]) for i, m in enumerate(matches, start=1)
+                if f"{m['investor'].get('name','')}-{m['investor'].get('fund','')}-{i}" not in st.session_state["emails"]]
+        progress = st.progress(0.0, text="Drafting emails…")
+        try:
+            payload = {"brief": st.session_state["brief_for_email"], "investors": [inv for _, inv in todo], "use_llm": True}
+            with requests.post(API_EMAILS, json=payload, stream=True, timeout=(10, 300)) as r:
+                r.raise_for_status()
+                for n, line in enumerate(filter(None, r.iter_lines()), start=1):
+                    d = json.loads(line)
+                    i, inv = todo[d["index"]]
+                    key = f"{inv.get('name','')}-{inv.get('fund','')}-{i}"
+                    st.session_state["emails"][key] = d["email_draft"]
+                    st.session_state["visible"][key] = True
+                    progress.progress(n / max(1, len(todo)), text=f"Drafted {n}/{len(todo)}")
+        except Exception as e:
+            st.error(f"Failed to draft emails: {e}")
+        progress.empty()
+
     @st.fragment
     def render_cards():
         st.write(""); st.subheader("Detailed Cards")
@@ -175,6 +267,7 @@ else:
                     f"Why now: <i>{m['rationale']}</i></div>",
                     unsafe_allow_html=True
                 )
+                live = st.empty()
             with hR:
                 use_llm = st.checkbox("Use Gemini for email", value=True, key=f"use_llm_{key}")
                 # Single button: if no email -> generate & show; if already visible -> hide; if generated but hidden -> show
@@ -194,9 +287,7 @@ else:
                                 "ask": st.session_state.get("ask","")
                             }
                             payload = {"brief": brief, "investor": inv, "use_llm": use_llm}
-                            r = requests.post(API_EMAIL, json=payload, timeout=60)
-                            r.raise_for_status()
-                            st.session_state["emails"][key] = r.json().get("email_draft","")
+                            st.session_state["emails"][key] = stream_email(payload, live)
                             st.session_state["visible"][key] = True
                         except Exception as e:
                             st.error(f"Failed to generate email: {e}")
@@ -204,6 +295,15 @@ else:
                         # toggle
                         st.session_state["visible"][key] = not visible
                     st.rerun()
+                if email_text is not None and use_llm and st.button("↻ Regenerate", key=f"regen_{key}", use_container_width=True):
+                    try:
+                        payload = {"brief": st.session_state.get("brief_for_email"), "investor": inv,
+                                   "use_llm": True, "regenerate": True}
+                        st.session_state["emails"][key] = stream_email(payload, live)
+                        st.session_state["visible"][key] = True
+                    except Exception as e:
+                        st.error(f"Failed to regenerate email: {e}")
+                    st.rerun()
 
             st.markdown("<hr class='divider'/>", unsafe_allow_html=True)
 